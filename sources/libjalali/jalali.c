@@ -25,6 +25,9 @@
 #include <time.h>
 #include <stdlib.h>
 #include <sys/time.h>
+#if !(defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__)
+#include <pthread.h>
+#endif
 #include "jalali.h"
 #include "jconfig.h"
 
@@ -50,6 +53,10 @@ const int accumulated_jalali_month_len[] = { 0, 31, 62, 93, 124, 155, 186,
                                              216, 246, 276, 306, 336 };
 
 extern char* tzname[2];
+extern int jtzcache_lookup(time_t t, long int* gmtoff, int* isdst,
+                           const char** zone);
+
+static int jalali_cached_year_start(int year);
 
 /*
  * Jalali leap year indication function. The algorithm used here
@@ -65,6 +72,11 @@ int jalali_is_jleap(int year)
 {
     int pr = year;
 
+    if (year >= J_YEAR_TABLE_FIRST && year <= J_YEAR_TABLE_LAST)
+        return (jalali_cached_year_start(year + 1) -
+                jalali_cached_year_start(year)) ==
+            JALALI_LEAP_YEAR_LENGTH_IN_DAYS;
+
     /* Shifting ``year'' with 2820 year period epoch. */
     pr -= JALALI_LEAP_BASE;
 
@@ -120,6 +132,190 @@ int jalali_is_jleap(int year)
     return 0;
 }
 
+/*
+ * Floored division. C99 truncates toward zero which is not what we need
+ * for years and days located before the grand leap cycle epoch.
+ */
+static int jalali_floor_div(int a, int b)
+{
+    int q = a / b;
+
+    if ((a % b) && ((a < 0) != (b < 0)))
+        q--;
+
+    return q;
+}
+
+/*
+ * Number of leap years among the first r (0-132) years of a cycle.
+ * Every partition contributes a leap year on each fourth year, year 0
+ * of the partition excluded.
+ */
+static int jalali_cycle_leaps(int r)
+{
+    int i;
+
+    for (i=J_LI-1; i>0 && r < cycle_patterns[i]; i--);
+    r -= cycle_patterns[i];
+
+    return leaps[i] + ((r > 0) ? (r - 1) / J_LI : 0);
+}
+
+/*
+ * Number of days from Farvardin 1st of the grand leap cycle epoch
+ * (AP 475) to Farvardin 1st of the given year. Negative for years
+ * before the epoch. Constant time regardless of the year.
+ */
+static int jalali_year_start(int year)
+{
+    int y = year - JALALI_LEAP_BASE;
+    int q = jalali_floor_div(y, JALALI_LEAP_PERIOD);
+    int pr = y - (q * JALALI_LEAP_PERIOD);
+    int l;
+
+    if (pr > JALALI_LAST_CYCLE_START) {
+        l = JALALI_LEAPS_EXCLUDING_LAST_CYCLE +
+            jalali_cycle_leaps(pr - JALALI_LAST_CYCLE_START);
+    } else {
+        l = (pr / JALALI_NORMAL_CYCLE_LENGTH) * JALALI_LEAPS_IN_NORMAL_CYCLE +
+            jalali_cycle_leaps(pr % JALALI_NORMAL_CYCLE_LENGTH);
+    }
+
+    return (y * JALALI_NORMAL_YEAR_LENGTH_IN_DAYS) +
+        (q * JALALI_TOTAL_LEAPS_IN_PERIOD) + l;
+}
+
+#if !(defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__)
+/*
+ * Start days of years J_YEAR_TABLE_FIRST to J_YEAR_TABLE_LAST + 1, as
+ * returned by jalali_year_start(). Filled once on first use under
+ * pthread_once(), read only afterwards. jalali_year_table_ready is
+ * published after the table so lookups skip pthread_once() then.
+ */
+static int jalali_year_table[J_YEAR_TABLE_LAST - J_YEAR_TABLE_FIRST + 2];
+static pthread_once_t jalali_year_table_once = PTHREAD_ONCE_INIT;
+static int jalali_year_table_ready = 0;
+
+#if defined __GNUC__
+#define J_YEAR_TABLE_READY() \
+    __atomic_load_n(&jalali_year_table_ready, __ATOMIC_ACQUIRE)
+#define J_YEAR_TABLE_PUBLISH() \
+    __atomic_store_n(&jalali_year_table_ready, 1, __ATOMIC_RELEASE)
+#else
+#define J_YEAR_TABLE_READY() 0
+#define J_YEAR_TABLE_PUBLISH()
+#endif
+
+static void jalali_fill_year_table(void)
+{
+    int i;
+
+    for (i=0; i<J_YEAR_TABLE_LAST - J_YEAR_TABLE_FIRST + 2; i++)
+        jalali_year_table[i] = jalali_year_start(J_YEAR_TABLE_FIRST + i);
+
+    J_YEAR_TABLE_PUBLISH();
+}
+#endif
+
+/*
+ * jalali_year_start() through jalali_year_table for supported years.
+ */
+static int jalali_cached_year_start(int year)
+{
+#if defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__
+    return jalali_year_start(year);
+#else
+    int i = year - J_YEAR_TABLE_FIRST;
+
+    if (i < 0 || i > J_YEAR_TABLE_LAST - J_YEAR_TABLE_FIRST + 1)
+        return jalali_year_start(year);
+
+    if (!J_YEAR_TABLE_READY())
+        pthread_once(&jalali_year_table_once, jalali_fill_year_table);
+
+    return jalali_year_table[i];
+#endif
+}
+
+/*
+ * Inverse of jalali_year_start(). Splits a number of days since Farvardin
+ * 1st of AP 475 into a year and a zero based day of that year. Walks down
+ * period, cycle, partition and four year groups instead of years.
+ */
+static void jalali_year_from_days(int d, int* year, int* yday)
+{
+    int q = jalali_floor_div(d, JALALI_PERIOD_LENGTH_IN_DAYS);
+    int y = q * JALALI_LEAP_PERIOD;
+    int i, g;
+
+    d -= q * JALALI_PERIOD_LENGTH_IN_DAYS;
+
+    /* The last cycle is longer, it takes whatever remains of the period. */
+    i = d / JALALI_NORMAL_CYCLE_LENGTH_IN_DAYS;
+    if (i > JALALI_NORMAL_CYCLES_IN_PERIOD)
+        i = JALALI_NORMAL_CYCLES_IN_PERIOD;
+
+    y += i * JALALI_NORMAL_CYCLE_LENGTH;
+    d -= i * JALALI_NORMAL_CYCLE_LENGTH_IN_DAYS;
+
+    /* Partition, starting day of each is known from years and leaps. */
+    for (i=J_LI-1; i>0 && d < (cycle_patterns[i] *
+                               JALALI_NORMAL_YEAR_LENGTH_IN_DAYS +
+                               leaps[i]); i--);
+    y += cycle_patterns[i];
+    d -= cycle_patterns[i] * JALALI_NORMAL_YEAR_LENGTH_IN_DAYS + leaps[i];
+
+    /*
+     * Year 0 of a partition is ordinary, the rest are groups of four years
+     * each ending in a leap year.
+     */
+    if (d >= JALALI_NORMAL_YEAR_LENGTH_IN_DAYS) {
+        d -= JALALI_NORMAL_YEAR_LENGTH_IN_DAYS;
+        g = d / J_LI_LENGTH_IN_DAYS;
+        d %= J_LI_LENGTH_IN_DAYS;
+        i = d / JALALI_NORMAL_YEAR_LENGTH_IN_DAYS;
+        if (i > J_LI - 1)
+            i = J_LI - 1;
+
+        y += 1 + (g * J_LI) + i;
+        d -= i * JALALI_NORMAL_YEAR_LENGTH_IN_DAYS;
+    }
+
+    *year = y + JALALI_LEAP_BASE;
+    *yday = d;
+}
+
+/*
+ * jalali_year_from_days() through jalali_year_table for supported years.
+ * Average year length puts the guess at most one year off, a couple of
+ * table lookups settle it.
+ */
+static void jalali_cached_year_from_days(int d, int* year, int* yday)
+{
+    int y, s;
+
+    if (d < jalali_cached_year_start(J_YEAR_TABLE_FIRST) ||
+        d >= jalali_cached_year_start(J_YEAR_TABLE_LAST + 1)) {
+        jalali_year_from_days(d, year, yday);
+        return;
+    }
+
+    y = JALALI_LEAP_BASE + (int) (((long long) d * JALALI_LEAP_PERIOD) /
+                                  JALALI_PERIOD_LENGTH_IN_DAYS);
+    if (d < 0)
+        y--;
+    if (y < J_YEAR_TABLE_FIRST)
+        y = J_YEAR_TABLE_FIRST;
+
+    while ((s = jalali_cached_year_start(y)) > d)
+        y--;
+    while (jalali_cached_year_start(y + 1) <= d)
+        s = jalali_cached_year_start(++y);
+
+    *year = y;
+    *yday = d - s;
+}
+
 /*
  * Creates absolute values for day, hour, minute and seconds from time_t.
  * Values are signed integers.
@@ -130,15 +326,8 @@ void jalali_create_time_from_secs(time_t t, struct ab_jtm* d)
         ((t - (time_t) J_DAY_LENGTH_IN_SECONDS + (time_t) 1) /
          (time_t) J_DAY_LENGTH_IN_SECONDS);
 
-    if (t >= 0) {
-        t %= (time_t) J_DAY_LENGTH_IN_SECONDS;
-    }
-    else {
-        t = (J_DAY_LENGTH_IN_SECONDS -
-             (abs(t - J_DAY_LENGTH_IN_SECONDS) %
-              J_DAY_LENGTH_IN_SECONDS)) %
-            J_DAY_LENGTH_IN_SECONDS;
-    }
+    /* Seconds since midnight, abs() would truncate time_t to int. */
+    t -= (time_t) d->ab_days * (time_t) J_DAY_LENGTH_IN_SECONDS;
 
     d->ab_hour = t / J_HOUR_LENGTH_IN_SECONDS;
     t %= J_HOUR_LENGTH_IN_SECONDS;
@@ -216,23 +405,27 @@ int jalali_create_days_from_date(struct jtm* j)
 void jalali_get_jyear_info(struct jyinfo* year)
 {
     int y = year->y;
-    year->lf = jalali_is_jleap(year->y);
-    int i;
-    int d = (year->y >= JALALI_LEAP_BASE) ? 1 : -1;
-    int c = 0;
+    int c;
 
-    for (i=JALALI_LEAP_BASE; ; i+=d) {
-        if (jalali_is_jleap(i)) {
-            c++;
-        }
+    year->lf = jalali_is_jleap(year->y);
 
-        if (i == year->y)
-            break;
+    /*
+     * Leap years from AP 475 up to and including the year, or from the year
+     * up to AP 475 for years before it. Those are the days a year start has
+     * on top of whole ordinary years.
+     */
+    if (y >= JALALI_LEAP_BASE) {
+        c = jalali_cached_year_start(y + 1) -
+            (y + 1 - JALALI_LEAP_BASE) * JALALI_NORMAL_YEAR_LENGTH_IN_DAYS;
+        year->apl = c;
+        year->pl = c % JALALI_TOTAL_LEAPS_IN_PERIOD;
+    } else {
+        c = (y - JALALI_LEAP_BASE) * JALALI_NORMAL_YEAR_LENGTH_IN_DAYS -
+            jalali_cached_year_start(y);
+        year->apl = -c;
+        year->pl = JALALI_TOTAL_LEAPS_IN_PERIOD -
+            (c % JALALI_TOTAL_LEAPS_IN_PERIOD);
     }
-
-    year->apl = c * d;
-    year->pl = (d > 0) ? c % JALALI_TOTAL_LEAPS_IN_PERIOD :
-        JALALI_TOTAL_LEAPS_IN_PERIOD - (c % JALALI_TOTAL_LEAPS_IN_PERIOD);
     year->rl = JALALI_TOTAL_LEAPS_IN_PERIOD - year->pl;
 
     y-= JALALI_LEAP_BASE;
@@ -247,19 +440,10 @@ void jalali_get_jyear_info(struct jyinfo* year)
 }
 
 /*
- * Calculates date (Jalali) based on difference factor from UTC Epoch by days.
- * 0 means 1 January 1970 (11 Dey 1348).
+ * Date fields of day p since UTC Epoch, zone fields are left alone.
  */
-void jalali_get_date(int p, struct jtm* j)
+static void jalali_set_date(int p, struct jtm* j)
 {
-    int porg = p;
-    time_t t;
-    struct tm lt;
-#if defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__
-    struct timezone tz;
-    struct timeval tv;
-#endif
-
     int wd = (p + J_UTC_EPOCH_WDAY) % J_WEEK_LENGTH;
 
     if (wd < 0) {
@@ -268,29 +452,35 @@ void jalali_get_date(int p, struct jtm* j)
         j->tm_wday = wd;
     }
 
-    int y = J_UTC_EPOCH_YEAR, f=0;
-    p += J_UTC_EPOCH_DIFF;
-    int d;
-
-    while (1) {
-        d = (p >= 0) ? 1 : -1;
-        f = jalali_is_jleap(((d > 0) ? y : y-1)) ?
-            JALALI_LEAP_YEAR_LENGTH_IN_DAYS:
-            JALALI_NORMAL_YEAR_LENGTH_IN_DAYS;
-
-        if ((0 <= p) && (p < f))
-            break;
-
-        p-= (d * f);
-        y+= d;
-    }
+    int y;
+    p += jalali_cached_year_start(J_UTC_EPOCH_YEAR) + J_UTC_EPOCH_DIFF;
+    jalali_cached_year_from_days(p, &y, &p);
 
     j->tm_year = y;
     j->tm_yday = p;
 
     jalali_create_date_from_days(j);
+}
+
+/*
+ * Calculates date (Jalali) based on difference factor from UTC Epoch by days.
+ * 0 means 1 January 1970 (11 Dey 1348).
+ */
+void jalali_get_date(int p, struct jtm* j)
+{
+    time_t t;
+    struct tm lt;
+#if defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__
+    struct timezone tz;
+    struct timeval tv;
+#endif
+
+    jalali_set_date(p, j);
+    t = (time_t) p * J_DAY_LENGTH_IN_SECONDS;
+    if (!jtzcache_lookup(t, &j->tm_gmtoff, &j->tm_isdst, &j->tm_zone))
+        return;
+
     tzset();
-    t = porg * J_DAY_LENGTH_IN_SECONDS;
     localtime_r(&t, &lt);
 
 #if defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__
@@ -306,49 +496,56 @@ void jalali_get_date(int p, struct jtm* j)
     j->tm_isdst = lt.tm_isdst;
 }
 
+/*
+ * Like jalali_get_date(), in a zone gmtoff seconds east of UTC instead of
+ * local zone. tm_gmtoff is set to gmtoff and tm_isdst to 0, tm_zone is left
+ * alone. Neither TZ nor libc is consulted, safe to call from any thread.
+ */
+void jalali_get_date_off(int p, long int gmtoff, struct jtm* j)
+{
+    jalali_set_date(p, j);
+    j->tm_gmtoff = gmtoff;
+    j->tm_isdst = 0;
+}
+
 /*
  * Calculates UTC epoch difference of a desired date by measure of days.
  */
 int jalali_get_diff(const struct jtm* j)
 {
-    int p = 0;
-    int i;
-    int s, sd;
-    int e, ed;
-    int f = 1;
-
     if (j->tm_yday > 365 || j->tm_yday < 0)
         return -1;
 
-    if (j->tm_year == J_UTC_EPOCH_YEAR) {
-        p = j->tm_yday - J_UTC_EPOCH_DIFF;
-        return p;
-    }
-    else if (j->tm_year > J_UTC_EPOCH_YEAR) {
-        s = J_UTC_EPOCH_YEAR + 1;
-        sd = J_UTC_EPOCH_DIFF;
-        e = j->tm_year - 1;
-        ed = j->tm_yday + 1;
-    } else {
-        f = -1;
-        s = j->tm_year + 1;
-        sd = j->tm_yday;
-        e = J_UTC_EPOCH_YEAR - 1;
-        ed = J_UTC_EPOCH_DIFF + 1;
-    }
+    return jalali_cached_year_start(j->tm_year) + j->tm_yday -
+        jalali_cached_year_start(J_UTC_EPOCH_YEAR) - J_UTC_EPOCH_DIFF;
+}
 
-    for (i=s; i<=e; i++) {
-        p+= jalali_is_jleap(i) ? JALALI_LEAP_YEAR_LENGTH_IN_DAYS :
-            JALALI_NORMAL_YEAR_LENGTH_IN_DAYS;
-    }
+/*
+ * Fills jtm[0..n-1] with jalali_get_date() of p[0..n-1].
+ */
+void jalali_get_date_array(const int* p, struct jtm* jtm, size_t n)
+{
+    size_t i;
+
+    if (!p || !jtm)
+        return;
+
+    for (i=0; i<n; i++)
+        jalali_get_date(p[i], &jtm[i]);
+}
 
-    int r = jalali_is_jleap(s) ? JALALI_LEAP_YEAR_LENGTH_IN_DAYS - sd - 1 :
-        JALALI_NORMAL_YEAR_LENGTH_IN_DAYS - sd - 1;
+/*
+ * Fills p[0..n-1] with jalali_get_diff() of jtm[0..n-1].
+ */
+void jalali_get_diff_array(const struct jtm* jtm, int* p, size_t n)
+{
+    size_t i;
 
-    p += r + ed;
-    p*= f;
+    if (!jtm || !p)
+        return;
 
-    return p;
+    for (i=0; i<n; i++)
+        p[i] = jalali_get_diff(&jtm[i]);
 }
 
 /*
@@ -362,45 +559,39 @@ int jalali_year_month_days(int year, int month) {
 }
 
 /*
- * Updates a jalali date struct fields based on tm_year, tm_mon and tm_mday
+ * Normalizes time of day, month and year of a jalali date struct and
+ * returns its day since UTC Epoch.
  */
-void jalali_update(struct jtm* jtm)
+static int jalali_normalize(struct jtm* jtm)
 {
-    int dim; // number of days in current month
     RECLUSTER(jtm->tm_min, jtm->tm_sec, J_MINUTE_LENGTH_IN_SECONDS);
     RECLUSTER(jtm->tm_hour, jtm->tm_min, J_HOUR_LENGTH_IN_MINUTES);
     RECLUSTER(jtm->tm_mday, jtm->tm_hour, J_DAY_LENGTH_IN_HOURS);
-
-    /* start by calculating a year based on month and change month and year till mday fit */
     RECLUSTER(jtm->tm_year, jtm->tm_mon, J_YEAR_LENGTH_IN_MONTHS);
 
-    if (jtm->tm_mday < 1) {
-        /* breaking months to days */
-        while (jtm->tm_mday < 1) {
-            if (jtm->tm_mon == 0) {
-                jtm->tm_mon = 11;
-                jtm->tm_year -= 1;
-            } else {
-                jtm->tm_mon -= 1;
-            }
-            jtm->tm_mday += jalali_year_month_days(jtm->tm_year, jtm->tm_mon);
-        }
-    } else {
-        /* clustering days as months */
-        while (jtm->tm_mday > (dim=jalali_year_month_days(jtm->tm_year, jtm->tm_mon))) {
-            jtm->tm_mday -= dim;
-            if (jtm->tm_mon == 11) {
-                jtm->tm_mon = 0;
-                jtm->tm_year += 1;
-            } else {
-                jtm->tm_mon += 1;
-            }
-        }
-    }
+    /*
+     * Out of range days spill over into neighbouring months and years,
+     * counting them from the start of the year settles all at once.
+     */
+    return jalali_cached_year_start(jtm->tm_year) +
+        accumulated_jalali_month_len[jtm->tm_mon] + jtm->tm_mday - 1 -
+        jalali_cached_year_start(J_UTC_EPOCH_YEAR) - J_UTC_EPOCH_DIFF;
+}
 
-    /* date is normalized, compute tm_wday and tm_yday */
-    jalali_create_days_from_date(jtm);
-    jalali_get_date(jalali_get_diff(jtm), jtm);
+/*
+ * Updates a jalali date struct fields based on tm_year, tm_mon and tm_mday
+ */
+void jalali_update(struct jtm* jtm)
+{
+    jalali_get_date(jalali_normalize(jtm), jtm);
+}
+
+/*
+ * Like jalali_update(), zone fields are set by jalali_get_date_off().
+ */
+void jalali_update_off(struct jtm* jtm, long int gmtoff)
+{
+    jalali_get_date_off(jalali_normalize(jtm), gmtoff, jtm);
 }
 
 /*
@@ -80,10 +80,18 @@ extern void jalali_get_jyear_info(struct jyinfo* jyinfo);
 
 extern void jalali_get_date(int p, struct jtm* jtm);
 
+extern void jalali_get_date_off(int p, long int gmtoff, struct jtm* jtm);
+
 extern int jalali_get_diff(const struct jtm* jtm);
 
+extern void jalali_get_date_array(const int* p, struct jtm* jtm, size_t n);
+
+extern void jalali_get_diff_array(const struct jtm* jtm, int* p, size_t n);
+
 extern void jalali_update(struct jtm* jtm);
 
+extern void jalali_update_off(struct jtm* jtm, long int gmtoff);
+
 extern void jalali_show_time(const struct jtm* j);
 
 extern int jalali_year_month_days(int year, int month);
@@ -54,6 +54,14 @@
 #define JALALI_NORMAL_CYCLE_LENGTH 128
 #define JALALI_EXTENDED_CYCLE_LENGTH 132
 
+#define JALALI_PERIOD_LENGTH_IN_DAYS 1029983 /* 2820 * 365 + 683 */
+#define JALALI_NORMAL_CYCLE_LENGTH_IN_DAYS 46751 /* 128 * 365 + 31 */
+#define JALALI_NORMAL_CYCLES_IN_PERIOD 21
+#define J_LI_LENGTH_IN_DAYS 1461 /* Four years, the last one being leap. */
+
+#define J_YEAR_TABLE_FIRST 1 /* Years with a cached start day, datetime.min */
+#define J_YEAR_TABLE_LAST 9999 /* up to datetime.max. */
+
 #define J_DAY_LENGTH_IN_SECONDS 86400
 #define J_DAY_LENGTH_IN_HOURS 24
 #define J_HOUR_LENGTH_IN_SECONDS 3600
@@ -72,4 +80,8 @@
 #define J_UTC_EPOCH_DIFF 286
 #define J_UTC_EPOCH_WDAY 5
 
+#define J_TZCACHE_FIRST -2208988800LL /* 1900/01/01 UTC, first cached time. */
+#define J_TZCACHE_LAST 4102444800LL /* 2100/01/01 UTC, end of cached times. */
+#define J_TZCACHE_ZONES 64 /* Distinct zone abbreviations kept. */
+
 #endif /* JCONFIG_H */
@@ -22,7 +22,11 @@
 #include <stdio.h>
 #include <string.h>
 #include <stdlib.h>
+#include <limits.h>
 #include <sys/time.h>
+#if !(defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__)
+#include <pthread.h>
+#endif
 #include "jconfig.h"
 #include "jalali.h"
 #include "jtime.h"
@@ -62,12 +66,322 @@ const char* farsi_digits[] = { "۰", "۱", "۲", "۳", "۴",
 
 const char* tzname_fa[2] = { "زمان زمستانی", "زمان تابستانی" };
 
-static char in_buf[MAX_BUF_SIZE] = {0};
-static struct jtm in_jtm;
+/*
+ * Thread-local where the compiler allows, results of jasctime(), jctime(),
+ * jgmtime() and jlocaltime() are then private to calling thread.
+ */
+#if defined __STDC_VERSION__ && __STDC_VERSION__ >= 201112L && \
+    !defined __STDC_NO_THREADS__
+#define J_THREAD_LOCAL _Thread_local
+#elif defined __GNUC__
+#define J_THREAD_LOCAL __thread
+#else
+#define J_THREAD_LOCAL
+#endif
+
+static J_THREAD_LOCAL char in_buf[MAX_BUF_SIZE] = {0};
+static J_THREAD_LOCAL struct jtm in_jtm;
 
 extern char* tzname[2];
 extern const int jalali_month_len[];
 
+/*
+ * @Zone cache
+ * Opt-in replacement for tzset() and localtime_r() on every conversion.
+ * jtzcache_enable() resolves the local zone once into a table of offset
+ * changes between J_TZCACHE_FIRST and J_TZCACHE_LAST, conversions then
+ * look offsets up by binary search. Times outside the table and platforms
+ * without tm_gmtoff keep asking libc. jtzcache_refresh() picks up a changed
+ * TZ. Enabling, refreshing and disabling are serialized and may run while
+ * other threads convert times, those see either the old or the new table.
+ */
+struct jtzcache_entry {
+    time_t start;          /* First second the offset applies to. */
+    long int gmtoff;       /* Seconds east of UTC. */
+    int isdst;             /* Daylight saving time is in effect. */
+    const char* zone;      /* Timezone abbreviation, interned. */
+};
+
+struct jtzcache_table {
+    struct jtzcache_table* next; /* Table built before this one. */
+    time_t end;                  /* End of cached times. */
+    int n;                       /* Number of entries. */
+    struct jtzcache_entry e[];
+};
+
+/*
+ * Table in use, published by a single pointer store after it is filled.
+ */
+#if defined __GNUC__
+#define J_LOAD_ACQUIRE(p) __atomic_load_n(&(p), __ATOMIC_ACQUIRE)
+#define J_STORE_RELEASE(p, v) __atomic_store_n(&(p), (v), __ATOMIC_RELEASE)
+#else
+#define J_LOAD_ACQUIRE(p) (p)
+#define J_STORE_RELEASE(p, v) ((p) = (v))
+#endif
+
+static struct jtzcache_table* jtzcache = 0;
+
+/*
+ * Every table built so far. A lookup racing with refresh may still read a
+ * replaced table, so tables are never freed. A rebuilt table identical to
+ * an older one reuses that instead, memory is bounded by distinct zones.
+ */
+static struct jtzcache_table* jtzcache_tables = 0;
+
+#if !(defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__)
+static pthread_mutex_t jtzcache_lock = PTHREAD_MUTEX_INITIALIZER;
+#endif
+
+/*
+ * Zone abbreviations are never freed, tm_zone of results handed out
+ * before a refresh stays valid.
+ */
+static char* jtzcache_zones[J_TZCACHE_ZONES];
+
+static const char* jtzcache_intern(const char* zone)
+{
+    int i;
+
+    if (!zone)
+        zone = "";
+
+    for (i=0; i<J_TZCACHE_ZONES && jtzcache_zones[i]; i++) {
+        if (!strcmp(jtzcache_zones[i], zone))
+            return jtzcache_zones[i];
+    }
+
+    if (i == J_TZCACHE_ZONES)
+        return 0;
+
+    jtzcache_zones[i] = malloc(strlen(zone) + 1);
+    if (!jtzcache_zones[i])
+        return 0;
+
+    strcpy(jtzcache_zones[i], zone);
+    return jtzcache_zones[i];
+}
+
+#if !(defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__)
+static int jtzcache_probe(time_t t, struct jtzcache_entry* e)
+{
+    struct tm lt;
+
+    if (!localtime_r(&t, &lt))
+        return -1;
+
+    e->start = t;
+    e->gmtoff = lt.tm_gmtoff;
+    e->isdst = lt.tm_isdst;
+    e->zone = jtzcache_intern(lt.tm_zone);
+
+    return e->zone ? 0 : -1;
+}
+
+static int jtzcache_same(const struct jtzcache_entry* a,
+                         const struct jtzcache_entry* b)
+{
+    return a->gmtoff == b->gmtoff && a->isdst == b->isdst &&
+        a->zone == b->zone;
+}
+#endif
+
+/*
+ * Offset, DST flag and abbreviation of local time at t from the cache.
+ * Zero on success, -1 if the cache is disabled or doesn't cover t.
+ */
+int jtzcache_lookup(time_t t, long int* gmtoff, int* isdst, const char** zone)
+{
+    const struct jtzcache_table* c = J_LOAD_ACQUIRE(jtzcache);
+    int lo, hi, m;
+
+    if (!c || t < c->e[0].start || t >= c->end)
+        return -1;
+
+    lo = 0;
+    hi = c->n - 1;
+    while (lo < hi) {
+        m = (lo + hi + 1) / 2;
+        if (c->e[m].start <= t)
+            lo = m;
+        else
+            hi = m - 1;
+    }
+
+    *gmtoff = c->e[lo].gmtoff;
+    *isdst = c->e[lo].isdst;
+    *zone = c->e[lo].zone;
+
+    return 0;
+}
+
+#if !(defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__)
+/*
+ * Resolve the local zone into a new table. Local time is sampled once a
+ * day, every change found is narrowed down to the second. Caller holds
+ * jtzcache_lock. Null on failure.
+ */
+static struct jtzcache_table* jtzcache_build(void)
+{
+    struct jtzcache_table* table;
+    struct jtzcache_table* grown;
+    struct jtzcache_entry cur, next;
+    int n = 0, cap = 64;
+    time_t first, last, lo, hi, m;
+
+    /* Stay within 32 bit time_t where it is one. */
+    first = (sizeof(time_t) > 4) ? (time_t) J_TZCACHE_FIRST : (time_t) INT_MIN;
+    last = (sizeof(time_t) > 4) ? (time_t) J_TZCACHE_LAST : (time_t) INT_MAX;
+
+    tzset();
+
+    table = malloc(sizeof(struct jtzcache_table) +
+                   cap * sizeof(struct jtzcache_entry));
+    if (!table || jtzcache_probe(first, &cur))
+        goto fail;
+    table->e[n++] = cur;
+
+    for (lo = first; lo < last; lo = hi) {
+        hi = (last - lo > J_DAY_LENGTH_IN_SECONDS) ?
+            lo + J_DAY_LENGTH_IN_SECONDS : last;
+        if (jtzcache_probe(hi, &next))
+            goto fail;
+        if (jtzcache_same(&cur, &next))
+            continue;
+
+        /* cur applies at lo, something else at hi. */
+        while (hi - lo > 1) {
+            m = lo + (hi - lo) / 2;
+            if (jtzcache_probe(m, &next))
+                goto fail;
+            if (jtzcache_same(&cur, &next))
+                lo = m;
+            else
+                hi = m;
+        }
+
+        if (jtzcache_probe(hi, &cur))
+            goto fail;
+
+        if (n == cap) {
+            cap *= 2;
+            grown = realloc(table, sizeof(struct jtzcache_table) +
+                            cap * sizeof(struct jtzcache_entry));
+            if (!grown)
+                goto fail;
+            table = grown;
+        }
+        table->e[n++] = cur;
+    }
+
+    table->end = last;
+    table->n = n;
+
+    return table;
+
+fail:
+    free(table);
+    return 0;
+}
+
+/*
+ * Older table with the same entries as t, if any.
+ */
+static struct jtzcache_table* jtzcache_find(const struct jtzcache_table* t)
+{
+    struct jtzcache_table* o;
+    int i;
+
+    for (o = jtzcache_tables; o; o = o->next) {
+        if (o->n != t->n || o->end != t->end)
+            continue;
+        for (i=0; i<t->n && o->e[i].start == t->e[i].start &&
+                 jtzcache_same(&o->e[i], &t->e[i]); i++);
+        if (i == t->n)
+            return o;
+    }
+
+    return 0;
+}
+
+/*
+ * Rebuild and publish the cache, caller holds jtzcache_lock.
+ */
+static int jtzcache_refresh_locked(void)
+{
+    struct jtzcache_table* table;
+    struct jtzcache_table* old;
+
+    J_STORE_RELEASE(jtzcache, (struct jtzcache_table*) 0);
+
+    table = jtzcache_build();
+    if (!table)
+        return -1;
+
+    old = jtzcache_find(table);
+    if (old) {
+        free(table);
+        table = old;
+    } else {
+        table->next = jtzcache_tables;
+        jtzcache_tables = table;
+    }
+
+    J_STORE_RELEASE(jtzcache, table);
+
+    return 0;
+}
+#endif
+
+/*
+ * Resolve the local zone again and rebuild the cache.
+ * Zero on success, -1 on failure, the cache is disabled then.
+ */
+int jtzcache_refresh(void)
+{
+#if defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__
+    jtzcache_disable();
+    return -1;
+#else
+    int r;
+
+    pthread_mutex_lock(&jtzcache_lock);
+    r = jtzcache_refresh_locked();
+    pthread_mutex_unlock(&jtzcache_lock);
+
+    return r;
+#endif
+}
+
+/*
+ * Build the zone cache unless it is already there.
+ * Zero on success, -1 on failure.
+ */
+int jtzcache_enable(void)
+{
+#if defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__
+    return -1;
+#else
+    int r = 0;
+
+    pthread_mutex_lock(&jtzcache_lock);
+    if (!jtzcache)
+        r = jtzcache_refresh_locked();
+    pthread_mutex_unlock(&jtzcache_lock);
+
+    return r;
+#endif
+}
+
+/*
+ * Stop using the zone cache, conversions ask libc again. The table is kept
+ * for conversions still reading it and for reuse.
+ */
+void jtzcache_disable(void)
+{
+    J_STORE_RELEASE(jtzcache, (struct jtzcache_table*) 0);
+}
+
 void in_jasctime(const struct jtm* jtm, char* buf)
 {
     if (!jtm)
@@ -96,6 +410,23 @@ void in_jasctime(const struct jtm* jtm, char* buf)
     }
 }
 
+/*
+ * Broken-down time of *timep in a zone gmtoff seconds east of UTC, named
+ * zone. Pure arithmetic, neither TZ nor libc is consulted.
+ */
+void in_jlocaltime_off(const time_t* timep, long int gmtoff, const char* zone,
+                       struct jtm* result)
+{
+    struct ab_jtm ab;
+
+    jalali_create_time_from_secs((*timep) + (time_t) gmtoff, &ab);
+    jalali_get_date_off(ab.ab_days, gmtoff, result);
+    result->tm_sec = ab.ab_sec;
+    result->tm_min = ab.ab_min;
+    result->tm_hour = ab.ab_hour;
+    result->tm_zone = zone;
+}
+
 void in_jlocaltime(const time_t* timep, struct jtm* result)
 {
     if (!timep)
@@ -103,38 +434,30 @@ void in_jlocaltime(const time_t* timep, struct jtm* result)
 
     struct tm t;
     struct jtm c_jtm;
-    struct ab_jtm ab;
     long int gmtoff;
-    time_t c;
 
-    tzset();
+    if (jtzcache_lookup(*timep, &gmtoff, &t.tm_isdst, &c_jtm.tm_zone)) {
+        tzset();
 
-    localtime_r(timep, &t);
+        localtime_r(timep, &t);
 
 #if defined _WIN32 || defined __MINGW32__ || defined __CYGWIN__
-    struct timeval tv;
-    struct timezone tz;
+        struct timeval tv;
+        struct timezone tz;
 
-    gettimeofday(&tv, &tz);
-    gmtoff = (-tz.tz_minuteswest) * J_MINUTE_LENGTH_IN_SECONDS +
-        (tz.tz_dsttime * J_HOUR_LENGTH_IN_SECONDS);
-    c_jtm.tm_zone = tzname[t.tm_isdst];
+        gettimeofday(&tv, &tz);
+        gmtoff = (-tz.tz_minuteswest) * J_MINUTE_LENGTH_IN_SECONDS +
+            (tz.tz_dsttime * J_HOUR_LENGTH_IN_SECONDS);
+        c_jtm.tm_zone = tzname[t.tm_isdst];
 #else
-    gmtoff = t.tm_gmtoff;
-    c_jtm.tm_zone = t.tm_zone;
+        gmtoff = t.tm_gmtoff;
+        c_jtm.tm_zone = t.tm_zone;
 #endif
+    }
 
-    c = (*timep) + (time_t) gmtoff;
-
-    jalali_create_time_from_secs(c, &ab);
-    jalali_get_date(ab.ab_days, &c_jtm);
-    jalali_create_date_from_days(&c_jtm);
-    c_jtm.tm_sec = ab.ab_sec;
-    c_jtm.tm_min = ab.ab_min;
-    c_jtm.tm_hour = ab.ab_hour;
+    in_jlocaltime_off(timep, gmtoff, c_jtm.tm_zone, &c_jtm);
     c_jtm.tm_isdst = t.tm_isdst;
 
-    c_jtm.tm_gmtoff = gmtoff;
     memcpy(result ? result : &in_jtm, &c_jtm, sizeof(struct jtm));
 }
 
@@ -154,25 +477,9 @@ void in_jgmtime(const time_t* timep, struct jtm* result)
     if (!timep)
         return;
 
-    struct tm t;
     struct jtm c_jtm;
-    struct ab_jtm ab;
-    time_t c;
-    tzset();
 
-    gmtime_r(timep, &t);
-    c = *timep;
-
-    jalali_create_time_from_secs(c, &ab);
-    jalali_get_date(ab.ab_days, &c_jtm);
-    jalali_create_date_from_days(&c_jtm);
-    c_jtm.tm_sec = ab.ab_sec;
-    c_jtm.tm_min = ab.ab_min;
-    c_jtm.tm_hour = ab.ab_hour;
-    c_jtm.tm_isdst = 0;
-
-    c_jtm.tm_zone = GMT_ZONE;
-    c_jtm.tm_gmtoff = 0;
+    in_jlocaltime_off(timep, 0, GMT_ZONE, &c_jtm);
 
     memcpy(result ? result : &in_jtm, &c_jtm, sizeof(struct jtm));
 }
@@ -221,7 +528,8 @@ time_t jmktime(struct jtm* jtm)
     if (!jtm)
         return (time_t) (-1);
 
-    tzset();
+    if (!J_LOAD_ACQUIRE(jtzcache))
+        tzset();
     jalali_update(jtm);
     int p = jalali_get_diff(jtm);
     time_t t;
@@ -234,6 +542,23 @@ time_t jmktime(struct jtm* jtm)
     return t;
 }
 
+/*
+ * Like jmktime(), for a time in a zone gmtoff seconds east of UTC. tm_gmtoff
+ * is set to gmtoff and tm_isdst to 0, tm_zone is left alone. TZ is not
+ * consulted.
+ */
+time_t jmktime_off(struct jtm* jtm, long int gmtoff)
+{
+    if (!jtm)
+        return (time_t) (-1);
+
+    jalali_update_off(jtm, gmtoff);
+    return ((time_t) jalali_get_diff(jtm) * (time_t) J_DAY_LENGTH_IN_SECONDS) +
+        ((time_t) jtm->tm_hour * (time_t) J_HOUR_LENGTH_IN_SECONDS) +
+        ((time_t) jtm->tm_min * (time_t) J_MINUTE_LENGTH_IN_SECONDS) +
+        (time_t) jtm->tm_sec - (time_t) gmtoff;
+}
+
 size_t jstrftime(char* s, size_t max, const char* format, const struct jtm* jtm)
 {
     if (!s || max <= 0 || !format || !jtm)
@@ -286,7 +611,8 @@ size_t jstrftime(char* s, size_t max, const char* format, const struct jtm* jtm)
                  * example: Tue 27 Ord 1390 03:28:19 IRDT.
                  */
             case 'c':
-                tzset();
+                if (!J_LOAD_ACQUIRE(jtzcache))
+                    tzset();
                 snprintf(buf, MAX_BUF_SIZE, "%s %d %s %d %02d:%02d:%02d %s",
                          jalali_days_3_fa[jtm->tm_wday], jtm->tm_mday,
                          jalali_months_3[jtm->tm_mon], jtm->tm_year,
@@ -323,7 +649,8 @@ size_t jstrftime(char* s, size_t max, const char* format, const struct jtm* jtm)
                  * example: سه شنبه ۱۷ خرداد ۱۳۹۰، ساعت ۰۸:۱۹:۲۳ (IRDT)
                  */
             case 'E':
-                tzset();
+                if (!J_LOAD_ACQUIRE(jtzcache))
+                    tzset();
                 jalali_to_farsi(_l1, 10, 2, "۰", jtm->tm_hour);
                 jalali_to_farsi(_l2, 10, 2, "۰", jtm->tm_min);
                 jalali_to_farsi(_l3, 10, 2, "۰", jtm->tm_sec);
@@ -858,6 +1185,22 @@ struct jtm* jlocaltime_r(const time_t* timep, struct jtm* result)
     return result;
 }
 
+/*
+ * Like jlocaltime_r(), in a zone gmtoff seconds east of UTC instead of local
+ * zone. zone, which may be null, is stored in tm_zone as is and must outlive
+ * result. tm_isdst is 0. Never calls tzset(), results don't depend on TZ.
+ */
+struct jtm* jlocaltime_off_r(const time_t* timep, long int gmtoff,
+                             const char* zone, struct jtm* result)
+{
+    if (!timep || !result)
+        return 0;
+
+    in_jlocaltime_off(timep, gmtoff, zone, result);
+
+    return result;
+}
+
 struct jtm* jgmtime_r(const time_t* timep, struct jtm* result)
 {
     if (!timep || !result)
@@ -868,6 +1211,71 @@ struct jtm* jgmtime_r(const time_t* timep, struct jtm* result)
     return result;
 }
 
+/*
+ * Array variants, convert n items in one call.  Buffers are provided by
+ * caller and must not overlap.
+ */
+void jgmtime_array(const time_t* timep, struct jtm* result, size_t n)
+{
+    size_t i;
+
+    if (!timep || !result)
+        return;
+
+    for (i=0; i<n; i++)
+        in_jgmtime(&timep[i], &result[i]);
+}
+
+void jlocaltime_array(const time_t* timep, struct jtm* result, size_t n)
+{
+    size_t i;
+
+    if (!timep || !result)
+        return;
+
+    for (i=0; i<n; i++)
+        in_jlocaltime(&timep[i], &result[i]);
+}
+
+void jlocaltime_off_array(const time_t* timep, long int gmtoff,
+                          const char* zone, struct jtm* result, size_t n)
+{
+    size_t i;
+
+    if (!timep || !result)
+        return;
+
+    for (i=0; i<n; i++)
+        jlocaltime_off_r(&timep[i], gmtoff, zone, &result[i]);
+}
+
+/*
+ * Normalizes jtm[0..n-1] like jmktime() does and stores their timestamps
+ * in result[0..n-1].
+ */
+void jmktime_array(struct jtm* jtm, time_t* result, size_t n)
+{
+    size_t i;
+
+    if (!jtm || !result)
+        return;
+
+    for (i=0; i<n; i++)
+        result[i] = jmktime(&jtm[i]);
+}
+
+void jmktime_off_array(struct jtm* jtm, long int gmtoff, time_t* result,
+                       size_t n)
+{
+    size_t i;
+
+    if (!jtm || !result)
+        return;
+
+    for (i=0; i<n; i++)
+        result[i] = jmktime_off(&jtm[i], gmtoff);
+}
+
 char* jctime_r(const time_t* timep, char* buf)
 {
     if (!timep || !buf)
@@ -41,6 +41,8 @@ extern struct jtm* jlocaltime(const time_t* timep);
 
 extern time_t jmktime(struct jtm* jtm);
 
+extern time_t jmktime_off(struct jtm* jtm, long int gmtoff);
+
 extern size_t jstrftime(char* s, size_t max, const char* format,
             const struct jtm* jtm);
 
@@ -54,8 +56,31 @@ extern struct jtm* jgmtime_r(const time_t* timep, struct jtm* result);
 
 extern struct jtm* jlocaltime_r(const time_t* timep, struct jtm* result);
 
+extern struct jtm* jlocaltime_off_r(const time_t* timep, long int gmtoff,
+                                    const char* zone, struct jtm* result);
+
+extern void jgmtime_array(const time_t* timep, struct jtm* result, size_t n);
+
+extern void jlocaltime_array(const time_t* timep, struct jtm* result,
+                             size_t n);
+
+extern void jlocaltime_off_array(const time_t* timep, long int gmtoff,
+                                 const char* zone, struct jtm* result,
+                                 size_t n);
+
+extern void jmktime_array(struct jtm* jtm, time_t* result, size_t n);
+
+extern void jmktime_off_array(struct jtm* jtm, long int gmtoff,
+                              time_t* result, size_t n);
+
 extern int jalali_to_farsi(char* buf, size_t n, int padding, char* pad, int d);
 
+extern int jtzcache_enable(void);
+
+extern int jtzcache_refresh(void);
+
+extern void jtzcache_disable(void);
+
 #ifdef __cplusplus
 }
 #endif
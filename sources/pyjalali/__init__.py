@@ -11,11 +11,14 @@
     An implementation of standard :class:`python:datetime.date` and
     :class:`python:datetime.datetime` provided in module :mod:`.datetime`
     using libjalali tools.
+
+    libjalali is loaded from ``LIBJALALI_DIR`` when one of its functions is
+    first called, not at import, and each ctypes prototype is bound on its
+    first call.  A missing library raises `OSError` then.
 """
 
 import os
 import sys
-import ctypes.util
 from ctypes import cdll
 
 # hardcoded libjalali version, binding revision
@@ -25,6 +28,62 @@ if sys.platform.startswith('win'):
     libname = 'libjalali.dll'
 else:
     libname = 'libjalali.so'
-_libj = cdll.LoadLibrary(os.path.join(os.environ.get('LIBJALALI_DIR', ''),
-                                      libname))
-del cdll, ctypes, sys, libname, os
+
+
+class _Prototype(object):
+    """Foreign function `name` of libjalali with its `restype` and
+    `argtypes`, held as ``_`` + name in `namespace`.  On first call the
+    ctypes function is looked up and replaces the prototype there, so
+    following calls go straight to ctypes."""
+
+    def __init__(self, library, namespace, name, restype, argtypes):
+        self.library = library
+        self.namespace = namespace
+        self.name = name
+        self.restype = restype
+        self.argtypes = argtypes
+        self.func = None
+
+    def bind(self):
+        """Return the ctypes function, loading libjalali if needed."""
+        func = self.func
+        if func is None:
+            func = getattr(self.library.load(), self.name)
+            func.restype = self.restype
+            func.argtypes = self.argtypes
+            self.func = func
+        attr = '_' + self.name
+        if self.namespace.get(attr) is self:
+            self.namespace[attr] = func
+        return func
+
+    def __call__(self, *args):
+        return self.bind()(*args)
+
+
+class _Library(object):
+    """libjalali, loaded from ``LIBJALALI_DIR`` on first call of one of its
+    functions, importing pyjalali doesn't touch it."""
+
+    def __init__(self, path):
+        self.path = path
+        self.cdll = None
+
+    def load(self):
+        """Return the loaded ctypes library, raise `OSError` if it couldn't
+        be loaded."""
+        if self.cdll is None:
+            self.cdll = cdll.LoadLibrary(self.path)
+        return self.cdll
+
+    def binder(self, namespace):
+        """Return ``bind(name, restype, argtypes)`` making
+        :class:`_Prototype` of function `name` to be stored as ``_`` + name
+        in `namespace`, globals of the calling module."""
+        def bind(name, restype, argtypes):
+            return _Prototype(self, namespace, name, restype, argtypes)
+        return bind
+
+
+_libj = _Library(os.path.join(os.environ.get('LIBJALALI_DIR', ''), libname))
+del sys, libname, os
@@ -0,0 +1,95 @@
+"""
+    pyjalali.backend
+    ~~~~~~~~~~~~~~~~
+
+    Calendar arithmetic used by :mod:`.datetime`.  Pure Python
+    implementation in :mod:`.pure` is used by default since it doesn't pay
+    for ctypes marshalling.  libjalali could be selected at runtime:
+
+    >>> set_backend('libjalali')
+    >>> get_backend() is libjalali
+    True
+    >>> set_backend('python')
+
+    Both backends agree on every date:
+
+    >>> days = range(-800000, 3200000, 997)
+    >>> [python.date_from_days(d) for d in days] == \\
+    ...     [libjalali.date_from_days(d) for d in days]
+    True
+    >>> dates = [python.date_from_days(d) for d in days]
+    >>> [python.days_from_date(*d) for d in dates] == \\
+    ...     [libjalali.days_from_date(*d) for d in dates] == days
+    True
+    >>> [python.weekday(d) for d in days] == \\
+    ...     [libjalali.weekday(d) for d in days]
+    True
+    >>> years = range(-3000, 10000)
+    >>> [python.month_days(y, 12) for y in years] == \\
+    ...     [libjalali.month_days(y, 12) for y in years]
+    True
+"""
+
+from pyjalali import pure as python
+from pyjalali.jalali import (jalali_create_days_from_date, jalali_get_date,
+                             jalali_get_diff, jalali_is_jleap,
+                             jalali_year_month_days)
+from pyjalali.types import struct_jtm
+
+__all__ = ('get_backend', 'libjalali', 'python', 'set_backend')
+
+
+class _Libjalali(object):
+    """Same interface as :mod:`.pure`, forwarded to libjalali."""
+
+    @staticmethod
+    def is_leap(year):
+        return jalali_is_jleap(year)
+
+    @staticmethod
+    def month_days(year, month):
+        return jalali_year_month_days(year, month - 1)
+
+    @staticmethod
+    def days_from_date(year, month, day):
+        jtm = struct_jtm()
+        jtm.tm_year = year
+        jtm.tm_mon = month - 1
+        jtm.tm_mday = day
+        jalali_create_days_from_date(jtm)
+        return jalali_get_diff(jtm)
+
+    @staticmethod
+    def date_from_days(days):
+        jtm = jalali_get_date(days)
+        return jtm.tm_year, jtm.tm_mon + 1, jtm.tm_mday
+
+    @staticmethod
+    def weekday(days):
+        return jalali_get_date(days).tm_wday
+
+
+libjalali = _Libjalali()
+
+_backends = {'python': python, 'libjalali': libjalali}
+
+current = python
+"""Backend in use, either :mod:`.pure` or :data:`libjalali`."""
+
+
+def get_backend():
+    """Return backend in use."""
+    return current
+
+
+def set_backend(name):
+    """Select calendar arithmetic backend used by :mod:`.datetime`.
+
+    :param string name: either ``'python'`` or ``'libjalali'``
+    """
+    global current
+    try:
+        current = _backends[name]
+    except KeyError:
+        raise ValueError('Unknown backend %r, expected one of %s' %
+                         (name, ', '.join(sorted(_backends))))
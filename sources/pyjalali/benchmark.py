@@ -0,0 +1,499 @@
+"""
+    pyjalali.benchmark
+    ~~~~~~~~~~~~~~~~~~
+
+    Timings of pyjalali on every layer: raw ctypes wrappers of
+    :mod:`.jalali`, :mod:`.jtime` and :mod:`.jstr`, operations of
+    :mod:`.datetime` and bulk conversions.  Each case is timed in a loop
+    calibrated to take about `min_time` seconds, best of `repeat` loops is
+    kept.  Bulk cases also report time per converted item.  Import cases
+    time a whole new interpreter importing a module, compare them with
+    ``import.interpreter`` which imports nothing.
+
+    Run ``python -m pyjalali.benchmark -o results.json`` to time all cases,
+    or only those with names containing one of ``-k`` substrings, and write
+    results as JSON.  ``python -m pyjalali.benchmark --compare old.json
+    new.json`` lists cases of both runs and exits with status 1 if any got
+    slower than `threshold`:
+
+    >>> old = {'results': {'a': {'ns_per_item': 100.0},
+    ...                    'b': {'ns_per_item': 100.0},
+    ...                    'c': {'ns_per_item': 100.0}}}
+    >>> new = {'results': {'a': {'ns_per_item': 150.0},
+    ...                    'b': {'ns_per_item': 104.0},
+    ...                    'c': {'ns_per_item': 50.0}}}
+    >>> for row in compare(old, new, threshold=0.1):
+    ...     print(row)
+    ('a', 100.0, 150.0, 1.5, 'regression')
+    ('b', 100.0, 104.0, 1.04, '')
+    ('c', 100.0, 50.0, 0.5, 'improvement')
+"""
+
+from __future__ import absolute_import
+import datetime as _std_dt_mod
+import json
+import platform
+import sys
+from timeit import Timer
+
+import pyjalali
+
+__all__ = ('BULK_SIZE', 'cases', 'compare', 'main', 'run')
+
+BULK_SIZE = 10000
+"""Number of items converted by each call of bulk cases."""
+
+_TS = 1385238360
+_DAYS = 16032
+
+_cases = []
+
+
+def _case(name, items=1):
+    """Register a benchmark case, decorated function takes no arguments and
+    returns the callable to time."""
+    def register(setup):
+        _cases.append((name, items, setup))
+        return setup
+    return register
+
+
+def cases():
+    """Return names of all benchmark cases, in order they are run."""
+    return [name for name, items, setup in _cases]
+
+
+# raw ctypes wrappers
+
+@_case('ctypes.jalali_is_jleap')
+def _():
+    from pyjalali.jalali import jalali_is_jleap
+    return lambda: jalali_is_jleap(1392)
+
+
+@_case('ctypes.jalali_get_date')
+def _():
+    from pyjalali.jalali import jalali_get_date
+    return lambda: jalali_get_date(_DAYS)
+
+
+@_case('ctypes.jalali_get_diff')
+def _():
+    from pyjalali.jalali import jalali_get_date, jalali_get_diff
+    jtm = jalali_get_date(_DAYS)
+    return lambda: jalali_get_diff(jtm)
+
+
+@_case('ctypes.jalali_update')
+def _():
+    from pyjalali.jalali import jalali_get_date, jalali_update
+    jtm = jalali_get_date(_DAYS)
+    return lambda: jalali_update(jtm)
+
+
+@_case('ctypes.jgmtime')
+def _():
+    from pyjalali.jtime import jgmtime
+    return lambda: jgmtime(_TS)
+
+
+@_case('ctypes.jlocaltime')
+def _():
+    from pyjalali.jtime import jlocaltime
+    return lambda: jlocaltime(_TS)
+
+
+@_case('ctypes.jlocaltime_off')
+def _():
+    from pyjalali.jtime import jlocaltime_off
+    return lambda: jlocaltime_off(_TS, 12600, 'IRST')
+
+
+@_case('ctypes.jmktime')
+def _():
+    from pyjalali.jtime import jlocaltime, jmktime
+    jtm = jlocaltime(_TS)
+    return lambda: jmktime(jtm)
+
+
+@_case('ctypes.jstrftime')
+def _():
+    from pyjalali.jstr import jstrftime
+    from pyjalali.jtime import jlocaltime
+    jtm = jlocaltime(_TS)
+    return lambda: jstrftime('%Y/%m/%d %H:%M:%S', jtm)
+
+
+@_case('ctypes.jstrptime')
+def _():
+    from pyjalali.jstr import jstrptime
+    return lambda: jstrptime('%Y/%m/%d %H:%M:%S', '1392/09/02 23:56:00')
+
+
+# pyjalali.datetime
+
+@_case('datetime.date')
+def _():
+    from pyjalali.datetime import date
+    return lambda: date(1392, 9, 2)
+
+
+@_case('datetime.datetime')
+def _():
+    from pyjalali.datetime import datetime
+    return lambda: datetime(1392, 9, 2, 23, 56, 0)
+
+
+@_case('datetime.date_add_timedelta')
+def _():
+    from pyjalali.datetime import date
+    d, delta = date(1392, 9, 2), _std_dt_mod.timedelta(days=40)
+    return lambda: d + delta
+
+
+@_case('datetime.datetime_add_timedelta')
+def _():
+    from pyjalali.datetime import datetime
+    dt = datetime(1392, 9, 2, 23, 56, 0)
+    delta = _std_dt_mod.timedelta(days=40, seconds=7)
+    return lambda: dt + delta
+
+
+@_case('datetime.datetime_sub_timedelta')
+def _():
+    from pyjalali.datetime import datetime
+    dt = datetime(1392, 9, 2, 23, 56, 0)
+    delta = _std_dt_mod.timedelta(days=40, seconds=7)
+    return lambda: dt - delta
+
+
+@_case('datetime.datetime_sub_datetime')
+def _():
+    from pyjalali.datetime import datetime
+    a, b = datetime(1392, 9, 2, 23, 56, 0), datetime(1348, 10, 11)
+    return lambda: a - b
+
+
+@_case('datetime.date_lt')
+def _():
+    from pyjalali.datetime import date
+    a, b = date(1392, 9, 2), date(1392, 9, 3)
+    return lambda: a < b
+
+
+@_case('datetime.datetime_eq')
+def _():
+    from pyjalali.datetime import datetime
+    a, b = datetime(1392, 9, 2, 23, 56, 0), datetime(1392, 9, 2, 23, 56, 0)
+    return lambda: a == b
+
+
+@_case('datetime.datetime_lt')
+def _():
+    from pyjalali.datetime import datetime
+    a, b = datetime(1392, 9, 2, 23, 56, 0), datetime(1392, 9, 2, 23, 57, 0)
+    return lambda: a < b
+
+
+@_case('datetime.g2j_date')
+def _():
+    from pyjalali.datetime import g2j
+    d = _std_dt_mod.date(2013, 11, 23)
+    return lambda: g2j(d)
+
+
+@_case('datetime.g2j_datetime')
+def _():
+    from pyjalali.datetime import g2j
+    dt = _std_dt_mod.datetime(2013, 11, 23, 23, 56, 0)
+    return lambda: g2j(dt)
+
+
+@_case('datetime.j2g_date')
+def _():
+    from pyjalali.datetime import date, j2g
+    d = date(1392, 9, 2)
+    return lambda: j2g(d)
+
+
+@_case('datetime.j2g_datetime')
+def _():
+    from pyjalali.datetime import datetime, j2g
+    dt = datetime(1392, 9, 2, 23, 56, 0)
+    return lambda: j2g(dt)
+
+
+@_case('datetime.date_strftime')
+def _():
+    from pyjalali.datetime import date
+    d = date(1392, 9, 2)
+    return lambda: d.strftime('%A %d %B %Y')
+
+
+@_case('datetime.datetime_strftime')
+def _():
+    from pyjalali.datetime import datetime
+    dt = datetime(1392, 9, 2, 23, 56, 0)
+    return lambda: dt.strftime('%Y/%m/%d %H:%M:%S')
+
+
+@_case('datetime.datetime_strptime')
+def _():
+    from pyjalali.datetime import datetime
+    return lambda: datetime.strptime('1392/09/02 23:56:00',
+                                     '%Y/%m/%d %H:%M:%S')
+
+
+@_case('datetime.date_fromtimestamp')
+def _():
+    from pyjalali.datetime import date
+    return lambda: date.fromtimestamp(_TS)
+
+
+@_case('datetime.datetime_fromtimestamp')
+def _():
+    from pyjalali.datetime import datetime
+    return lambda: datetime.fromtimestamp(_TS)
+
+
+@_case('datetime.datetime_utcfromtimestamp')
+def _():
+    from pyjalali.datetime import datetime
+    return lambda: datetime.utcfromtimestamp(_TS)
+
+
+# bulk workloads
+
+def _timestamps():
+    from array import array
+    return array('l', range(_TS, _TS + BULK_SIZE * 3607, 3607))
+
+
+@_case('bulk.jgmtime_array', BULK_SIZE)
+def _():
+    from pyjalali.jtime import jgmtime_array
+    timestamps = _timestamps()
+    return lambda: jgmtime_array(timestamps)
+
+
+@_case('bulk.jlocaltime_array', BULK_SIZE)
+def _():
+    from pyjalali.jtime import jlocaltime_array
+    timestamps = _timestamps()
+    return lambda: jlocaltime_array(timestamps)
+
+
+@_case('bulk.jlocaltime_off_array', BULK_SIZE)
+def _():
+    from pyjalali.jtime import jlocaltime_off_array
+    timestamps = _timestamps()
+    return lambda: jlocaltime_off_array(timestamps, 12600, 'IRST')
+
+
+@_case('bulk.jmktime_array', BULK_SIZE)
+def _():
+    from pyjalali.jtime import jlocaltime_array, jmktime_array
+    jtms = jlocaltime_array(_timestamps())
+    out = _timestamps()
+    return lambda: jmktime_array(jtms, out)
+
+
+@_case('bulk.jalali_get_date_array', BULK_SIZE)
+def _():
+    from array import array
+    from pyjalali.jalali import jalali_get_date_array
+    days = array('i', range(_DAYS, _DAYS + BULK_SIZE))
+    return lambda: jalali_get_date_array(days)
+
+
+@_case('bulk.jlocaltime_loop', BULK_SIZE)
+def _():
+    from pyjalali.jtime import jlocaltime
+    timestamps = _timestamps()
+    return lambda: [jlocaltime(t) for t in timestamps]
+
+
+@_case('bulk.datetime_fromtimestamp_loop', BULK_SIZE)
+def _():
+    from pyjalali.datetime import datetime
+    timestamps = _timestamps()
+    fromtimestamp = datetime.fromtimestamp
+    return lambda: [fromtimestamp(t) for t in timestamps]
+
+
+@_case('bulk.datetime_strftime_loop', BULK_SIZE)
+def _():
+    from pyjalali.datetime import datetime
+    dts = [datetime.fromtimestamp(t) for t in _timestamps()]
+    return lambda: [dt.strftime('%Y/%m/%d %H:%M:%S') for dt in dts]
+
+
+@_case('bulk.daterange', BULK_SIZE)
+def _():
+    from pyjalali.datetime import date, daterange
+    start = date(1392, 9, 2)
+    stop = start + _std_dt_mod.timedelta(days=BULK_SIZE)
+    return lambda: list(daterange(start, stop))
+
+
+@_case('bulk.vector_jalali_from_timestamps', BULK_SIZE)
+def _():
+    from pyjalali.vector import jalali_from_timestamps
+    import numpy as np
+    timestamps = np.asarray(_timestamps())
+    return lambda: jalali_from_timestamps(timestamps, gmtoff=12600)
+
+
+# imports, each in a fresh interpreter
+
+def _interpreter(statement):
+    import os
+    import subprocess
+    root = os.path.dirname(os.path.dirname(os.path.abspath(pyjalali.__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (
+        root, env.get('PYTHONPATH'))))
+    args = (sys.executable, '-c', statement)
+    return lambda: subprocess.call(args, env=env)
+
+
+@_case('import.interpreter')
+def _():
+    return _interpreter('pass')
+
+
+@_case('import.pyjalali')
+def _():
+    return _interpreter('import pyjalali')
+
+
+@_case('import.pyjalali.jtime')
+def _():
+    return _interpreter('import pyjalali.jtime')
+
+
+@_case('import.pyjalali.datetime')
+def _():
+    return _interpreter('import pyjalali.datetime')
+
+
+def _time(func, repeat, min_time):
+    """Return best time of one call and number of calls per loop."""
+    timer = Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time / 10 or number >= 10 ** 9:
+            break
+        number *= 10
+    number = max(int(number * min_time / max(elapsed, 1e-9)), 1)
+    return min(timer.repeat(repeat, number)) / number, number
+
+
+def run(names=None, repeat=5, min_time=0.2, log=None):
+    """Time benchmark cases and return results as a dictionary suitable for
+    JSON.
+
+    :param names: substrings, only cases containing one of them in their
+        name are run, all cases if None
+    :param int repeat: number of timing loops of each case, best is kept
+    :param float min_time: seconds each timing loop takes at least
+    :param log: file results are printed to as they are measured
+    """
+    results = {}
+    skipped = []
+    for name, items, setup in _cases:
+        if names and not any(n in name for n in names):
+            continue
+        try:
+            func = setup()
+        except ImportError:
+            skipped.append(name)
+            continue
+        best, number = _time(func, repeat, min_time)
+        results[name] = {'items': items, 'number': number,
+                         'repeat': repeat, 'ns_per_call': best * 1e9,
+                         'ns_per_item': best * 1e9 / items}
+        if log is not None:
+            log.write('%-40s %12.1f ns/item\n' % (name, best * 1e9 / items))
+            log.flush()
+    return {'pyjalali': '.'.join(map(str, pyjalali.__version__)),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'results': results, 'skipped': skipped}
+
+
+def compare(old, new, threshold=0.1):
+    """Compare two results of :func:`run` and return a row
+    ``(name, old ns/item, new ns/item, ratio, flag)`` for each case measured
+    in both.  `flag` is ``'regression'`` if new time is more than
+    `threshold` fraction slower, ``'improvement'`` if more than that
+    faster, else empty.
+    """
+    rows = []
+    for name in sorted(set(old['results']) & set(new['results'])):
+        a = old['results'][name]['ns_per_item']
+        b = new['results'][name]['ns_per_item']
+        ratio = b / a if a else float('inf')
+        if ratio > 1 + threshold:
+            flag = 'regression'
+        elif ratio < 1 / (1 + threshold):
+            flag = 'improvement'
+        else:
+            flag = ''
+        rows.append((name, a, b, round(ratio, 4), flag))
+    return rows
+
+
+def main(argv=None):
+    from optparse import OptionParser
+    parser = OptionParser(
+        usage='%prog [-k NAME]... [-o FILE] | --compare OLD NEW | --list')
+    parser.add_option('-k', dest='names', action='append', metavar='NAME',
+                      help='only run cases containing NAME')
+    parser.add_option('-o', dest='output', metavar='FILE',
+                      help='write JSON results to FILE, stdout if -')
+    parser.add_option('-r', dest='repeat', type='int', default=5,
+                      help='timing loops of each case [%default]')
+    parser.add_option('-t', dest='min_time', type='float', default=0.2,
+                      help='seconds of each timing loop [%default]')
+    parser.add_option('--compare', action='store_true',
+                      help='compare two JSON results')
+    parser.add_option('--threshold', type='float', default=0.1,
+                      help='slowdown fraction flagged by --compare '
+                      '[%default]')
+    parser.add_option('--list', action='store_true', help='list cases')
+    options, args = parser.parse_args(argv)
+    if options.list:
+        print('\n'.join(cases()))
+        return 0
+    if options.compare:
+        if len(args) != 2:
+            parser.error('--compare takes two result files')
+        with open(args[0]) as f:
+            old = json.load(f)
+        with open(args[1]) as f:
+            new = json.load(f)
+        rows = compare(old, new, options.threshold)
+        for name, a, b, ratio, flag in rows:
+            print('%-40s %12.1f %12.1f %7.2fx %s' % (name, a, b, ratio,
+                                                      flag))
+        return int(any(row[-1] == 'regression' for row in rows))
+    if args:
+        parser.error('unexpected arguments')
+    results = run(options.names, options.repeat, options.min_time,
+                  sys.stderr)
+    if options.output in (None, '-'):
+        json.dump(results, sys.stdout, indent=2, separators=(',', ': '),
+                  sort_keys=True)
+        sys.stdout.write('\n')
+    else:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2, separators=(',', ': '),
+                      sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+    pyjalali.calendar
+    ~~~~~~~~~~~~~~~~~
+
+    Month and year grids of Jalali calendar, modelled on
+    :mod:`python:calendar`.  Weekdays are numbered from 0 being Shanbeh,
+    like :meth:`.datetime.date.weekday`, and weeks start on Shanbeh by
+    default.  Layout follows ``set_cal_matrix`` of jcal.
+
+    >>> monthcalendar(1392, 9) # doctest: +NORMALIZE_WHITESPACE
+    ((0, 0, 0, 0, 0, 0, 1), (2, 3, 4, 5, 6, 7, 8),
+     (9, 10, 11, 12, 13, 14, 15), (16, 17, 18, 19, 20, 21, 22),
+     (23, 24, 25, 26, 27, 28, 29), (30, 0, 0, 0, 0, 0, 0))
+    >>> monthrange(1391, 12)
+    (3, 30)
+    >>> cal = Calendar(JOMEH)
+    >>> cal.monthdatescalendar(1392, 1)[0][0]
+    pyjalali.datetime.date(1391, 12, 25)
+    >>> len(cal.yeardatescalendar(1392, 4)), len(cal.yeardatescalendar(1392))
+    (3, 4)
+
+    Grids are tuples, so they are shared between callers: recently used ones
+    are kept per year, month and first weekday, up to
+    :data:`GRID_CACHE_SIZE`.
+
+    As in :mod:`python:calendar`, :class:`Calendar` takes first weekday
+    modulo 7 while :func:`setfirstweekday` raises `ValueError` for values
+    out of 0..6.
+"""
+
+from pyjalali import backend as _backend
+from pyjalali.datetime import date as _date
+from pyjalali.helpers import LRUCache
+
+__all__ = ('Calendar', 'isleap', 'leapdays', 'monthrange', 'monthcalendar',
+           'firstweekday', 'setfirstweekday', 'SHANBEH', 'YEKSHANBEH',
+           'DOSHANBEH', 'SESHANBEH', 'CHAHARSHANBEH', 'PANJSHANBEH', 'JOMEH',
+           'GRID_CACHE_SIZE')
+
+(SHANBEH, YEKSHANBEH, DOSHANBEH, SESHANBEH, CHAHARSHANBEH, PANJSHANBEH,
+ JOMEH) = range(7)
+
+GRID_CACHE_SIZE = 512
+"""Number of month grids kept, may be changed at any time.  Grids cached so
+far are dropped then."""
+
+_grids = None
+
+
+def isleap(year):
+    """Return True if given year is leap year else False."""
+    return _backend.current.is_leap(year)
+
+
+def leapdays(y1, y2):
+    """Return number of leap years in ``range(y1, y2)``."""
+    is_leap = _backend.current.is_leap
+    return sum(1 for y in range(y1, y2) if is_leap(y))
+
+
+def monthrange(year, month):
+    """Return weekday of first day and number of days of month (1-12)."""
+    if not 1 <= month <= 12:
+        raise ValueError('month value out of range [1, 12]')
+    current = _backend.current
+    return (current.weekday(current.days_from_date(year, month, 1)),
+            current.month_days(year, month))
+
+
+def _month_layout(year, month, firstweekday):
+    """Days since UTC Epoch of first cell, number of empty cells before
+    first day, number of days and number of weeks of a month grid."""
+    first, days = monthrange(year, month)
+    lead = (first - firstweekday) % 7
+    start = _backend.current.days_from_date(year, month, 1) - lead
+    return start, lead, days, (lead + days + 6) // 7
+
+
+def _days_grid(year, month, firstweekday):
+    start, lead, days, weeks = _month_layout(year, month, firstweekday)
+    cells = [0] * lead + list(range(1, days + 1))
+    cells += [0] * (weeks * 7 - len(cells))
+    return tuple(tuple(cells[i:i + 7]) for i in range(0, weeks * 7, 7))
+
+
+def _days2_grid(year, month, firstweekday):
+    return tuple(tuple((d, (firstweekday + i) % 7) for i, d in enumerate(w))
+                 for w in _grid(_days_grid, year, month, firstweekday))
+
+
+def _dates_grid(year, month, firstweekday):
+    start, lead, days, weeks = _month_layout(year, month, firstweekday)
+    from_days = _date._from_days
+    return tuple(tuple(from_days(d) for d in range(w, w + 7))
+                 for w in range(start, start + weeks * 7, 7))
+
+
+def _grid(kind, year, month, firstweekday):
+    global _grids
+    grids = _grids
+    if grids is None or grids.size != GRID_CACHE_SIZE:
+        grids = _grids = LRUCache(GRID_CACHE_SIZE)
+    key = (kind, year, month, firstweekday)
+    grid = grids.get(key)
+    if grid is None:
+        grid = kind(year, month, firstweekday)
+        grids.put(key, grid)
+    return grid
+
+
+class Calendar(object):
+    """Base calendar of :mod:`python:calendar`, where first day of week is
+    given by `firstweekday` modulo 7, 0 being Shanbeh.
+
+    >>> Calendar(-1).firstweekday == JOMEH
+    True
+    """
+
+    def __init__(self, firstweekday=SHANBEH):
+        self.firstweekday = firstweekday
+
+    def getfirstweekday(self):
+        return self._firstweekday
+
+    def setfirstweekday(self, firstweekday):
+        self._firstweekday = firstweekday % 7
+
+    firstweekday = property(getfirstweekday, setfirstweekday)
+
+    def iterweekdays(self):
+        """Iterate over weekday numbers of a week, starting with
+        :attr:`firstweekday`."""
+        for i in range(self._firstweekday, self._firstweekday + 7):
+            yield i % 7
+
+    def itermonthdates(self, year, month):
+        """Iterate over :class:`.datetime.date` of complete weeks covering
+        given month, including days of neighbouring months."""
+        for week in self.monthdatescalendar(year, month):
+            for d in week:
+                yield d
+
+    def itermonthdays(self, year, month):
+        """Like :meth:`itermonthdates`, day numbers where days out of month
+        are 0."""
+        for week in self.monthdayscalendar(year, month):
+            for d in week:
+                yield d
+
+    def itermonthdays2(self, year, month):
+        """Like :meth:`itermonthdays`, tuples of day number and weekday."""
+        for week in self.monthdays2calendar(year, month):
+            for d in week:
+                yield d
+
+    def monthdatescalendar(self, year, month):
+        """Return tuple of weeks of given month, each a tuple of seven
+        :class:`.datetime.date`."""
+        return _grid(_dates_grid, year, month, self._firstweekday)
+
+    def monthdayscalendar(self, year, month):
+        """Return tuple of weeks of given month, each a tuple of seven day
+        numbers, 0 out of month."""
+        return _grid(_days_grid, year, month, self._firstweekday)
+
+    def monthdays2calendar(self, year, month):
+        """Return tuple of weeks of given month, each a tuple of seven
+        (day number, weekday) tuples."""
+        return _grid(_days2_grid, year, month, self._firstweekday)
+
+    def yeardatescalendar(self, year, width=3):
+        """Return month grids of :meth:`monthdatescalendar` of given year in
+        rows of `width` months."""
+        return self._year(self.monthdatescalendar, year, width)
+
+    def yeardayscalendar(self, year, width=3):
+        """Like :meth:`yeardatescalendar`, grids of
+        :meth:`monthdayscalendar`."""
+        return self._year(self.monthdayscalendar, year, width)
+
+    def yeardays2calendar(self, year, width=3):
+        """Like :meth:`yeardatescalendar`, grids of
+        :meth:`monthdays2calendar`."""
+        return self._year(self.monthdays2calendar, year, width)
+
+    def _year(self, month_grid, year, width):
+        months = [month_grid(year, m) for m in range(1, 13)]
+        return [months[i:i + width] for i in range(0, 12, width)]
+
+
+_calendar = Calendar()
+
+firstweekday = _calendar.getfirstweekday
+monthcalendar = _calendar.monthdayscalendar
+
+
+def setfirstweekday(firstweekday):
+    """Set first weekday of :func:`monthcalendar`, `ValueError` is raised if
+    it isn't in 0..6."""
+    if not SHANBEH <= firstweekday <= JOMEH:
+        raise ValueError('firstweekday must be in 0..6')
+    _calendar.firstweekday = firstweekday
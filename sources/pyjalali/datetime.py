@@ -5,103 +5,334 @@
     High level API for libjalali.
 
     .. Note ::
-        * There is no `iso_calendar` or `to_ordinal` or `fromordinal` method
-          here.  Implementing them is easy, just forward to
-          :attr:`.datetime.gregorian` but those methods are not related to
-          Jalali really.
+        * There is no `isocalendar` method here.  Implementing it is easy,
+          just forward to :attr:`.datetime.gregorian` but it is not related
+          to Jalali really.
+        * Ordinals are counted in proleptic Jalali calendar, Farvardin 1st
+          of year 1 has ordinal 1.  They are not interchangeable with
+          ordinals of :mod:`python:datetime`.
 """
 
 from __future__ import absolute_import
 import datetime as _std_dt_mod
-from time import time as _timestamp, mktime, strftime
+from time import time as _timestamp
 
-from pyjalali.jalali import (jalali_update, jalali_create_days_from_date,
-                             jalali_year_month_days)
+from pyjalali import backend as _backend, pure as _pure
 from pyjalali.jtime import jctime, jgmtime, jlocaltime, jmktime
-from pyjalali.jstr import jstrftime, jstrptime
+from pyjalali.jstr import compile_jstrftime, compile_jstrptime
 from pyjalali.types import struct_jtm, jtm_to_struct_time
-from pyjalali.helpers import normalize_jtm
 
 
 __all__ = ('date', 'datetime', 'j2g', 'g2j', 'now', 'utcnow',
            'jalali_from_gregorian', 'gregorian_from_jalali',
-           'datetime_from_ts')
+           'datetime_from_ts', 'FixedOffset', 'daterange',
+           'daterange_months', 'daterange_years')
+
+
+_YMD_CACHE_SIZE = 4096
+_ymd_cache = {}
+
+# proleptic Gregorian ordinal of UTC Epoch, Jalali and Gregorian dates meet
+# on number of days since then
+_GREGORIAN_EPOCH = _std_dt_mod.date(1970, 1, 1).toordinal()
+
+# days since UTC Epoch of ordinal 0, and largest ordinal
+_ORDINAL_EPOCH = _pure.days_from_date(1, 1, 1) - 1
+_MAX_ORDINAL = _pure.days_from_date(9999, 12, 29) - _ORDINAL_EPOCH
+
+_US_PER_SECOND = 1000000
+_US_PER_MINUTE = 60 * _US_PER_SECOND
+_US_PER_HOUR = 60 * _US_PER_MINUTE
+_US_PER_DAY = 24 * _US_PER_HOUR
+
+
+def _checked_days(year, month, day):
+    """Validate a date and return number of days passed since UTC Epoch
+
+    >>> date(1392, 13, 1)
+    Traceback (most recent call last):
+    ...
+    ValueError: month value out of range [1, 12]
+    >>> date(1392, 12, 30)
+    Traceback (most recent call last):
+    ...
+    ValueError: day is out of range for month
+    >>> date(10000, 1, 1)
+    Traceback (most recent call last):
+    ...
+    ValueError: year is out of range
+    >>> date.fromisoformat('0000-01-01')
+    Traceback (most recent call last):
+    ...
+    ValueError: year is out of range
+    """
+    if not 1 <= year <= 9999:
+        raise ValueError('year is out of range')
+    if not 1 <= month <= 12:
+        raise ValueError('month value out of range [1, 12]')
+    if not 1 <= day <= _backend.current.month_days(year, month):
+        raise ValueError('day is out of range for month')
+    return _backend.current.days_from_date(year, month, day)
+
+
+def _days_from_ordinal(ordinal):
+    if not 1 <= ordinal <= _MAX_ORDINAL:
+        raise ValueError('ordinal must be in 1..%d' % _MAX_ORDINAL)
+    return ordinal + _ORDINAL_EPOCH
+
+
+def _arithmetic_days(days):
+    """Validate number of days passed since UTC Epoch of a result of date
+    arithmetic, raise `OverflowError` if it is out of supported range
+
+    >>> date.max + _std_dt_mod.timedelta(1)
+    Traceback (most recent call last):
+    ...
+    OverflowError: date value out of range
+    >>> datetime.min - _std_dt_mod.timedelta(microseconds=1)
+    Traceback (most recent call last):
+    ...
+    OverflowError: date value out of range
+    >>> datetime.max - datetime.min + datetime.min == datetime.max
+    True
+    """
+    if not _ORDINAL_EPOCH < days <= _ORDINAL_EPOCH + _MAX_ORDINAL:
+        raise OverflowError('date value out of range')
+    return days
+
+
+def _ymd(days):
+    """(year, month, day) for given number of days passed since UTC Epoch.
+    Recently used ones are kept, dates are usually close to each other."""
+    try:
+        return _ymd_cache[days]
+    except KeyError:
+        if len(_ymd_cache) >= _YMD_CACHE_SIZE:
+            _ymd_cache.clear()
+        ymd = _ymd_cache[days] = _backend.current.date_from_days(days)
+        return ymd
+
+
+def _jtm_fields(days, hour=0, minute=0, second=0, gmtoff=0, zone=None):
+    """Fields tuple of :func:`.jstr.jtm_fields` for given number of days
+    passed since UTC Epoch and time of day, without making a structure"""
+    year, month, day = _ymd(days)
+    return (year, month, day, hour, minute, second,
+            _backend.current.weekday(days),
+            _pure._month_start[month - 1] + day - 1, 0, gmtoff, zone)
+
+
+def _make_jtm(days, hour=0, minute=0, second=0):
+    """Fill a new :class:`.types.struct_jtm` for given number of days passed
+    since UTC Epoch and time of day"""
+    year, month, day = _ymd(days)
+    return struct_jtm(second, minute, hour, day, month - 1, year,
+                      _backend.current.weekday(days),
+                      _pure._month_start[month - 1] + day - 1)
+
+
+class FixedOffset(_std_dt_mod.tzinfo):
+    """Fixed offset of *minutes* east of UTC, like offsets of ISO 8601
+    strings.
+
+    >>> FixedOffset(210).tzname(None), FixedOffset(-90).utcoffset(None)
+    ('UTC+03:30', datetime.timedelta(-1, 81000))
+    """
+
+    def __init__(self, minutes):
+        if not -1440 < minutes < 1440:
+            raise ValueError('offset must be less than a day')
+        self._minutes = minutes
+        self._offset = _std_dt_mod.timedelta(minutes=minutes)
+        sign = '-' if minutes < 0 else '+'
+        self._name = 'UTC%s%02d:%02d' % ((sign,) + divmod(abs(minutes), 60))
+
+    def __getinitargs__(self):
+        return (self._minutes,)
+
+    def __eq__(self, other):
+        if isinstance(other, FixedOffset):
+            return self._minutes == other._minutes
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, FixedOffset):
+            return self._minutes != other._minutes
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._minutes)
+
+    def __repr__(self):
+        return 'pyjalali.datetime.FixedOffset(%d)' % self._minutes
+
+    def utcoffset(self, dt):
+        return self._offset
+
+    def dst(self, dt):
+        return None
+
+    def tzname(self, dt):
+        return self._name
+
+    def fromutc(self, dt):
+        return (dt + self._offset).replace(tzinfo=self)
+
+
+_TWO_DIGITS = dict(('%02d' % i, i) for i in range(100))
+
+# FixedOffset by offset strings of ISO format, there are few of them in use
+_iso_offsets = {}
+
+# days since UTC Epoch of recently parsed YYYY-MM-DD strings
+_iso_dates = {}
+
+
+def _parse_isoformat(s, date_only=False):
+    """Parse ``YYYY-MM-DD[*HH:MM[:SS[.fff[fff]]][+HH:MM]]``, where year is
+    one or more digits and * any character.  Return number of days passed
+    since UTC Epoch, microseconds since midnight and tzinfo."""
+    days = _iso_dates.get(s[:10])
+    if days is not None:
+        k = 10
+    else:
+        i = s.find('-', 1)
+        month = _TWO_DIGITS.get(s[i + 1:i + 3])
+        day = _TWO_DIGITS.get(s[i + 4:i + 6])
+        if (month is None or day is None or s[i + 3:i + 4] != '-' or
+                not s[:i].isdigit()):
+            raise ValueError('Invalid isoformat string: %r' % s)
+        days = _checked_days(int(s[:i]), month, day)
+        k = i + 6
+        if k == 10:
+            if len(_iso_dates) >= _YMD_CACHE_SIZE:
+                _iso_dates.clear()
+            _iso_dates[s[:10]] = days
+    if len(s) == k:
+        return days, 0, None
+    if date_only:
+        raise ValueError('Invalid isoformat string: %r' % s)
+    hour = _TWO_DIGITS.get(s[k + 1:k + 3])
+    minute = _TWO_DIGITS.get(s[k + 4:k + 6])
+    if hour is None or minute is None or s[k + 3:k + 4] != ':' or \
+            hour > 23 or minute > 59:
+        raise ValueError('Invalid isoformat string: %r' % s)
+    time = hour * _US_PER_HOUR + minute * _US_PER_MINUTE
+    k += 6
+    if s[k:k + 1] == ':':
+        second = _TWO_DIGITS.get(s[k + 1:k + 3])
+        if second is None or second > 59:
+            raise ValueError('Invalid isoformat string: %r' % s)
+        time += second * _US_PER_SECOND
+        k += 3
+        if s[k:k + 1] == '.':
+            if s[k + 1:k + 7].isdigit() and len(s[k + 1:k + 7]) == 6:
+                time += int(s[k + 1:k + 7])
+                k += 7
+            elif s[k + 1:k + 4].isdigit() and len(s[k + 1:k + 4]) == 3:
+                time += int(s[k + 1:k + 4]) * 1000
+                k += 4
+            else:
+                raise ValueError('Invalid isoformat string: %r' % s)
+    if len(s) == k:
+        return days, time, None
+    offset = s[k:]
+    tz = _iso_offsets.get(offset)
+    if tz is None:
+        hours = _TWO_DIGITS.get(offset[1:3])
+        minutes = _TWO_DIGITS.get(offset[4:6])
+        if (len(offset) != 6 or offset[0] not in '+-' or offset[3] != ':' or
+                hours is None or minutes is None or hours > 23 or
+                minutes > 59):
+            raise ValueError('Invalid isoformat string: %r' % s)
+        minutes += hours * 60
+        if offset[0] == '-':
+            minutes = -minutes
+        tz = _iso_offsets[offset] = FixedOffset(minutes)
+    return days, time, tz
 
 
 class date(object):
-    __have_yday_wday = False
-    __hash_val = None
+    # a date is only its number of days since UTC Epoch, year, month and day
+    # are derived on demand
+    __slots__ = ('_days',)
 
     def __init__(self, year, month, day):
-        if not 1 <= month <= 12:
-            raise ValueError('month value out of range [1, 12]')
-        if day > jalali_year_month_days(year, month - 1):
-            raise ValueError('day is out of range for month')
-        self.__jtm = struct_jtm()
-        self.__jtm.tm_year = year
-        self.__jtm.tm_mon = month - 1
-        self.__jtm.tm_mday = day
+        self._days = _checked_days(year, month, day)
+
+    @classmethod
+    def _from_days(cls, days):
+        """Make date from number of days passed since UTC Epoch, without any
+        validation"""
+        self = object.__new__(cls)
+        self._days = days
+        return self
+
+    def __reduce__(self):
+        return (self.__class__, (self.year, self.month, self.day))
 
     def __add__(self, delta):
         if isinstance(delta, _std_dt_mod.timedelta):
-            njtm = self.__jtm.copy()
-            njtm.tm_mday += delta.days
-            normalize_jtm(njtm)
-            return date(njtm.tm_year, njtm.tm_mon + 1, njtm.tm_mday)
+            return date._from_days(_arithmetic_days(self._days +
+                                                    delta.days))
         raise TypeError('Unsupported operand type for +: %s and %s' %
                         (self.__class__.__name__, delta.__class__.__name__))
 
+    __radd__ = __add__
+
     def __eq__(self, jdate):
         if isinstance(jdate, date):
-            return (self.year == jdate.year and self.month == jdate.month and
-                    self.day == jdate.day)
+            return self._days == jdate._days
             raise TypeError('Unsupported operand type for ==: %s and %s' %
                             (self.__class__.__name__,
                              jdate.__class__.__name__))
 
     def __hash__(self):
-        if self.__hash_val is None:
-            self.__hash_val = hash((self.year, self.month, self.day, 101))
-        return self.__hash_val
+        return hash((self._days, 101))
 
     def __lt__(self, jdate):
         if isinstance(jdate, date):
-            if self.year < jdate.year:
-                return True
-            elif self.year != jdate.year:
-                return False
-            if self.month < jdate.month:
-                return True
-            elif self.month != jdate.month:
-                return False
-            return True if self.day < jdate.day else False
+            return self._days < jdate._days
         raise TypeError('Unsupported operand type for <: %s and %s' %
                         (self.__class__.__name__, jdate.__class__.__name__))
 
+    def __le__(self, jdate):
+        if isinstance(jdate, date):
+            return self._days <= jdate._days
+        raise TypeError('Unsupported operand type for <=: %s and %s' %
+                        (self.__class__.__name__, jdate.__class__.__name__))
+
+    def __gt__(self, jdate):
+        if isinstance(jdate, date):
+            return self._days > jdate._days
+        raise TypeError('Unsupported operand type for >: %s and %s' %
+                        (self.__class__.__name__, jdate.__class__.__name__))
+
+    def __ge__(self, jdate):
+        if isinstance(jdate, date):
+            return self._days >= jdate._days
+        raise TypeError('Unsupported operand type for >=: %s and %s' %
+                        (self.__class__.__name__, jdate.__class__.__name__))
+
+    def __ne__(self, jdate):
+        return not self == jdate
+
     def __sub__(self, delta_or_date):
         if isinstance(delta_or_date, _std_dt_mod.timedelta):
             delta = delta_or_date
-            njtm = self.__jtm.copy()
-            njtm.tm_mday -= delta.days
-            normalize_jtm(njtm)
-            return date(njtm.tm_year, njtm.tm_mon + 1, njtm.tm_mday)
+            return date._from_days(_arithmetic_days(self._days -
+                                                    delta.days))
         if isinstance(delta_or_date, date):
-            jd = delta_or_date
-            onjtm = jd.jtm.copy()
-            self._compute_yday_wday_if_necessary()
-            jalali_create_days_from_date(onjtm)
-            dx = self.__jtm.tm_yday - onjtm.tm_yday
+            dx = self._days - delta_or_date._days
             return _std_dt_mod.timedelta(days=dx)
         raise TypeError('Unsupported operand type for -: %s and %s' %
                         (self.__class__.__name__,
                          delta_or_date.__class__.__name__))
 
     def __repr__(self):
-        return '%s.%s(%d, %d, %d)' % (self.__module__,
-                                      self.__class__.__name__,
-                                      self.year,
-                                      self.month,
-                                      self.day)
+        return '%s.%s(%d, %d, %d)' % ((self.__module__,
+                                       self.__class__.__name__) +
+                                      _ymd(self._days))
 
     def __str__(self):
         return self.isoformat()
@@ -109,36 +340,28 @@ class date(object):
     def __format__(self, format):
         return self.strftime(format)
 
-    def _compute_yday_wday_if_necessary(self):
-        if not self.__have_yday_wday:
-            njtm = self.__jtm.copy()
-            jalali_update(njtm)
-            self.__jtm.tm_wday = njtm.tm_wday
-            self.__jtm.tm_yday = njtm.tm_yday
-            self.__have_yday_wday = True
-
     @property
     def jtm(self):
-        """Broken-down jalali time structure for this date"""
-        return self.__jtm
+        """Broken-down jalali time structure for this date.  A new structure
+        is made on each access, modifying it doesn't affect the date."""
+        return _make_jtm(self._days)
 
     @property
     def year(self):
-        return self.__jtm.tm_year
+        return _ymd(self._days)[0]
 
     @property
     def month(self):
-        return self.__jtm.tm_mon + 1
+        return _ymd(self._days)[1]
 
     def ctime(self):
         """Return a string representing the date, ``date(1392, 8, 2).ctime() ==
         'Thu Aba 02 00:00:00 1392'``"""
-        njtm = self.__jtm.copy()
-        return jctime(jmktime(njtm))
+        return jctime(jmktime(self.jtm))
 
     @property
     def day(self):
-        return self.__jtm.tm_mday
+        return _ymd(self._days)[2]
 
     def replace(self, **kw):
         """Return new date object where values for supplied keyword keywrod
@@ -156,22 +379,62 @@ class date(object):
     def timetuple(self):
         """Return a :class:`time.struct_time` from this date.  DST flag is
         -1"""
-        njtm = self.__jtm.copy()
-        jalali_update(njtm)
+        njtm = self.jtm
         njtm.tm_isdst = -1
         return jtm_to_struct_time(njtm)
 
+    def toordinal(self):
+        """Return the proleptic Jalali ordinal of the date, where Farvardin
+        1st of year 1 has ordinal 1.
+
+        >>> date(1, 1, 1).toordinal(), date(1392, 9, 2).toordinal()
+        (1, 508300)
+        """
+        return self._days - _ORDINAL_EPOCH
+
     @classmethod
-    def fromtimestamp(self, ts):
-        """Return the local date corresponding to the POSIX timestamp"""
+    def fromtimestamp(self, ts, tz=None):
+        """Return the local date corresponding to the POSIX timestamp.  If
+        optional argument *tz* is given, return the date in that timezone,
+        ``TZ`` is not consulted then.
+
+        >>> date.fromtimestamp(1385238360, FixedOffset(-300))
+        pyjalali.datetime.date(1392, 9, 2)
+        >>> date.fromtimestamp(1385238360, FixedOffset(210))
+        pyjalali.datetime.date(1392, 9, 2)
+        >>> date.fromtimestamp(1385238360, FixedOffset(240))
+        pyjalali.datetime.date(1392, 9, 3)
+        """
+        if tz is not None:
+            return datetime_from_ts(ts, True, tz).date()
         jtm = jlocaltime(int(ts))
         return date(jtm.tm_year, jtm.tm_mon + 1, jtm.tm_mday)
 
+    @classmethod
+    def fromordinal(cls, ordinal):
+        """Return the date corresponding to the proleptic Jalali ordinal,
+        where Farvardin 1st of year 1 has ordinal 1.
+
+        >>> date.fromordinal(date(1392, 9, 2).toordinal() + 100000)
+        pyjalali.datetime.date(1666, 6, 17)
+        """
+        return cls._from_days(_days_from_ordinal(ordinal))
+
+    @classmethod
+    def fromisoformat(cls, date_string):
+        """Return a date from string of `YYYY-MM-DD` format, as written by
+        :meth:`isoformat`.
+
+        >>> date.fromisoformat('1392-09-02')
+        pyjalali.datetime.date(1392, 9, 2)
+        """
+        return cls._from_days(_parse_isoformat(date_string, True)[0])
+
     def isoformat(self):
         """Return a string representing the date in ISO 8601 format,
         `YYYY-MM-DD`.  For example ``date(1392, 8, 2).isoformat() ==
         1392-08-02'``"""
-        return self.strftime('%Y-%m-%d')
+        return compile_jstrftime('%Y-%m-%d').render(_jtm_fields(self._days))
 
     def isoweekday(self):
         """Return the day of the week as an integer, where Shanbeh is 1"""
@@ -187,55 +450,71 @@ class date(object):
             which might defined in your platform too but for other intentions.
             Check list of libjalali's formatting directives.
         """
-        self._compute_yday_wday_if_necessary()
-        return jstrftime(format, self.__jtm)
+        return compile_jstrftime(format).render(_jtm_fields(self._days))
 
     def weekday(self):
         """Return the day of the week as an integer, where Shanbeh is 0"""
-        self._compute_yday_wday_if_necessary()
-        return self.__jtm.tm_wday
+        return _backend.current.weekday(self._days)
 
 
-date.min = date(1, 1, 1)
-date.max = date(9999, 12, 29)
+date.min = date._from_days(_ORDINAL_EPOCH + 1)
+date.max = date._from_days(_ORDINAL_EPOCH + _MAX_ORDINAL)
 date.resolution = _std_dt_mod.timedelta(days=1)
 
 
 class datetime(object):
-    __hash_val = None
-    tzinfo = None  # let be here, might be invoked before init carelessly
+    # number of days since UTC Epoch plus microseconds since midnight, rest
+    # of fields are derived on demand
+    __slots__ = ('_days', '_time', 'tzinfo')
 
     def __init__(self, year, month, day, hour=None, minute=None, second=None,
                  microsecond=0, tzinfo=None):
         if not isinstance(microsecond, int):
             raise TypeError
-        self.__date = date(year, month, day)
-        self.__jtm = self.__date.jtm
+        if not 0 <= microsecond <= 999999:
+            raise ValueError('microsecond must be in 0..999999')
+        days = _checked_days(year, month, day)
+        time = microsecond
         if hour is not None:
             if not 0 <= hour <= 23:
                 raise ValueError('hour must be in 0..23')
-            self.__jtm.tm_hour = hour
+            time += hour * _US_PER_HOUR
         if minute is not None:
             if not 0 <= minute <= 59:
                 raise ValueError('minute must be in 0..59')
-            self.__jtm.tm_min = minute
+            time += minute * _US_PER_MINUTE
         if second is not None:
             if not 0 <= second <= 59:
                 raise ValueError('second must be in 0..59')
-            self.__jtm.tm_sec = second
-        self.microsecond = microsecond
+            time += second * _US_PER_SECOND
+        self._days = days
+        self._time = time
+        self.tzinfo = tzinfo
+
+    @classmethod
+    def _from_parts(cls, days, time, tzinfo):
+        """Make datetime from number of days passed since UTC Epoch and
+        microseconds since midnight, without any validation"""
+        self = object.__new__(cls)
+        self._days = days
+        self._time = time
         self.tzinfo = tzinfo
+        return self
+
+    def __reduce__(self):
+        return (self.__class__, (self.year, self.month, self.day, self.hour,
+                                 self.minute, self.second, self.microsecond,
+                                 self.tzinfo))
 
     def __add__(self, delta):
         if isinstance(delta, _std_dt_mod.timedelta):
-            njtm = self.__jtm.copy()
-            njtm.tm_sec += delta.seconds
-            njtm.tm_mday += delta.days
-            ms = normalize_jtm(njtm, self.microsecond + delta.microseconds)
-            return datetime_from_jtm(njtm, ms, self.tzinfo)
+            return self._shifted(delta.days, delta.seconds,
+                                 delta.microseconds)
         raise TypeError('Unsupported operand type for +: %s and %s' %
                         (self.__class__.__name__, delta.__class__.__name__))
 
+    __radd__ = __add__
+
     def __eq__(self, jdt):
         if isinstance(jdt, datetime):
             if (jdt.tzinfo is None) != (self.tzinfo is None):
@@ -244,58 +523,25 @@ class datetime(object):
             if jdt.tzinfo != self.tzinfo:
                 return (self.replace(tzinfo=None) - self.utcoffset()) == \
                        (jdt.replace(tzinfo=None) - jdt.utcoffset())
-            return (self.year == jdt.year and self.month == jdt.month and
-                    self.day == jdt.day and self.hour == jdt.hour and
-                    self.minute == jdt.minute and self.second == jdt.second
-                    and self.microsecond == jdt.microsecond)
+            return self._days == jdt._days and self._time == jdt._time
         raise TypeError('Unsupported operand type for ==: %s and %s' %
                         (self.__class__.__name__, jdt.__class__.__name__))
 
     def __hash__(self):
         # tzinfo shoudn't count, two date with different zone's should produce
         # same hash but if one is aware and one is naive it should be different
-        if self.__hash_val is None:
-            if self.tzinfo is None:
-                d = self
-            else:
-                d = self - self.utcoffset()
-            # yes, who cares?
-            str = '%d%d%d%d%d%d%d%d' % (d.year, d.month, d.day, d.hour,
-                                        d.minute, d.second, d.microsecond,
-                                        d.tzinfo is None)
-            self.__hash_val = hash(str)
-        return self.__hash_val
+        if self.tzinfo is None:
+            d = self
+        else:
+            d = self - self.utcoffset()
+        return hash((d._days, d._time, d.tzinfo is None))
 
     def __lt__(self, dt):
         if isinstance(dt, datetime):
             d1 = self
             d2 = dt
             if (d1.tzinfo or d2.tzinfo) is None:
-                if d1.year < d2.year:
-                    return True
-                if d1.year != d2.year:
-                    return False
-                if d1.month < d2.month:
-                    return True
-                if d1.month != d2.month:
-                    return False
-                if d1.day < d2.day:
-                    return True
-                elif d1.day != d2.day:
-                    return False
-                if d1.hour < d2.hour:
-                    return True
-                elif d1.hour != d2.hour:
-                    return False
-                if d1.minute < d2.minute:
-                    return True
-                elif d1.minute != d2.minute:
-                    return False
-                if d1.second < d2.second:
-                    return True
-                elif d1.second != d2.second:
-                    return False
-                return True if d1.microsecond < d2.microsecond else False
+                return (d1._days, d1._time) < (d2._days, d2._time)
             if not (d1.tzinfo and d2.tzinfo):
                 raise TypeError("can't compare offset-naive and offset-aware"
                                 "datetimes")
@@ -310,6 +556,23 @@ class datetime(object):
         raise TypeError('Unsupported operand type for <: %s and %s' %
                         (self.__class__.__name__, dt.__class__.__name__))
 
+    def __gt__(self, dt):
+        if isinstance(dt, datetime):
+            return dt < self
+        if isinstance(dt, _std_dt_mod.datetime):
+            return self.gregorian > dt
+        raise TypeError('Unsupported operand type for >: %s and %s' %
+                        (self.__class__.__name__, dt.__class__.__name__))
+
+    def __le__(self, dt):
+        return not self > dt
+
+    def __ge__(self, dt):
+        return not self < dt
+
+    def __ne__(self, jdt):
+        return not self == jdt
+
     def __repr__(self):
         fmt = '%s.%s(%r, %r, %r, %r, %r, %r, %r%%s' % \
               (self.__module__,
@@ -331,11 +594,8 @@ class datetime(object):
     def __sub__(self, delta_or_jdt):
         if isinstance(delta_or_jdt, _std_dt_mod.timedelta):
             delta = delta_or_jdt
-            njtm = self.__jtm.copy()
-            njtm.tm_sec -= delta.seconds
-            njtm.tm_mday -= delta.days
-            ms = normalize_jtm(njtm, self.microsecond - delta.microseconds)
-            return datetime_from_jtm(njtm, ms, self.tzinfo)
+            return self._shifted(-delta.days, -delta.seconds,
+                                 -delta.microseconds)
         if isinstance(delta_or_jdt, _std_dt_mod.datetime):
             raise TypeError("It doesn't make sense subtract Gregorian date "
                             "from Jalali date")
@@ -347,20 +607,20 @@ class datetime(object):
             if self.tzinfo != jdt.tzinfo:
                 return (self.replace(tzinfo=None) - self.utcoffset()) - \
                        (jdt.replace(tzinfo=None) - jdt.utcoffset())
-            self.__date._compute_yday_wday_if_necessary()
-            onjtm = jdt.jtm.copy()
-            jalali_create_days_from_date(onjtm)
-            dx = _std_dt_mod.timedelta(days=self.__jtm.tm_yday-onjtm.tm_yday,
-                                       hours=self.hour - jdt.hour,
-                                       minutes=self.minute - jdt.minute,
-                                       seconds=self.second - jdt.second,
-                                       microseconds=(self.microsecond -
-                                                     jdt.microsecond))
-            return dx
+            return _std_dt_mod.timedelta(days=self._days - jdt._days,
+                                         microseconds=self._time - jdt._time)
         raise TypeError('Unsupported operand type for -: %s and %s' %
                         (self.__class__.__name__,
                          delta_or_jdt.__class__.__name__))
 
+    def _shifted(self, days, seconds, microseconds):
+        """Return new datetime moved by given amount of time"""
+        carry, time = divmod(self._time + seconds * _US_PER_SECOND +
+                             microseconds, _US_PER_DAY)
+        return datetime._from_parts(_arithmetic_days(self._days + days +
+                                                     carry), time,
+                                    self.tzinfo)
+
     def astimezone(self, tz):
         """
         Return a :class:`.datetime` object with new :attr:`.tzinfo` attribute
@@ -395,35 +655,37 @@ class datetime(object):
     @property
     def gregorian(self):
         """Return Gregorian :class:`python:datetime.datetime` object
-        corresponding to this datetime.  Result will cached for future uses.
+        corresponding to this datetime.
         """
-        if getattr(self, '__gregorian', None) is None:
-            self.__gregorian = gregorian_from_jalali(self)
-        return self.__gregorian
+        return gregorian_from_jalali(self)
 
     @property
     def year(self):
-        return self.__jtm.tm_year
+        return _ymd(self._days)[0]
 
     @property
     def month(self):
-        return self.__jtm.tm_mon + 1
+        return _ymd(self._days)[1]
 
     @property
     def day(self):
-        return self.__jtm.tm_mday
+        return _ymd(self._days)[2]
 
     @property
     def hour(self):
-        return self.__jtm.tm_hour
+        return self._time // _US_PER_HOUR
 
     @property
     def minute(self):
-        return self.__jtm.tm_min
+        return self._time // _US_PER_MINUTE % 60
 
     @property
     def second(self):
-        return self.__jtm.tm_sec
+        return self._time // _US_PER_SECOND % 60
+
+    @property
+    def microsecond(self):
+        return self._time % _US_PER_SECOND
 
     @classmethod
     def combine(self, date, time):
@@ -442,11 +704,11 @@ class datetime(object):
         >>> datetime(1392, 9, 1, 12, 32, 14, 992).ctime()
         'Jom Aza 01 12:32:14 1392'
         """
-        return jctime(jmktime(self.__jtm.copy()))
+        return jctime(jmktime(self.jtm))
 
     def date(self):
         """Return :class:`.date` object with same year, month and day."""
-        return self.__date.replace()
+        return date._from_days(self._days)
 
     @classmethod
     def fromtimestamp(self, ts, tz=None):
@@ -458,13 +720,22 @@ class datetime(object):
         """
         return datetime_from_ts(ts, True, tz)
 
+    @classmethod
+    def fromordinal(cls, ordinal):
+        """Return the datetime corresponding to the proleptic Jalali
+        ordinal, at midnight with :attr:`.tzinfo` None."""
+        return cls._from_parts(_days_from_ordinal(ordinal), 0, None)
+
     def __format__(self, format):
         return self.strftime(format)
 
     @property
     def jtm(self):
-        """Broken-down jalali time structure for this date"""
-        return self.__jtm
+        """Broken-down jalali time structure for this date.  A new structure
+        is made on each access, modifying it doesn't affect the datetime."""
+        seconds = self._time // _US_PER_SECOND
+        return _make_jtm(self._days, seconds // 3600, seconds // 60 % 60,
+                         seconds % 60)
 
     def isoformat(self, sep='T'):
         """
@@ -474,23 +745,42 @@ class datetime(object):
         separator, placed between the date and time portions of the result.
 
         >>> datetime(1392, 9, 1, 12, 32, 14, 992).isoformat(' ')
-        '1392-09-01 12:32:14.992'
+        '1392-09-01 12:32:14.000992'
+        >>> datetime(1392, 9, 1, 12, 32, tzinfo=FixedOffset(-210)).isoformat()
+        '1392-09-01T12:32:00-03:30'
         """
-        format = '%Y-%m-%d'+sep+'%H:%M:%S'
-        if self.microsecond != 0:
-            format += '.%d' % self.microsecond
+        res = compile_jstrftime('%Y-%m-%d' + sep + '%H:%M:%S').render(
+            self._fields())
+        microsecond = self._time % _US_PER_SECOND
+        if microsecond != 0:
+            res += '.%06d' % microsecond
         utcoff = self.utcoffset()
         if utcoff is not None:
-            if utcoff.total_seconds() >= 0:
-                sign = '+'
-            else:
-                sign = '-'
-            format += '%s%s' % (sign, str(utcoff).rsplit(':', 1)[0])
-        return self.strftime(format)
+            minutes = utcoff.days * 1440 + utcoff.seconds // 60
+            sign = '-' if minutes < 0 else '+'
+            res += '%s%02d:%02d' % ((sign,) + divmod(abs(minutes), 60))
+        return res
 
     def isoweekday(self):
         """Return the day of the week as an integer, where Shanbeh is 1"""
-        return self.__date.isoweekday()
+        return self.weekday() + 1
+
+    @classmethod
+    def fromisoformat(cls, date_string):
+        """Return a datetime from string in one of formats written by
+        :meth:`isoformat`, `YYYY-MM-DD[*HH:MM[:SS[.fff[fff]]][+HH:MM]]`
+        where * is any character.  Offset is kept as a :class:`FixedOffset`.
+        Fields are sliced at fixed positions, without :func:`.jstr.jstrptime`.
+
+        >>> datetime.fromisoformat('1392-09-01T12:32:14.992+03:30')
+        ... # doctest: +NORMALIZE_WHITESPACE
+        pyjalali.datetime.datetime(1392, 9, 1, 12, 32, 14, 992000,
+                                   tzinfo=pyjalali.datetime.FixedOffset(210))
+        >>> d = datetime(1392, 9, 1, 12, 32, 14, 992)
+        >>> datetime.fromisoformat(d.isoformat()) == d
+        True
+        """
+        return cls._from_parts(*_parse_isoformat(date_string))
 
     @classmethod
     def now(self, tz=None):
@@ -514,19 +804,32 @@ class datetime(object):
         """Return a string representing the date and time, controlled by an
         explicit format string.
         """
-        self.__date._compute_yday_wday_if_necessary()
-        if self.tzinfo is not None:
-            njtm = self.__jtm.copy()
-            njtm.tm_gmtoff = int(self.utcoffset().total_seconds())
-            njtm.tm_zone = self.tzname()
-            return jstrftime(format, njtm)
-        return jstrftime(format, self.jtm)
+        if self.tzinfo is None:
+            fields = self._fields()
+        else:
+            fields = self._fields(int(self.utcoffset().total_seconds()),
+                                  self.tzname())
+        return compile_jstrftime(format).render(fields)
+
+    def _fields(self, gmtoff=0, zone=None):
+        seconds = self._time // _US_PER_SECOND
+        return _jtm_fields(self._days, seconds // 3600, seconds // 60 % 60,
+                           seconds % 60, gmtoff, zone)
 
     @classmethod
     def strptime(self, date_str, format):
         """Return a datetime corresponding to `date_str`, parsed according to
-        `format`."""
-        return datetime_from_jtm(jstrptime(format, date_str))
+        `format` by a compiled :func:`.jstr.jstrptime`.  Raise `ValueError`
+        if string doesn't match format.
+
+        >>> datetime.strptime('1392/9/2 14:05', '%Y/%m/%d %H:%M')
+        pyjalali.datetime.datetime(1392, 9, 2, 14, 5, 0, 0)
+        """
+        fields, rest = compile_jstrptime(format).parse(date_str)
+        if rest != '':
+            raise ValueError('time data %r does not match format %r' %
+                             (date_str, format))
+        return datetime(*fields[:6])
 
     def timetuple(self):
         """Return a :class:`time.struct_time` from this date. The tm_isdst
@@ -535,8 +838,7 @@ class datetime(object):
         returns a non-zero value, tm_isdst is set to 1; else tm_isdst is set
         to 0."""
 
-        njtm = self.__jtm.copy()
-        jalali_update(njtm)
+        njtm = self.jtm
         if self.dst() is None:
             njtm.tm_isdst = -1
         elif self.dst() == 0:
@@ -545,14 +847,17 @@ class datetime(object):
             njtm.tm_isdst = 1
         return jtm_to_struct_time(njtm)
 
+    def toordinal(self):
+        """Return the proleptic Jalali ordinal of the date part, see
+        :meth:`.date.toordinal`."""
+        return self._days - _ORDINAL_EPOCH
+
     def utctimetuple(self):
         if self.tzinfo is None:
             d = self
         else:
             d = self.replace(tzinfo=None) - self.utcoffset()
-        njtm = d.jtm.copy()
-        jalali_update(njtm)
-        return jtm_to_struct_time(njtm)
+        return jtm_to_struct_time(d.jtm)
 
     def time(self):
         """Return :class:`python:datetime.time` object with same hour, minute,
@@ -632,12 +937,13 @@ class datetime(object):
 
     def weekday(self):
         """Return the day of the week as an integer, where Shanbeh is 0."""
-        return self.__date.weekday()
+        return _backend.current.weekday(self._days)
 
 
-datetime.min = datetime(1, 1, 1)
+datetime.min = datetime._from_parts(date.min._days, 0, None)
 #XXX: not sure, ask ashkan
-datetime.max = datetime(9999, 12, 29, 23, 59, 59)
+datetime.max = datetime._from_parts(date.max._days,
+                                    _US_PER_DAY - _US_PER_SECOND, None)
 datetime.resolution = _std_dt_mod.timedelta(seconds=1)
 
 
@@ -657,7 +963,8 @@ def datetime_from_ts(ts, local, tz=None):
     :param int ts: timestamp
     :param bool local: if True, return local date else return date in UTC
     :param `datetime.tzinfo` tz: if provided, make timezone aware datetime
-        discarding effect of local parameter
+        discarding effect of local parameter, local time is then given by
+        `tz` alone and ``TZ`` is not consulted
     """
     uts = int(ts % 1 * 1000000)
     tts = int(ts)
@@ -673,7 +980,8 @@ def datetime_from_ts(ts, local, tz=None):
 def jalali_from_gregorian(date_or_datetime):
     """Make Jalali :class:`.datetime` from Gregorian
     :class:`python:datetime.datetime` or make Jalali :class:`.date` from
-    Gregorian :class:`python:datetime.date`.
+    Gregorian :class:`python:datetime.date`.  Conversion is plain calendar
+    arithmetic, it doesn't depend on timezone and works before Epoch too.
 
     >>> from datetime import datetime as _dtm, date as _dt
     >>> jalali_from_gregorian(_dtm(2013, 11, 23, 23, 46, 0, 703498))
@@ -684,31 +992,30 @@ def jalali_from_gregorian(date_or_datetime):
     pyjalali.datetime.datetime(1392, 1, 2, 0, 12, 0, 0)
     >>> jalali_from_gregorian(_dt(2013, 3, 21))
     pyjalali.datetime.date(1392, 1, 1)
+    >>> jalali_from_gregorian(_dt(1969, 12, 31))
+    pyjalali.datetime.date(1348, 10, 10)
     """
     if isinstance(date_or_datetime, _std_dt_mod.datetime):
-        gdate = date_or_datetime.date()
-        time = date_or_datetime.time()
+        gdt = date_or_datetime
+        return datetime._from_parts(gdt.toordinal() - _GREGORIAN_EPOCH,
+                                    (gdt.hour * 3600 + gdt.minute * 60 +
+                                     gdt.second) * _US_PER_SECOND +
+                                    gdt.microsecond, None)
     elif isinstance(date_or_datetime, _std_dt_mod.date):
-        gdate = date_or_datetime
-        time = None
-    else:
-        raise TypeError('Expected Gregorian %s or %s instance, not %s' %
-                        (_std_dt_mod.datetime.__name__,
-                         _std_dt_mod.date.__name__,
-                         date_or_datetime.__class__.__name__))
-    if gdate < _std_dt_mod.date(1970, 1, 1):
-        raise ValueError("Can't convert dates before Epoch")
-    jdate = date.fromtimestamp(mktime(gdate.timetuple()))
-    if time is None:
-        return jdate
-    return datetime.combine(jdate, time)
+        return date._from_days(date_or_datetime.toordinal() -
+                               _GREGORIAN_EPOCH)
+    raise TypeError('Expected Gregorian %s or %s instance, not %s' %
+                    (_std_dt_mod.datetime.__name__,
+                     _std_dt_mod.date.__name__,
+                     date_or_datetime.__class__.__name__))
 
 
 def gregorian_from_jalali(date_or_datetime):
     """
     Make Gregorian :class:`python:datetime.datetime` from Jalali
     :class:`.datetime` or make Gregorian :class:`python:datetime.date` from
-    Jalali :class:`.date`.
+    Jalali :class:`.date`.  Like :func:`.jalali_from_gregorian`, doesn't
+    depend on timezone and works before Epoch.
 
     >>> gregorian_from_jalali(datetime(1392, 9, 2, 23, 10, 2))
     datetime.datetime(2013, 11, 23, 23, 10, 2)
@@ -716,25 +1023,19 @@ def gregorian_from_jalali(date_or_datetime):
     datetime.datetime(2013, 9, 21, 22, 30)
     >>> gregorian_from_jalali(date(1392, 6, 30))
     datetime.date(2013, 9, 21)
+    >>> gregorian_from_jalali(date(1, 1, 1))
+    datetime.date(622, 3, 22)
     """
     if isinstance(date_or_datetime, datetime):
-        jdate = date_or_datetime.date()
-        time = date_or_datetime.timetz()
+        gdate = _std_dt_mod.date.fromordinal(date_or_datetime._days +
+                                             _GREGORIAN_EPOCH)
+        return _std_dt_mod.datetime.combine(gdate, date_or_datetime.timetz())
     elif isinstance(date_or_datetime, date):
-        jdate = date_or_datetime
-        time = None
-    else:
-        raise TypeError('Expected Jalali %s or %s instance, not %s' %
-                        (datetime.__name__, date.__name__,
-                         date_or_datetime.__class__.__name__))
-    if jdate < date(1348, 10, 11):
-        raise ValueError("Can't convert dates before Epoch")
-    # to stop dst changes from bugging conversion, just convert date
-    njtm = jdate.jtm.copy()
-    gdate = _std_dt_mod.date.fromtimestamp(jmktime(njtm))
-    if time is None:
-        return gdate
-    return _std_dt_mod.datetime.combine(gdate, time)
+        return _std_dt_mod.date.fromordinal(date_or_datetime._days +
+                                            _GREGORIAN_EPOCH)
+    raise TypeError('Expected Jalali %s or %s instance, not %s' %
+                    (datetime.__name__, date.__name__,
+                     date_or_datetime.__class__.__name__))
 
 
 def datetime_from_jtm(jtm, microsecond=0, tz=None):
@@ -742,6 +1043,149 @@ def datetime_from_jtm(jtm, microsecond=0, tz=None):
                     tzinfo=tz)
 
 
+def _step_us(step):
+    """Step of :func:`daterange` in microseconds"""
+    if isinstance(step, _std_dt_mod.timedelta):
+        return (step.days * 86400 + step.seconds) * _US_PER_SECOND + \
+            step.microseconds
+    return step * _US_PER_DAY
+
+
+def daterange(start, stop, step=1):
+    """Generate dates from `start` up to, but not including, `stop` like
+    :func:`python:range` does.  `step` is a number of days or a
+    :class:`python:datetime.timedelta`, whole days for :class:`.date`.
+    Dates are made from day numbers directly, there is no calendar
+    arithmetic per step.
+
+    >>> [str(d) for d in daterange(date(1392, 6, 30), date(1392, 7, 2))]
+    ['1392-06-30', '1392-06-31', '1392-07-01']
+    >>> [d.day for d in daterange(date(1392, 1, 10), date(1392, 1, 1), -3)]
+    [10, 7, 4]
+    >>> list(daterange(datetime(1392, 12, 29, 12), datetime(1393, 1, 1),
+    ...                _std_dt_mod.timedelta(hours=5)))[-1]
+    pyjalali.datetime.datetime(1392, 12, 29, 22, 0, 0, 0)
+    """
+    if isinstance(start, datetime):
+        if not isinstance(stop, datetime):
+            raise TypeError('stop must be a datetime like start')
+        step = _step_us(step)
+        if not step:
+            raise ValueError('step must not be zero')
+        tzinfo = start.tzinfo
+        first = start._days * _US_PER_DAY + start._time
+        from_parts = datetime._from_parts
+        for t in xrange(first, first + _step_us(stop - start), step):
+            days, time = divmod(t, _US_PER_DAY)
+            yield from_parts(days, time, tzinfo)
+        return
+    if not isinstance(start, date) or not isinstance(stop, date):
+        raise TypeError('start and stop must be dates')
+    if isinstance(step, _std_dt_mod.timedelta):
+        if step.seconds or step.microseconds:
+            raise ValueError('step of dates must be whole days')
+        step = step.days
+    if not step:
+        raise ValueError('step must not be zero')
+    # year, month and day are carried along into the cache of _ymd, so
+    # reading them off the dates costs no calendar arithmetic either
+    year, month, day = _ymd(start._days)
+    month_days = _backend.current.month_days
+    mdays = month_days(year, month)
+    from_days = start._from_days
+    cache = _ymd_cache
+    for days in xrange(start._days, stop._days, step):
+        if len(cache) >= _YMD_CACHE_SIZE:
+            cache.clear()
+        cache[days] = (year, month, day)
+        yield from_days(days)
+        day += step
+        while day > mdays:
+            day -= mdays
+            if month == 12:
+                year += 1
+                month = 1
+            else:
+                month += 1
+            mdays = month_days(year, month)
+        while day < 1:
+            if month == 1:
+                year -= 1
+                month = 12
+            else:
+                month -= 1
+            mdays = month_days(year, month)
+            day += mdays
+
+
+def daterange_months(start, stop=None, step=1):
+    """Generate dates `step` months apart from `start` up to, but not
+    including, `stop`, endless if `stop` is None.  Days past end of a month
+    are clamped to its last day, following months keep day of `start`.
+    Time and tzinfo of a :class:`.datetime` `start` are kept.
+    `OverflowError` is raised when a step leaves the supported range, as
+    date arithmetic does.
+
+    >>> [str(d) for d in daterange_months(date(1391, 6, 31),
+    ...                                   date(1392, 1, 1), 3)]
+    ['1391-06-31', '1391-09-30', '1391-12-30']
+    >>> [str(d) for d in daterange_months(date(1392, 1, 1),
+    ...                                   date(1391, 6, 1), -2)]
+    ['1392-01-01', '1391-11-01', '1391-09-01', '1391-07-01']
+    >>> list(daterange_months(date(9999, 11, 1)))
+    Traceback (most recent call last):
+    ...
+    OverflowError: date value out of range
+    """
+    if not step:
+        raise ValueError('step must not be zero')
+    if stop is not None and type(stop) is not type(start):
+        raise TypeError('stop must be of the same type as start')
+    if isinstance(start, datetime):
+        time = start._time
+        tzinfo = start.tzinfo
+        make = lambda days: datetime._from_parts(days, time, tzinfo)
+        end = None if stop is None else stop._days * _US_PER_DAY + stop._time
+    elif isinstance(start, date):
+        time = 0
+        make = start._from_days
+        end = None if stop is None else stop._days * _US_PER_DAY
+    else:
+        raise TypeError('start must be a date or datetime')
+    year, month, day = _ymd(start._days)
+    month += year * 12 - 1
+    days_from_date = _backend.current.days_from_date
+    month_len = _pure.month_len
+    is_leap = _backend.current.is_leap
+    while True:
+        year, m = divmod(month, 12)
+        days = month_len[m]
+        if m == 11 and is_leap(year):
+            days = 30
+        days = days_from_date(year, m + 1, min(day, days))
+        if end is not None:
+            t = days * _US_PER_DAY + time
+            if t >= end if step > 0 else t <= end:
+                return
+        yield make(_arithmetic_days(days))
+        month += step
+
+
+def daterange_years(start, stop=None, step=1):
+    """Like :func:`daterange_months` with `step` years, Esfand 30th falls
+    back to 29th in common years.
+
+    >>> [str(d) for d in daterange_years(date(1391, 12, 30),
+    ...                                  date(1400, 1, 1), 4)]
+    ['1391-12-30', '1395-12-30', '1399-12-30']
+    >>> [d.year for d in daterange_years(date(3, 1, 1), None, -1)]
+    Traceback (most recent call last):
+    ...
+    OverflowError: date value out of range
+    """
+    return daterange_months(start, stop, step * 12)
+
+
 g2j = jalali_from_gregorian
 """Alias for :func:`.jalali_from_gregorian`."""
 
@@ -28,6 +28,9 @@
     (1391, 11, 30)
 """
 
+from collections import OrderedDict
+from threading import Lock
+
 from pyjalali.jalali import jalali_is_jleap, jalali_update
 from pyjalali.types import struct_jtm
 
@@ -60,3 +63,52 @@ def normalize_jtm(jtm, microsecond=0):
     jtm.tm_sec, microsecond = normalized_pair(jtm.tm_sec, microsecond, 1000000)
     jalali_update(jtm)
     return microsecond
+
+
+class LRUCache(object):
+    """Mapping of at most *size* items, least recently used item is dropped
+    to make room for a new one.  Items are kept in order of use, lookups and
+    evictions take constant time.  Safe to share between threads.
+
+    >>> cache = LRUCache(2)
+    >>> cache.put('a', 1); cache.put('b', 2)
+    >>> cache.get('a')
+    1
+    >>> cache.put('c', 3)
+    >>> cache.get('b') is None, cache.get('a'), cache.get('c'), len(cache)
+    (True, 1, 3, 2)
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        """Return value of *key* or *default* if missing."""
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return default
+            self._items[key] = value
+            return value
+
+    def put(self, key, value):
+        """Set value of *key*, evicting least recently used item if full."""
+        with self._lock:
+            items = self._items
+            if key in items:
+                del items[key]
+            elif len(items) >= self.size:
+                if not items:
+                    return
+                items.popitem(last=False)
+            items[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
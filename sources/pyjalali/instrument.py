@@ -0,0 +1,158 @@
+"""
+    pyjalali.instrument
+    ~~~~~~~~~~~~~~~~~~~
+
+    Opt-in counters of calls into libjalali.  Once enabled, each libjalali
+    function used by :mod:`.jalali`, :mod:`.jtime` and :mod:`.jstr` is
+    replaced by a wrapper recording number of calls, cumulative time and a
+    histogram of latencies.  Statistics are keyed by name of libjalali
+    function, so they tell how many ctypes transitions a high level
+    operation fans out into:
+
+    >>> from pyjalali.jtime import jlocaltime
+    >>> from pyjalali.jstr import jstrftime
+    >>> with profile() as stats:
+    ...     s = jstrftime('%Y/%m/%d', jlocaltime(1385238360))
+    >>> sorted((name, st.calls) for name, st in stats.items())
+    [('jlocaltime_r', 1), ('jstrftime', 1)]
+    >>> is_enabled()
+    False
+
+    Histogram maps upper bound of each bucket, in nanoseconds, to number of
+    calls not slower than that and slower than previous bucket.  Buckets are
+    powers of two:
+
+    >>> st = stats['jstrftime']
+    >>> st.total > 0, sum(st.histogram.values())
+    (True, 1)
+
+    When disabled the ctypes functions are put back in place, there is no
+    overhead at all.  Calls of every thread are recorded, calls made by
+    worker processes of :mod:`.parallel` are not.
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+from ctypes import _CFuncPtr
+from threading import Lock
+from timeit import default_timer as _timer
+
+from pyjalali import _Prototype, jalali, jstr, jtime
+
+__all__ = ('Stats', 'disable', 'enable', 'is_enabled', 'profile', 'reset',
+           'snapshot')
+
+
+class Stats(namedtuple('Stats', 'calls total histogram')):
+    """Statistics of a libjalali function: number of `calls`, `total`
+    seconds spent in them and `histogram` of latencies, a dictionary of
+    bucket upper bound in nanoseconds to number of calls."""
+    __slots__ = ()
+
+
+_modules = (jalali, jstr, jtime)
+
+# name -> [calls, total seconds, {bucket: calls}]
+_stats = {}
+_lock = Lock()
+
+# (module, attribute, ctypes function) of replaced functions
+_originals = []
+
+
+def _record(name, elapsed):
+    bucket = 1 << int(elapsed * 1e9).bit_length()
+    with _lock:
+        st = _stats.get(name)
+        if st is None:
+            st = _stats[name] = [0, 0.0, {}]
+        st[0] += 1
+        st[1] += elapsed
+        st[2][bucket] = st[2].get(bucket, 0) + 1
+
+
+def _instrumented(name, func):
+    def call(*args):
+        start = _timer()
+        try:
+            return func(*args)
+        finally:
+            _record(name, _timer() - start)
+    call.__name__ = func.__name__
+    return call
+
+
+def is_enabled():
+    """Return True if calls are being recorded."""
+    return bool(_originals)
+
+
+def enable():
+    """Start recording calls into libjalali, does nothing if already
+    enabled.  Statistics gathered before are kept, see :func:`reset`."""
+    with _lock:
+        if _originals:
+            return
+        for module in _modules:
+            for attr, value in list(vars(module).items()):
+                if not attr.startswith('_'):
+                    continue
+                if isinstance(value, _Prototype):
+                    value = value.bind()
+                if isinstance(value, _CFuncPtr):
+                    _originals.append((module, attr, value))
+                    setattr(module, attr, _instrumented(attr[1:], value))
+
+
+def disable():
+    """Stop recording and put ctypes functions back."""
+    with _lock:
+        while _originals:
+            module, attr, value = _originals.pop()
+            setattr(module, attr, value)
+
+
+def reset():
+    """Drop all statistics."""
+    with _lock:
+        _stats.clear()
+
+
+def snapshot():
+    """Return dictionary of libjalali function name to :class:`Stats` of
+    calls recorded so far."""
+    with _lock:
+        return dict((name, Stats(st[0], st[1], dict(st[2])))
+                    for name, st in _stats.items())
+
+
+def _difference(before, after):
+    res = {}
+    for name, st in after.items():
+        old = before.get(name)
+        if old is None:
+            res[name] = st
+        elif st.calls != old.calls:
+            res[name] = Stats(st.calls - old.calls, st.total - old.total,
+                              dict((b, n - old.histogram.get(b, 0))
+                                   for b, n in st.histogram.items()
+                                   if n != old.histogram.get(b, 0)))
+    return res
+
+
+@contextmanager
+def profile():
+    """Context manager recording calls made inside its block.  Yields a
+    dictionary which is filled like :func:`snapshot` on exit, with calls
+    of the block only.  Enables recording for the block if it wasn't."""
+    enabled = is_enabled()
+    before = snapshot()
+    stats = {}
+    if not enabled:
+        enable()
+    try:
+        yield stats
+    finally:
+        if not enabled:
+            disable()
+        stats.update(_difference(before, snapshot()))
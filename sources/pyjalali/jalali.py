@@ -6,25 +6,30 @@
 """
 
 from pyjalali import _libj
-from pyjalali.types import struct_ab_jtm, struct_jtm, struct_jyinfo, time_t
-from ctypes import POINTER, byref, c_int
+from pyjalali.types import struct_ab_jtm, struct_jtm, struct_jyinfo, time_t, \
+    c_array, c_out_array
+from ctypes import POINTER, byref, c_int, c_long, c_size_t
 
 __all__ = ('jalali_create_date_from_days', 'jalali_create_date_from_days',
            'jalali_create_secs_from_time', 'jalali_create_time_from_secs',
-           'jalali_get_date', 'jalali_get_diff', 'jalali_get_jyear_info',
-           'jalali_year_month_days', 'jalali_is_jleap', 'jalali_update')
+           'jalali_get_date', 'jalali_get_date_array', 'jalali_get_date_off',
+           'jalali_get_diff', 'jalali_get_diff_array', 'jalali_get_jyear_info',
+           'jalali_get_jyear_infos',
+           'jalali_year_month_days', 'jalali_is_jleap', 'jalali_update',
+           'jalali_update_off')
 
+# libjalali functions, replaced by ctypes ones on first call
+_bind = _libj.binder(globals())
 
-_jalali_is_jleap = _libj.jalali_is_jleap
-_jalali_is_jleap.argtypes = (c_int,)
-_jalali_is_jleap.restype = c_int
+
+_jalali_is_jleap = _bind('jalali_is_jleap', c_int, (c_int,))
 def jalali_is_jleap(year):
     """Return True if given year is leap year else False."""
     return _jalali_is_jleap(year) == 1
 
 
-_jalali_create_time_from_secs = _libj.jalali_create_time_from_secs
-_jalali_create_time_from_secs.argtypes = (time_t, POINTER(struct_ab_jtm))
+_jalali_create_time_from_secs = _bind('jalali_create_time_from_secs', None,
+                                      (time_t, POINTER(struct_ab_jtm)))
 def jalali_create_time_from_secs(timestamp):
     """Return :class:`.types.struct_ab_jtm` from given timestamp."""
     res = struct_ab_jtm()
@@ -32,9 +37,8 @@ def jalali_create_time_from_secs(timestamp):
     return res
 
 
-_jalali_create_secs_from_time = _libj.jalali_create_secs_from_time
-_jalali_create_secs_from_time.argtypes = (POINTER(struct_ab_jtm),)
-_jalali_create_secs_from_time.restype = time_t
+_jalali_create_secs_from_time = _bind('jalali_create_secs_from_time', time_t,
+                                      (POINTER(struct_ab_jtm),))
 def jalali_create_secs_from_time(ab_jtm):
     """Return number of seconds elapsed since UTC Epoch based on supplied
     :class:`.types.struct_ab_jtm`.
@@ -43,8 +47,8 @@ def jalali_create_secs_from_time(ab_jtm):
     return _jalali_create_secs_from_time(bref(ab_jtm)).value
 
 
-_jalali_create_date_from_days = _libj.jalali_create_date_from_days
-_jalali_create_date_from_days.argtypes = (POINTER(struct_jtm),)
+_jalali_create_date_from_days = _bind('jalali_create_date_from_days', c_int,
+                                      (POINTER(struct_jtm),))
 def jalali_create_date_from_days(jtm, silent=False):
     """Alter provided :class:`.types.struct_jtm` object's fields
     :attr:`~.types.struct_jtm.tm_mon` and :attr:`~.types.struct_jtm.tm_mday`
@@ -56,8 +60,8 @@ def jalali_create_date_from_days(jtm, silent=False):
         raise ValueError
 
 
-_jalali_create_days_from_date = _libj.jalali_create_days_from_date
-_jalali_create_days_from_date.argtypes = (POINTER(struct_jtm),)
+_jalali_create_days_from_date = _bind('jalali_create_days_from_date', c_int,
+                                      (POINTER(struct_jtm),))
 def jalali_create_days_from_date(jtm, silent=False):
     """Alter provided :class:`.types.struct_jtm` object's field
     :attr:`~.types.struct_jtm.tm_yday` based on its fields
@@ -69,8 +73,8 @@ def jalali_create_days_from_date(jtm, silent=False):
         raise ValueError
 
 
-_jalali_get_jyear_info = _libj.jalali_get_jyear_info
-_jalali_get_jyear_info.argtypes = (POINTER(struct_jyinfo),)
+_jalali_get_jyear_info = _bind('jalali_get_jyear_info', None,
+                               (POINTER(struct_jyinfo),))
 def jalali_get_jyear_info(jyinfo):
     """Fill given :class:`.types.struct_jyinfo` object's fields with year
     information based on given year by :attr:`.types.struct_jyinfo.y`.
@@ -78,8 +82,21 @@ def jalali_get_jyear_info(jyinfo):
     _jalali_get_jyear_info(byref(jyinfo))
 
 
-_jalali_get_date = _libj.jalali_get_date
-_jalali_get_date.argtypes = (c_int, POINTER(struct_jtm))
+def jalali_get_jyear_infos(start, stop):
+    """Return year information of years in ``range(start, stop)`` as a
+    ctypes array of :class:`.types.struct_jyinfo`.
+
+    >>> [(i.y, i.lf, i.apl) for i in jalali_get_jyear_infos(1391, 1394)]
+    [(1391, 1, 222), (1392, 0, 222), (1393, 0, 222)]
+    """
+    res = (struct_jyinfo * max(stop - start, 0))()
+    for year, jyinfo in enumerate(res, start):
+        jyinfo.y = year
+        _jalali_get_jyear_info(byref(jyinfo))
+    return res
+
+
+_jalali_get_date = _bind('jalali_get_date', None, (c_int, POINTER(struct_jtm)))
 def jalali_get_date(days):
     """Calculates Jalali date based on given number of days since UTC
     Epoch and return result as :class:`.types.struct_jtm`.
@@ -89,8 +106,18 @@ def jalali_get_date(days):
     return res
 
 
-_jalali_get_diff = _libj.jalali_get_diff
-_jalali_get_diff.argtypes = (POINTER(struct_jtm),)
+_jalali_get_date_off = _bind('jalali_get_date_off', None,
+                             (c_int, c_long, POINTER(struct_jtm)))
+def jalali_get_date_off(days, gmtoff):
+    """Like :func:`jalali_get_date`, zone fields are set for a zone `gmtoff`
+    seconds east of UTC instead of local zone.
+    """
+    res = struct_jtm()
+    _jalali_get_date_off(days, gmtoff, byref(res))
+    return res
+
+
+_jalali_get_diff = _bind('jalali_get_diff', c_int, (POINTER(struct_jtm),))
 def jalali_get_diff(jtm, silent=False):
     """Return number of days passed since UTC Epoch based on given
     :class:`.types.struct_jtm`.  In case of failure raise `ValueError`
@@ -102,8 +129,47 @@ def jalali_get_diff(jtm, silent=False):
     return res
 
 
-_jalali_update = _libj.jalali_update
-_jalali_update.argtypes = (POINTER(struct_jtm),)
+_jalali_get_date_array = _bind('jalali_get_date_array', None,
+                               (POINTER(c_int), POINTER(struct_jtm), c_size_t))
+def jalali_get_date_array(days, out=None):
+    """Like :func:`jalali_get_date` for each item of `days` in one call.
+
+    :param days: ctypes array of `c_int`, buffer of C ints like
+        ``array('i')`` or a sequence of ints
+    :param out: writable ctypes array or buffer of
+        :class:`.types.struct_jtm` to fill, a new ctypes array is returned
+        if None
+
+    >>> jtms = jalali_get_date_array([0, 16032])
+    >>> [(j.tm_year, j.tm_mon, j.tm_mday) for j in jtms]
+    [(1348, 9, 11), (1392, 8, 2)]
+    """
+    days = c_array(days, c_int)
+    res = c_out_array(out, struct_jtm, len(days))
+    _jalali_get_date_array(days, res, len(days))
+    return res if out is None else out
+
+
+_jalali_get_diff_array = _bind('jalali_get_diff_array', None,
+                               (POINTER(struct_jtm), POINTER(c_int), c_size_t))
+def jalali_get_diff_array(jtms, out=None):
+    """Like :func:`jalali_get_diff` for each item of `jtms` in one call,
+    failures are left as -1.
+
+    :param jtms: ctypes array or buffer of :class:`.types.struct_jtm`
+    :param out: writable ctypes array or buffer of `c_int` to fill, a new
+        ctypes array is returned if None
+
+    >>> list(jalali_get_diff_array(jalali_get_date_array(range(-2, 2))))
+    [-2, -1, 0, 1]
+    """
+    jtms = c_array(jtms, struct_jtm)
+    res = c_out_array(out, c_int, len(jtms))
+    _jalali_get_diff_array(jtms, res, len(jtms))
+    return res if out is None else out
+
+
+_jalali_update = _bind('jalali_update', None, (POINTER(struct_jtm),))
 def jalali_update(jtm):
     """Updates given :class:`.types.struct_jtm` object's fields based on its
     :attr:`~.types.struct_jtm.tm_year`, :attr:`~.types.struct_jtm.tm_mon` and
@@ -112,9 +178,17 @@ def jalali_update(jtm):
     _jalali_update(byref(jtm))
 
 
-_jalali_year_month_days = _libj.jalali_year_month_days
-_jalali_year_month_days.argtypes = (c_int, c_int)
-_jalali_year_month_days.restype = c_int
+_jalali_update_off = _bind('jalali_update_off', None,
+                           (POINTER(struct_jtm), c_long))
+def jalali_update_off(jtm, gmtoff):
+    """Like :func:`jalali_update`, zone fields are set for a zone `gmtoff`
+    seconds east of UTC instead of local zone.
+    """
+    _jalali_update_off(byref(jtm), gmtoff)
+
+
+_jalali_year_month_days = _bind('jalali_year_month_days', c_int,
+                                (c_int, c_int))
 def jalali_year_month_days(year, month):
     """Return number of days in provided month of year.
     Month number starts at zero
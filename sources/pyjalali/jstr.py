@@ -1,20 +1,71 @@
+# -*- coding: utf-8 -*-
 """
     pyjalali.jstr
     ~~~~~~~~~~~~~
 
     String formatting and deformatting
+
+    A format could be compiled once into a program which renders broken-down
+    times without going through libjalali.  Programs are kept in a bounded
+    cache, so compiling the same format again is a dictionary lookup:
+
+    >>> from pyjalali.jtime import jgmtime
+    >>> program = compile_jstrftime('%A %d %B %Y, %H:%M')
+    >>> program(jgmtime(1385238360))
+    'Saturday 02 Aazar 1392, 20:26'
+    >>> compile_jstrftime('%A %d %B %Y, %H:%M') is program
+    True
+
+    Output is the same as :func:`jstrftime` for every directive:
+
+    >>> directives = 'aAbBcCdDeEFgGvVhqHIjklmMnOpPrRsStTuUwWxXyYzZ%'
+    >>> format = ' '.join('%' + c for c in directives) + ' 100%'
+    >>> tms = [jgmtime(t) for t in range(-2 ** 31, 2 ** 31 - 1, 9876543)]
+    >>> all(compile_jstrftime(format)(tm) == jstrftime(format, tm)
+    ...     for tm in tms)
+    True
+
+    Parsing is compiled likewise, numbers are taken by slicing up to the
+    next literal of format:
+
+    >>> parser = compile_jstrptime('%Y-%m-%d %H:%M:%S')
+    >>> parser.parse('1392-09-02 20:26:00 GET /index.html')
+    ((1392, 9, 2, 20, 26, 0, 0, 0, 0, 0, None), '')
+    >>> parser.parse('1392-09-02T20:26:00')
+    ((1392, 9, 0, 0, 0, 0, 0, 0, 0, 0, None), None)
+
+    and agrees with :func:`jstrptime`:
+
+    >>> formats = ('%Y/%m/%d', '%a %d %B %Y, %H:%M', '%q %e %b %y %j',
+    ...            '%A, %d %B %Y')
+    >>> strings = [jstrftime(f, tm) for f in formats for tm in tms[::4]]
+    >>> strings += ['Jomeh 2 Aza 92 248', 'Sun, 02 aazar 1392', '1392/9',
+    ...             'Friday, 02 Bahman', 'Sat 2 Aazar 1392, 10:30']
+    >>> def jstr_fields(format, s):
+    ...     jtm, rest = jstrptime(format, s)
+    ...     return jtm_fields(jtm), rest
+    >>> all(compile_jstrptime(f).parse(s) == jstr_fields(f, s)
+    ...     for f in formats for s in strings)
+    True
 """
 
+from ctypes import POINTER, byref
+from ctypes import c_char_p, c_int, c_size_t, c_void_p, create_string_buffer
+import re
+
 from pyjalali import _libj
+from pyjalali.helpers import LRUCache
+from pyjalali.jtime import jlocaltime, jmktime
 from pyjalali.types import struct_jtm
-from ctypes import POINTER, byref
-from ctypes import c_char_p, c_int, create_string_buffer
 
-__all__ = ['jstrftime', 'jstrptime']
+__all__ = ['compile_jstrftime', 'compile_jstrptime', 'jstrftime', 'jstrptime',
+           'jtm_fields', 'jtm_from_fields']
 
-_jstrptime = _libj.jstrptime
-_jstrptime.argtypes = (c_char_p, c_char_p, POINTER(struct_jtm))
-_jstrptime.restype = c_char_p
+# libjalali functions, replaced by ctypes ones on first call
+_bind = _libj.binder(globals())
+
+_jstrptime = _bind('jstrptime', c_char_p,
+                   (c_char_p, c_char_p, POINTER(struct_jtm)))
 def jstrptime(format, date_str):
     """Return :class:`.types.struct_jtm` from date_str according to format.
 
@@ -27,8 +78,8 @@ def jstrptime(format, date_str):
     return date, res
 
 
-_jstrftime = _libj.jstrftime
-_jstrftime.argtypes = (c_char_p, c_int, c_char_p, POINTER(struct_jtm))
+_jstrftime = _bind('jstrftime', c_size_t,
+                   (c_char_p, c_int, c_char_p, POINTER(struct_jtm)))
 def jstrftime(format, jtm):
     """Return string representation of given time according to format.
 
@@ -39,3 +90,542 @@ def jstrftime(format, jtm):
     res = create_string_buffer(n)
     _jstrftime(res, n, format, byref(jtm))
     return res.value
+
+
+_COMPILED_CACHE_SIZE = 256
+
+_months = ('Farvardin', 'Ordibehesht', 'Khordaad', 'Tir', 'Mordaad',
+           'Shahrivar', 'Mehr', 'Aabaan', 'Aazar', 'Dey', 'Bahman', 'Esfand')
+_fa_months = ('فروردین', 'اردیبهشت', 'خرداد', 'تیر', 'مرداد', 'شهریور',
+              'مهر', 'آبان', 'آذر', 'دی', 'بهمن', 'اسفند')
+_months_3 = ('Far', 'Ord', 'Kho', 'Tir', 'Mor', 'Sha', 'Meh', 'Aba', 'Aza',
+             'Dey', 'Bah', 'Esf')
+_fa_months_3 = ('فرو', 'ارد', 'خرد', 'تیر', 'مرد', 'شهر', 'مهر', 'آبا',
+                'آذر', 'دی ', 'بهم', 'اسف')
+_days = ('Saturday', 'Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday',
+         'Friday')
+_days_3 = ('Sat', 'Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri')
+_days_fa = ('Shanbeh', 'Yek-Shanbeh', 'Do-Shanbeh', 'Seh-Shanbeh',
+            'Chahaar-Shanbeh', 'Panj-Shanbeh', 'Jomeh')
+_days_3_fa = ('Sha', 'Yek', 'Dos', 'Ses', 'Cha', 'Pan', 'Jom')
+_fa_days = ('شنبه', 'یکشنبه', 'دوشنبه', 'سه شنبه', 'چهارشنبه', 'پنجشنبه',
+            'جمعه')
+_fa_days_3 = ('شنب', 'یکش', 'دوش', 'سهش', 'چها', 'پنج', 'جمع')
+_fa_digits = ('۰', '۱', '۲', '۳', '۴', '۵', '۶', '۷', '۸', '۹')
+_fa_tzname = ('زمان زمستانی', 'زمان تابستانی')
+
+
+class _GmtZone(str):
+    """Zone of times made by :func:`.jtime.jgmtime`, libjalali tells it
+    apart by pointer."""
+
+
+_GMT_ZONE = _GmtZone('UTC')
+_GMT_ZONE_FA = 'گرینویچ'
+# address of GMT_ZONE, looked up once a zone pointer is compared
+_gmt_zone_p = None
+_zone_offset = struct_jtm.tm_zone.offset
+
+# positions in fields tuple a program renders
+(_YEAR, _MON, _MDAY, _HOUR, _MIN, _SEC, _WDAY, _YDAY, _ISDST, _GMTOFF,
+ _ZONE) = range(11)
+
+
+def _gmt_zone_address():
+    global _gmt_zone_p
+    _gmt_zone_p = c_void_p.in_dll(_libj.load(), 'GMT_ZONE').value
+    return _gmt_zone_p
+
+
+def jtm_fields(jtm):
+    """Return fields tuple of :class:`.types.struct_jtm`, as rendered by
+    compiled programs: ``(year, month, mday, hour, minute, second, wday,
+    yday, isdst, gmtoff, zone)`` where month is 1-12 and yday is 0-365.
+    """
+    zone = jtm.tm_zone
+    p = c_void_p.from_buffer(jtm, _zone_offset).value
+    if p is not None and p == (_gmt_zone_p or _gmt_zone_address()):
+        zone = _GMT_ZONE
+    return (jtm.tm_year, jtm.tm_mon + 1, jtm.tm_mday, jtm.tm_hour,
+            jtm.tm_min, jtm.tm_sec, jtm.tm_wday, jtm.tm_yday, jtm.tm_isdst,
+            jtm.tm_gmtoff, zone)
+
+
+def jtm_from_fields(fields):
+    """Return a new :class:`.types.struct_jtm` from fields tuple, inverse of
+    :func:`jtm_fields`."""
+    F = fields
+    return struct_jtm(F[_SEC], F[_MIN], F[_HOUR], F[_MDAY], F[_MON] - 1,
+                      F[_YEAR], F[_WDAY], F[_YDAY], F[_ISDST], F[_GMTOFF],
+                      F[_ZONE])
+
+
+def _c_div(a, b):
+    q = abs(a) // b
+    return -q if a < 0 else q
+
+
+def _c_mod(a, b):
+    return a - _c_div(a, b) * b
+
+
+def _farsi(n, padding=2, pad='۰'):
+    # port of jalali_to_farsi
+    digits = ''.join([_fa_digits[int(c)] for c in str(abs(n))]) if n else ''
+    if n < 0:
+        digits = '-' + digits
+    width = len(str(abs(n))) + (n < 0) if n else 0
+    return pad * (padding - width) + digits
+
+
+class _Table(dict):
+    """Strings of numbers, prefilled for usual values and formatted on
+    demand for others."""
+
+    def __init__(self, convert, values):
+        dict.__init__(self, ((n, convert(n)) for n in values))
+        self.convert = convert
+
+    def __missing__(self, n):
+        return self.convert(n)
+
+
+# '%02d' and friends on an int cost more than a whole lookup
+_padded = {'%02d': _Table('%02d'.__mod__, range(100)),
+           '%2d': _Table('%2d'.__mod__, range(100)),
+           '%03d': _Table('%03d'.__mod__, range(1000))}
+_fa2 = _Table(_farsi, range(100))
+
+
+def _hour12(F):
+    h = F[_HOUR]
+    return 12 if h == 12 else _c_mod(h, 12)
+
+
+def _am(F, am, pm):
+    return am if 0 <= F[_HOUR] < 12 else pm
+
+
+def _zone(F):
+    zone = F[_ZONE]
+    return '(null)' if zone is None else zone
+
+
+def _timestamp(F):
+    return c_int(jmktime(jtm_from_fields(F))).value
+
+
+def _gmtoff(F):
+    hours = _c_div(int(F[_GMTOFF]), 3600)
+    minutes = _c_div(_c_mod(int(F[_GMTOFF]), 3600), 60)
+    return '%s%02d%02d' % ('+' if hours >= 0 else '-', abs(hours),
+                           abs(minutes))
+
+
+# directive: (template, arguments), where an argument is either a field
+# position or a function of fields
+_directives = {
+    'a': ('%s', (lambda F: _days_3[F[_WDAY]],)),
+    'A': ('%s', (lambda F: _days[F[_WDAY]],)),
+    'b': ('%s', (lambda F: _months_3[F[_MON] - 1],)),
+    'B': ('%s', (lambda F: _months[F[_MON] - 1],)),
+    'c': ('%s %d %s %d %02d:%02d:%02d %s',
+          (lambda F: _days_3_fa[F[_WDAY]], _MDAY,
+           lambda F: _months_3[F[_MON] - 1], _YEAR, _HOUR, _MIN, _SEC,
+           _zone)),
+    'C': ('%d', (lambda F: _c_div(F[_YEAR], 100) + 1,)),
+    'd': ('%02d', (_MDAY,)),
+    'D': ('%d/%02d/%02d', (_YEAR, _MON, _MDAY)),
+    'e': ('%2d', (_MDAY,)),
+    'E': ('%s %s %s %s، ساعت %s:%s:%s - %s',
+          (lambda F: _fa_days[F[_WDAY]], lambda F: _fa2[F[_MDAY]],
+           lambda F: _fa_months[F[_MON] - 1],
+           lambda F: _farsi(F[_YEAR], 0, ' '), lambda F: _fa2[F[_HOUR]],
+           lambda F: _fa2[F[_MIN]], lambda F: _fa2[F[_SEC]],
+           lambda F: _GMT_ZONE_FA if F[_ZONE] is _GMT_ZONE else
+           _fa_tzname[F[_ISDST]])),
+    'F': ('%d-%02d-%02d', (_YEAR, _MON, _MDAY)),
+    'g': ('%s', (lambda F: _fa_days_3[F[_WDAY]],)),
+    'G': ('%s', (lambda F: _fa_days[F[_WDAY]],)),
+    'v': ('%s', (lambda F: _fa_months_3[F[_MON] - 1],)),
+    'V': ('%s', (lambda F: _fa_months[F[_MON] - 1],)),
+    'h': ('%s', (lambda F: _days_3_fa[F[_WDAY]],)),
+    'q': ('%s', (lambda F: _days_fa[F[_WDAY]],)),
+    'H': ('%02d', (_HOUR,)),
+    'I': ('%02d', (_hour12,)),
+    'j': ('%03d', (lambda F: F[_YDAY] + 1,)),
+    'k': ('%2d', (_HOUR,)),
+    'l': ('%2d', (_hour12,)),
+    'm': ('%02d', (_MON,)),
+    'M': ('%02d', (_MIN,)),
+    'n': ('\n', ()),
+    'O': ('%s', (lambda F: _am(F, 'ق.ظ', 'ب.ظ'),)),
+    'p': ('%s', (lambda F: _am(F, 'AM', 'PM'),)),
+    'P': ('%s', (lambda F: _am(F, 'am', 'pm'),)),
+    'r': ('%02d:%02d:%02d %s',
+          (_hour12, _MIN, _SEC, lambda F: _am(F, 'AM', 'PM'))),
+    'R': ('%02d:%02d', (_HOUR, _MIN)),
+    's': ('%d', (_timestamp,)),
+    'S': ('%02d', (_SEC,)),
+    't': ('\t', ()),
+    'T': ('%02d:%02d:%02d', (_HOUR, _MIN, _SEC)),
+    'u': ('%d', (lambda F: F[_WDAY] + 1,)),
+    # libjalali counts weeks from weekday of the day itself, not of
+    # Farvardin 1st
+    'U': ('%02d', (lambda F: _c_div(F[_YDAY] + F[_WDAY], 7),)),
+    'w': ('%d', (_WDAY,)),
+    'W': ('%s/%s/%s', (lambda F: _farsi(F[_YEAR], 0, ' '),
+                       lambda F: _fa2[F[_MON]],
+                       lambda F: _fa2[F[_MDAY]])),
+    'x': ('%02d/%02d/%d', (_MDAY, _MON, _YEAR)),
+    'X': ('%s:%s:%s', (lambda F: _fa2[F[_HOUR]], lambda F: _fa2[F[_MIN]],
+                       lambda F: _fa2[F[_SEC]])),
+    'y': ('%02d', (lambda F: _c_mod(_c_mod(F[_YEAR], 1000), 100),)),
+    'Y': ('%d', (_YEAR,)),
+    'z': ('%s', (_gmtoff,)),
+    'Z': ('%s', (_zone,)),
+    '%': ('%%', ()),
+}
+
+
+_conversion = re.compile('%%|%[0-9]*[ds]')
+
+
+def _program(template, args):
+    """Make a function of fields rendering template.  Source of a single
+    expression is generated, so rendering is one call, padded numbers are
+    looked up instead of formatted."""
+    conversions = [c for c in _conversion.findall(template) if c != '%%']
+    namespace = {}
+    exprs = []
+    for i, (conv, arg) in enumerate(zip(conversions, args)):
+        if isinstance(arg, int):
+            expr = 'F[%d]' % arg
+        else:
+            expr = '_a%d(F)' % i
+            namespace['_a%d' % i] = arg
+        if conv in _padded:
+            namespace['_t' + conv[1:-1]] = _padded[conv]
+            expr = '_t%s[%s]' % (conv[1:-1], expr)
+        exprs.append(expr)
+    template = _conversion.sub(
+        lambda m: '%s' if m.group() in _padded else m.group(), template)
+    source = 'lambda F: %r %% (%s)' % (template,
+                                       ''.join(e + ', ' for e in exprs))
+    return eval(source, namespace)
+
+
+class CompiledJstrftime(object):
+    """Format compiled by :func:`compile_jstrftime`.  Call it with a
+    :class:`.types.struct_jtm` or call its :attr:`render` with a fields tuple
+    made by :func:`jtm_fields`, which skips reading the structure."""
+
+    __slots__ = ('format', 'render')
+
+    def __init__(self, format):
+        self.format = format
+        # encoded like ctypes does for a c_char_p argument
+        format = str(format)
+        template = []
+        args = []
+        i, n = 0, len(format)
+        while i < n:
+            j = format.find('%', i)
+            if j == -1:
+                j = n
+            template.append(format[i:j])
+            if j + 1 >= n:
+                # lonely '%' at end is dropped, as jstrftime does
+                break
+            t, a = _directives.get(format[j + 1], ('', ()))
+            template.append(t)
+            args.extend(a)
+            i = j + 2
+        self.render = _program(''.join(template), args)
+
+    def __call__(self, jtm):
+        return self.render(jtm_fields(jtm))
+
+    def __repr__(self):
+        return 'compile_jstrftime(%r)' % self.format
+
+
+_compiled = LRUCache(_COMPILED_CACHE_SIZE)
+
+
+def compile_jstrftime(format):
+    """Return :class:`CompiledJstrftime` of format, output of which is the
+    same as :func:`jstrftime` but without a call to libjalali per rendered
+    time.  Recently compiled formats are reused.
+
+    :param string format: format of date representation
+    """
+    program = _compiled.get(format)
+    if program is None:
+        program = CompiledJstrftime(format)
+        _compiled.put(format, program)
+    return program
+
+
+# fields of a zeroed structure, where jstrptime starts from
+_PARSE_DEFAULTS = (0, 1, 0, 0, 0, 0, 0, 0, 0, 0, None)
+
+_integer = re.compile(r'\s*[+-]?[0-9]+').match
+_LONG_MIN, _LONG_MAX = -2 ** 63, 2 ** 63 - 1
+_INT_MIN, _INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def _atol(s):
+    # strtol clamps
+    m = _integer(s)
+    if m is None:
+        return 0
+    v = int(m.group())
+    if _LONG_MIN <= v <= _LONG_MAX:
+        return v
+    return _LONG_MIN if v < 0 else _LONG_MAX
+
+
+def _atoi(s):
+    # atoi is strtol cast to int
+    v = _atol(s)
+    if _INT_MIN <= v <= _INT_MAX:
+        return v
+    return (v - _INT_MIN) % 2 ** 32 + _INT_MIN
+
+
+class _Numbers(dict):
+    """atoi of strings, digit strings up to four characters long are kept,
+    int() costs more than a lookup."""
+
+    def __missing__(self, s):
+        v = _atoi(s)
+        if len(s) <= 4 and s.isdigit():
+            self[s] = v
+        return v
+
+
+_numbers = _Numbers()
+
+
+def _short_year(y):
+    return 1300 + y if 19 <= y < 100 else 1400 + y
+
+
+def _timestamp_fields(t):
+    return jtm_fields(jlocaltime(t))
+
+
+# name directives: field and lower case name to number
+_parse_names = {
+    'a': (_WDAY, dict((n.lower(), k) for k, n in enumerate(_days_3))),
+    'A': (_WDAY, dict((n.lower(), k) for k, n in enumerate(_days))),
+    'b': (_MON, dict((n.lower(), k + 1) for k, n in enumerate(_months_3))),
+    'B': (_MON, dict((n.lower(), k + 1) for k, n in enumerate(_months))),
+    'h': (_WDAY, dict((n.lower(), k) for k, n in enumerate(_days_3_fa))),
+    'q': (_WDAY, dict((n.lower(), k) for k, n in enumerate(_days_fa))),
+}
+
+# number directives: field and what is added to parsed number, %y is
+# mapped by _short_year
+_parse_numbers = {
+    'd': (_MDAY, 0),
+    'e': (_MDAY, 0),
+    'H': (_HOUR, 0),
+    'j': (_YDAY, -1),
+    'm': (_MON, 0),
+    'M': (_MIN, 0),
+    'S': (_SEC, 0),
+    'y': (_YEAR, 0),
+    'Y': (_YEAR, 0),
+}
+
+
+def _parse_field(F, directive, field):
+    """Store field of string parsed by directive in fields list, return
+    False if it isn't a valid name."""
+    if directive in _parse_names:
+        i, names = _parse_names[directive]
+        k = names.get(field.lower())
+        if k is None:
+            return False
+        F[i] = k
+    elif directive in _parse_numbers:
+        i, offset = _parse_numbers[directive]
+        v = _atoi(field) + offset
+        F[i] = _short_year(v) if directive == 'y' else v
+    elif directive == 's':
+        F[:] = _timestamp_fields(_atol(field))
+    return True
+
+
+def _interpret(format, date_str):
+    """Port of libjalali jstrptime, returning fields tuple and rest of string
+    like :meth:`CompiledJstrptime.parse`.  Compiled parsers fall back to it
+    on unusual input."""
+    s = date_str
+    F = list(_PARSE_DEFAULTS)
+    n, m = len(s), len(format)
+    i = j = diff = 0
+    while i < n and j < m:
+        # a '%' in string matches '%' of a directive as a literal
+        if s[i] == format[j]:
+            i += 1
+            j += 1
+            continue
+        if format[j] != '%':
+            return tuple(F), None
+        if j + 2 >= m:
+            field = s[i:]
+            end = n
+        else:
+            # field ends at literal up to next directive, or at first
+            # character after the last one
+            k = format.find('%', j + 2)
+            diff = 1 if k == -1 else k - j - 2
+            end = s.find(format[j + 2:j + 2 + diff], i)
+            if end == -1:
+                return tuple(F), None
+            field = s[i:end]
+        if not _parse_field(F, format[j + 1:j + 2], field):
+            return tuple(F), s[i:]
+        j += diff + 2
+        i = end + diff
+    return tuple(F), ''
+
+
+def _parser(format):
+    """Make a function parsing strings of format like :func:`_interpret`.
+    Format is turned into a regular expression of the same fields, which
+    end at first occurrence of the literal after them, and source of
+    conversions is generated.  Strings it doesn't match or with unknown
+    names are left to :func:`_interpret`."""
+    pattern = []
+    directives = []
+    m = len(format)
+    j = format.find('%')
+    if j == -1:
+        j = m
+    pattern.append(re.escape(format[:j]))
+    while j < m:
+        directives.append(format[j + 1:j + 2])
+        # jstrptime stops at end of string and matches '%' of string to
+        # '%' of a directive
+        pattern.append('(?=[^%])')
+        if j + 2 >= m:
+            # rest of string, only its leading number counts for atoi
+            if format[j + 1:j + 2] in _parse_numbers:
+                pattern.append(r'(\s*[+-]?[0-9]*)')
+            else:
+                pattern.append('(.*)')
+            break
+        k = format.find('%', j + 2)
+        delim = format[j + 2:j + 3] if k == -1 else format[j + 2:k]
+        if len(delim) == 1:
+            pattern.append('([^%s]*)' % re.escape(delim))
+        else:
+            pattern.append('((?:(?!%s).)*)' % re.escape(delim))
+        if k == -1:
+            pattern.append(re.escape(format[j + 2:]))
+            break
+        pattern.append(re.escape(delim))
+        j = k
+
+    fields = list(map(repr, _PARSE_DEFAULTS))
+    groups = ['g%d' % k for k in range(len(directives))]
+    body = ['m = _match(s)',
+            'if m is None:',
+            '    return _slow(format, s)']
+    if groups:
+        body.append('%s, = m.groups()' % ', '.join(groups))
+    for g, directive in zip(groups, directives):
+        if directive in _parse_names:
+            i = _parse_names[directive][0]
+            body.extend(('F%d = _names[%r][1].get(%s.lower())' %
+                         (i, directive, g),
+                         'if F%d is None:' % i,
+                         '    return _slow(format, s)'))
+        elif directive in _parse_numbers:
+            i, offset = _parse_numbers[directive]
+            expr = '_numbers[%s]' % g
+            if directive == 'y':
+                expr = '_short_year(%s)' % expr
+            if offset:
+                expr += ' %+d' % offset
+            body.append('F%d = %s' % (i, expr))
+        elif directive == 's':
+            fields = ['F%d' % k for k in range(len(fields))]
+            body.append('%s = _timestamp_fields(_atol(%s))' %
+                        (', '.join(fields), g))
+            continue
+        else:
+            continue
+        fields[i] = 'F%d' % i
+    body.append('return (%s), %r' % (', '.join(fields), ''))
+    namespace = {'_match': re.compile(''.join(pattern), re.S).match,
+                 '_slow': _interpret, '_names': _parse_names,
+                 '_numbers': _numbers, '_atol': _atol,
+                 '_short_year': _short_year, 'format': format,
+                 '_timestamp_fields': _timestamp_fields}
+    exec('def parse(s):\n    ' + '\n    '.join(body), namespace)
+    return namespace['parse']
+
+
+class CompiledJstrptime(object):
+    """Format compiled by :func:`compile_jstrptime`.  Call it with a string
+    to get what :func:`jstrptime` returns or use :meth:`parse`, which skips
+    making the structure."""
+
+    __slots__ = ('format', 'parse', '_results')
+
+    def __init__(self, format, cache_size=0):
+        self.format = format
+        # encoded like ctypes does for a c_char_p argument
+        parse = _parser(str(format))
+        if cache_size:
+            self._results = LRUCache(cache_size)
+            get, put = self._results.get, self._results.put
+
+            def cached_parse(date_str):
+                res = get(date_str)
+                if res is None:
+                    res = parse(date_str)
+                    put(date_str, res)
+                return res
+            self.parse = cached_parse
+        else:
+            self._results = None
+            self.parse = parse
+
+    def __call__(self, date_str):
+        fields, rest = self.parse(date_str)
+        return jtm_from_fields(fields), rest
+
+    def __repr__(self):
+        return 'compile_jstrptime(%r)' % self.format
+
+
+_compiled_parsers = LRUCache(_COMPILED_CACHE_SIZE)
+
+
+def compile_jstrptime(format, cache_size=0):
+    """Return :class:`CompiledJstrptime` of format, results of which are the
+    same as :func:`jstrptime`.  Its ``parse(date_str)`` returns fields tuple
+    of :func:`jtm_fields` and rest of string, which is ``''`` if string
+    matched, unparsed part if a name wasn't recognized and `None` if string
+    doesn't match format.  Fields parsed before a failure are set, like
+    jstrptime leaves them in the structure.  Recently compiled formats are
+    reused.
+
+    :param string format: format of string representation
+    :param int cache_size: keep results of this many recently parsed strings,
+        worth it if same strings repeat, like timestamps of log lines
+        written in the same second.  Results of ``%s`` depend on local zone
+        at the time they were parsed.
+    """
+    key = format, cache_size
+    program = _compiled_parsers.get(key)
+    if program is None:
+        program = CompiledJstrptime(format, cache_size)
+        _compiled_parsers.put(key, program)
+    return program
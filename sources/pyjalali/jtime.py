@@ -5,18 +5,69 @@
     Time functions.
 
     Functions `jasctime`, `jctime`, `jgmtime` and `jlocaltime` are forwarded
-    to reentrant backends.
+    to reentrant backends.  libjalali is thread-safe, as long as ``TZ`` isn't
+    changed meanwhile, and ctypes releases the GIL during calls, so these
+    functions could run in parallel threads; see :mod:`.parallel`.
+
+    libjalali asks libc for local zone offset on each conversion, which
+    calls `tzset` and may stat ``/etc/localtime`` every time.  Zone could be
+    resolved once instead, conversions then look offsets up in a table kept
+    in process:
+
+    >>> jtzcache_enable()
+    >>> jlocaltime(1385238360).tm_gmtoff
+    12600
+    >>> jtzcache_disable()
+
+    Call :func:`jtzcache_refresh` after changing ``TZ``.
+
+    Functions with ``_off`` suffix take offset of the zone, in seconds east
+    of UTC, and optionally its abbreviation from caller.  They never look at
+    ``TZ`` nor call `tzset`, so they are safe to run in parallel threads
+    while ``TZ`` changes too:
+
+    >>> j = jlocaltime_off(1385238360, -5 * 3600, 'EST')
+    >>> j.tm_mday, j.tm_hour, j.tm_min, j.tm_gmtoff, j.tm_zone
+    (2, 15, 26, -18000, 'EST')
+    >>> jmktime_off(j, -5 * 3600)
+    1385238360
+
+    Functions with ``_array`` suffix convert a whole array in one call into
+    a caller provided or new ctypes array.  Buffers, like :class:`array.array`
+    of time_t sized ints or numpy arrays, are used in place:
+
+    >>> from array import array
+    >>> stamps = array('l', (0, 1385238360))
+    >>> jtms = jlocaltime_array(stamps)
+    >>> [(j.tm_year, j.tm_mon, j.tm_mday, j.tm_hour) for j in jtms]
+    [(1348, 9, 11, 3), (1392, 8, 2, 23)]
+    >>> jmktime_array(jtms, stamps) is stamps
+    True
 """
 
 from pyjalali import _libj
-from pyjalali.types import struct_jtm, time_t, time_t_p
-from ctypes import POINTER, byref, c_char_p, create_string_buffer
+from pyjalali.types import struct_jtm, time_t, time_t_p, c_array, c_out_array
+from ctypes import POINTER, byref, c_char_p, c_int, c_long, c_size_t, \
+    c_void_p, create_string_buffer
 
-__all__ = ('jasctime', 'jctime', 'jgmtime', 'jlocaltime', 'jmktime')
+__all__ = ('jasctime', 'jctime', 'jgmtime', 'jgmtime_array', 'jlocaltime',
+           'jlocaltime_array', 'jlocaltime_off', 'jlocaltime_off_array',
+           'jmktime', 'jmktime_array', 'jmktime_off', 'jmktime_off_array',
+           'jtzcache_disable', 'jtzcache_enable', 'jtzcache_refresh')
 
+# libjalali functions, replaced by ctypes ones on first call
+_bind = _libj.binder(globals())
 
-_jasctime_r = _libj.jasctime_r
-_jasctime_r.argtypes = (POINTER(struct_jtm), c_char_p)
+# zone abbreviations given to ``_off`` functions, results point to them
+_zones = {}
+
+
+def _zone(name):
+    """Return an equal string kept alive as long as the process"""
+    return None if name is None else _zones.setdefault(name, name)
+
+
+_jasctime_r = _bind('jasctime_r', c_void_p, (POINTER(struct_jtm), c_char_p))
 def jasctime(jtm, retain_nl=False):
     """Return string representation of given time.
 
@@ -28,8 +79,7 @@ def jasctime(jtm, retain_nl=False):
     return res.value if retain_nl else res.value[:-1]
 
 
-_jctime_r = _libj.jctime_r
-_jctime_r.argtypes = (time_t_p, c_char_p)
+_jctime_r = _bind('jctime_r', c_void_p, (time_t_p, c_char_p))
 def jctime(timestamp, retain_nl=False):
     """Return string representation of time from timestamp.
 
@@ -41,8 +91,7 @@ def jctime(timestamp, retain_nl=False):
     return res.value if retain_nl else res.value[:-1]
 
 
-_jgmtime_r = _libj.jgmtime_r
-_jgmtime_r.argtypes = (time_t_p, POINTER(struct_jtm))
+_jgmtime_r = _bind('jgmtime_r', c_void_p, (time_t_p, POINTER(struct_jtm)))
 def jgmtime(timestamp):
     """Return :class:`.types.struct_jtm` from `timestamp` expressed in UTC.
     """
@@ -51,8 +100,8 @@ def jgmtime(timestamp):
     return res
 
 
-_jlocaltime_r = _libj.jlocaltime_r
-_jlocaltime_r.argtypes = (time_t_p, POINTER(struct_jtm))
+_jlocaltime_r = _bind('jlocaltime_r', c_void_p,
+                      (time_t_p, POINTER(struct_jtm)))
 def jlocaltime(timestamp):
     """Make :class:`.types.struct_jtm` from `timestamp` according to local
     zone and dst settings.
@@ -62,12 +111,129 @@ def jlocaltime(timestamp):
     return res
 
 
-_jmktime = _libj.jmktime
-_jmktime.argtypes = (POINTER(struct_jtm),)
-_jmktime.restype = time_t
+_jlocaltime_off_r = _bind('jlocaltime_off_r', c_void_p,
+                          (time_t_p, c_long, c_char_p, POINTER(struct_jtm)))
+def jlocaltime_off(timestamp, gmtoff, zone=None):
+    """Make :class:`.types.struct_jtm` from `timestamp` in a zone `gmtoff`
+    seconds east of UTC, named `zone`.  Local zone is not consulted.
+    """
+    res = struct_jtm()
+    _jlocaltime_off_r(byref(time_t(timestamp)), gmtoff, _zone(zone),
+                      byref(res))
+    return res
+
+
+_jmktime = _bind('jmktime', time_t, (POINTER(struct_jtm),))
 def jmktime(jtm):
     """Return timestamp from provided time.
 
     :param `pyjalali.types.struct_jtm` jtm
     """
     return _jmktime(byref(jtm))
+
+
+_jmktime_off = _bind('jmktime_off', time_t, (POINTER(struct_jtm), c_long))
+def jmktime_off(jtm, gmtoff):
+    """Return timestamp from provided time in a zone `gmtoff` seconds east of
+    UTC.  Local zone is not consulted.
+
+    :param `pyjalali.types.struct_jtm` jtm
+    """
+    return _jmktime_off(byref(jtm), gmtoff)
+
+
+_jgmtime_array = _bind('jgmtime_array', None,
+                       (time_t_p, POINTER(struct_jtm), c_size_t))
+def jgmtime_array(timestamps, out=None):
+    """Like :func:`jgmtime` for each item of `timestamps` in one call.
+
+    :param timestamps: ctypes array or buffer of `time_t`, or a sequence of
+        ints; buffers of floats are rejected with `TypeError`
+    :param out: writable ctypes array or buffer of
+        :class:`.types.struct_jtm` to fill, a new ctypes array is returned
+        if None
+    """
+    timestamps = c_array(timestamps, time_t)
+    res = c_out_array(out, struct_jtm, len(timestamps))
+    _jgmtime_array(timestamps, res, len(timestamps))
+    return res if out is None else out
+
+
+_jlocaltime_array = _bind('jlocaltime_array', None,
+                          (time_t_p, POINTER(struct_jtm), c_size_t))
+def jlocaltime_array(timestamps, out=None):
+    """Like :func:`jlocaltime` for each item of `timestamps` in one call.
+    Parameters are the same as :func:`jgmtime_array`.
+    """
+    timestamps = c_array(timestamps, time_t)
+    res = c_out_array(out, struct_jtm, len(timestamps))
+    _jlocaltime_array(timestamps, res, len(timestamps))
+    return res if out is None else out
+
+
+_jlocaltime_off_array = _bind('jlocaltime_off_array', None,
+                              (time_t_p, c_long, c_char_p, POINTER(struct_jtm),
+                               c_size_t))
+def jlocaltime_off_array(timestamps, gmtoff, zone=None, out=None):
+    """Like :func:`jlocaltime_off` for each item of `timestamps` in one call.
+    `timestamps` and `out` are the same as of :func:`jgmtime_array`.
+    """
+    timestamps = c_array(timestamps, time_t)
+    res = c_out_array(out, struct_jtm, len(timestamps))
+    _jlocaltime_off_array(timestamps, gmtoff, _zone(zone), res,
+                          len(timestamps))
+    return res if out is None else out
+
+
+_jmktime_array = _bind('jmktime_array', None,
+                       (POINTER(struct_jtm), time_t_p, c_size_t))
+def jmktime_array(jtms, out=None):
+    """Like :func:`jmktime` for each item of `jtms` in one call, items of a
+    writable `jtms` are normalized in place too.
+
+    :param jtms: ctypes array or buffer of :class:`.types.struct_jtm`
+    :param out: writable ctypes array or buffer of `time_t` to fill, a new
+        ctypes array is returned if None
+    """
+    jtms = c_array(jtms, struct_jtm)
+    res = c_out_array(out, time_t, len(jtms))
+    _jmktime_array(jtms, res, len(jtms))
+    return res if out is None else out
+
+
+_jmktime_off_array = _bind('jmktime_off_array', None,
+                           (POINTER(struct_jtm), c_long, time_t_p, c_size_t))
+def jmktime_off_array(jtms, gmtoff, out=None):
+    """Like :func:`jmktime_off` for each item of `jtms` in one call.
+    `jtms` and `out` are the same as of :func:`jmktime_array`.
+    """
+    jtms = c_array(jtms, struct_jtm)
+    res = c_out_array(out, time_t, len(jtms))
+    _jmktime_off_array(jtms, gmtoff, res, len(jtms))
+    return res if out is None else out
+
+
+_jtzcache_enable = _bind('jtzcache_enable', c_int, ())
+def jtzcache_enable():
+    """Resolve local zone once and use the cached offsets for following
+    conversions, see module documentation.  Does nothing if already enabled.
+    Raise `OSError` if zone couldn't be resolved.
+    """
+    if _jtzcache_enable() == -1:
+        raise OSError('Could not resolve local zone')
+
+
+_jtzcache_refresh = _bind('jtzcache_refresh', c_int, ())
+def jtzcache_refresh():
+    """Resolve local zone again, after ``TZ`` changed for example.  Enables
+    the cache if it wasn't.  Threads converting meanwhile use either zone.
+    Raise `OSError` if zone couldn't be resolved, cache is disabled then.
+    """
+    if _jtzcache_refresh() == -1:
+        raise OSError('Could not resolve local zone')
+
+
+_jtzcache_disable = _bind('jtzcache_disable', None, ())
+def jtzcache_disable():
+    """Drop zone cache, conversions ask libc on each call again."""
+    _jtzcache_disable()
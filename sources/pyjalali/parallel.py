@@ -0,0 +1,203 @@
+"""
+    pyjalali.parallel
+    ~~~~~~~~~~~~~~~~~
+
+    Bulk conversions of :mod:`.jtime` and :mod:`.jalali` ``_array``
+    functions spread over a pool of processes.  Input is copied once into
+    shared memory, workers convert slices of it in place into a shared
+    output array, so only slice bounds are sent to workers.  Results are
+    ctypes arrays in shared memory, :func:`.vector.jtm_view` gives a NumPy
+    view of them.
+
+    >>> jtms = jgmtime_array(range(0, 86400 * 1000, 86400), workers=2,
+    ...                      chunk_size=100)
+    >>> len(jtms), jtms[999].tm_year, jtms[999].tm_mon, jtms[999].tm_mday
+    (1000, 1351, 6, 4)
+    >>> list(jalali_get_diff_array(jtms, workers=2))[-3:]
+    [997, 998, 999]
+
+    Workers are forked, so zone cache state of :mod:`.jtime` is inherited.
+    First chunk is converted by the calling process before that, zone names
+    of results then point to strings resolved in this process.
+
+    libjalali is thread-safe and ctypes releases the GIL during foreign
+    calls, so with ``threads=True`` slices are converted by a pool of
+    threads instead, straight from input into output without any copy:
+
+    >>> same = jgmtime_array(range(0, 86400 * 1000, 86400), workers=4,
+    ...                      chunk_size=100, threads=True)
+    >>> [j.tm_mday for j in same] == [j.tm_mday for j in jtms]
+    True
+
+    Run ``python -m pyjalali.parallel [items]`` for a scaling benchmark.
+"""
+
+from ctypes import c_int, memmove, sizeof
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
+from multiprocessing.sharedctypes import RawArray
+
+from pyjalali import jalali, jtime
+from pyjalali.types import c_array, c_out_array, struct_jtm, time_t
+
+__all__ = ('jalali_get_date_array', 'jalali_get_diff_array', 'jgmtime_array',
+           'jlocaltime_array', 'jmktime_array')
+
+# looked up on each run, so calls are recorded by .instrument
+_functions = {
+    'jalali_get_date_array': (jalali, '_jalali_get_date_array'),
+    'jalali_get_diff_array': (jalali, '_jalali_get_diff_array'),
+    'jgmtime_array': (jtime, '_jgmtime_array'),
+    'jlocaltime_array': (jtime, '_jlocaltime_array'),
+    'jmktime_array': (jtime, '_jmktime_array'),
+}
+
+
+def _function(name):
+    module, attr = _functions[name]
+    return getattr(module, attr)
+
+# set in workers by _init
+_task = None
+
+
+def _init(name, src, dst):
+    global _task
+    _task = (_function(name), src, dst)
+
+
+def _slice(array, start, stop):
+    """ctypes array over items start to stop of array, without copy."""
+    item = array._type_
+    return (item * (stop - start)).from_buffer(array, start * sizeof(item))
+
+
+def _convert_chunk(task, bounds):
+    func, src, dst = task
+    start, stop = bounds
+    func(_slice(src, start, stop), _slice(dst, start, stop), stop - start)
+
+
+def _convert(bounds):
+    _convert_chunk(_task, bounds)
+
+
+def _run_threads(func, src, dst, chunks, workers):
+    def convert(bounds):
+        _convert_chunk((func, src, dst), bounds)
+    pool = ThreadPool(workers)
+    try:
+        pool.map(convert, chunks, 1)
+    finally:
+        pool.terminate()
+
+
+def _run(name, values, src_type, dst_type, out, workers, chunk_size,
+         threads):
+    values = c_array(values, src_type)
+    n = len(values)
+    if workers is None:
+        workers = cpu_count()
+    if workers < 1:
+        raise ValueError('workers must be positive')
+    if chunk_size is None:
+        chunk_size = max(-(-n // (workers * 4)), 1)
+    elif chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+    if workers == 1 or n <= chunk_size:
+        res = c_out_array(out, dst_type, n)
+        _function(name)(values, res, n)
+        return res if out is None else out
+    chunks = [(i, min(i + chunk_size, n)) for i in range(0, n, chunk_size)]
+    if threads:
+        res = c_out_array(out, dst_type, n)
+        _run_threads(_function(name), values, res, chunks, workers)
+        return res if out is None else out
+    src = RawArray(src_type, n)
+    memmove(src, values, n * sizeof(src_type))
+    dst = RawArray(dst_type, n)
+    # not through _task, other threads may be running too
+    _convert_chunk((_function(name), src, dst), chunks[0])
+    pool = Pool(workers, _init, (name, src, dst))
+    try:
+        pool.map(_convert, chunks[1:], 1)
+    finally:
+        pool.terminate()
+    if out is None:
+        return dst
+    memmove(c_out_array(out, dst_type, n), dst, n * sizeof(dst_type))
+    return out
+
+
+def jgmtime_array(timestamps, out=None, workers=None, chunk_size=None,
+                  threads=False):
+    """Parallel :func:`.jtime.jgmtime_array`.
+
+    :param timestamps: ctypes array or buffer of `time_t`, or a sequence of
+        ints
+    :param out: writable ctypes array or buffer of
+        :class:`.types.struct_jtm` results are copied to, or written to
+        with `threads`.  A new ctypes array is returned if None, in shared
+        memory unless `threads`.
+    :param int workers: number of processes or threads, number of CPUs by
+        default.  1 converts in calling thread.
+    :param int chunk_size: items converted by a worker at once, default
+        splits input into four chunks per worker
+    :param bool threads: use a pool of threads instead of processes
+    """
+    return _run('jgmtime_array', timestamps, time_t, struct_jtm, out,
+                workers, chunk_size, threads)
+
+
+def jlocaltime_array(timestamps, out=None, workers=None, chunk_size=None,
+                     threads=False):
+    """Parallel :func:`.jtime.jlocaltime_array`, see
+    :func:`jgmtime_array` for parameters."""
+    return _run('jlocaltime_array', timestamps, time_t, struct_jtm, out,
+                workers, chunk_size, threads)
+
+
+def jmktime_array(jtms, out=None, workers=None, chunk_size=None,
+                  threads=False):
+    """Parallel :func:`.jtime.jmktime_array`, items of `jtms` aren't
+    normalized in place when converted by processes.  See
+    :func:`jgmtime_array` for parameters."""
+    return _run('jmktime_array', jtms, struct_jtm, time_t, out, workers,
+                chunk_size, threads)
+
+
+def jalali_get_date_array(days, out=None, workers=None, chunk_size=None,
+                          threads=False):
+    """Parallel :func:`.jalali.jalali_get_date_array`, see
+    :func:`jgmtime_array` for parameters."""
+    return _run('jalali_get_date_array', days, c_int, struct_jtm, out,
+                workers, chunk_size, threads)
+
+
+def jalali_get_diff_array(jtms, out=None, workers=None, chunk_size=None,
+                          threads=False):
+    """Parallel :func:`.jalali.jalali_get_diff_array`, see
+    :func:`jgmtime_array` for parameters."""
+    return _run('jalali_get_diff_array', jtms, struct_jtm, c_int, out,
+                workers, chunk_size, threads)
+
+
+def _bench(n, repeat=3):
+    from timeit import repeat as timeit_repeat
+    from array import array
+    timestamps = array('l', range(0, n * 3607, 3607))
+    print('%d items, %d CPUs' % (n, cpu_count()))
+    for threads in (False, True):
+        for workers in range(1, max(cpu_count(), 2) + 1):
+            best = min(timeit_repeat(
+                lambda: jgmtime_array(timestamps, workers=workers,
+                                      threads=threads),
+                number=1, repeat=repeat))
+            print('%s %2d: %8.3f s %8.3f Mitems/s' % (
+                'threads  ' if threads else 'processes', workers, best,
+                n / best / 1e6))
+
+
+if __name__ == '__main__':
+    import sys
+    _bench(int(sys.argv[1]) if len(sys.argv) > 1 else 10000000)
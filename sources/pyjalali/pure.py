@@ -0,0 +1,182 @@
+"""
+    pyjalali.pure
+    ~~~~~~~~~~~~~
+
+    Jalali calendar arithmetic in pure Python.  Follows the 2820 years
+    period rules of libjalali without any ctypes round trip.  Days are
+    counted from UTC Epoch, 11 Dey 1348, like :func:`.jalali.jalali_get_diff`
+    does and months are numbered from 1.  Start days of years 1 to 9999 are
+    tabulated once at import, conversions in that range are a lookup or a
+    binary search.
+
+    >>> is_leap(1391), is_leap(1392)
+    (True, False)
+    >>> month_days(1391, 12), month_days(1392, 12)
+    (30, 29)
+    >>> days_from_date(1348, 10, 11)
+    0
+    >>> date_from_days(16032)
+    (1392, 9, 2)
+    >>> date_from_days(days_from_date(1, 1, 1))
+    (1, 1, 1)
+    >>> weekday(days_from_date(1392, 9, 2)) # Shanbeh
+    0
+"""
+
+from bisect import bisect_right
+
+__all__ = ('is_leap', 'month_days', 'days_from_date', 'date_from_days',
+           'weekday')
+
+LEAP_BASE = 475
+LEAP_PERIOD = 2820
+LAST_CYCLE_START = 2688
+NORMAL_CYCLE_LENGTH = 128
+LEAPS_IN_PERIOD = 683
+LEAPS_IN_NORMAL_CYCLE = 31
+LEAPS_EXCLUDING_LAST_CYCLE = 651
+PERIOD_LENGTH_IN_DAYS = LEAP_PERIOD * 365 + LEAPS_IN_PERIOD
+NORMAL_CYCLE_LENGTH_IN_DAYS = NORMAL_CYCLE_LENGTH * 365 + \
+    LEAPS_IN_NORMAL_CYCLE
+NORMAL_CYCLES_IN_PERIOD = 21
+
+# cycle partitions: first year, leaps before it and first day of each
+_partition_years = (0, 29, 62, 95)
+_partition_leaps = (0, 7, 15, 23)
+_partition_days = tuple(y * 365 + l for y, l in zip(_partition_years,
+                                                     _partition_leaps))
+
+month_len = (31, 31, 31, 31, 31, 31, 30, 30, 30, 30, 30, 29)
+_month_start = (0, 31, 62, 93, 124, 155, 186, 216, 246, 276, 306, 336)
+
+UTC_EPOCH_WDAY = 5
+
+# years with a precomputed start day, range of datetime.date
+TABLE_FIRST_YEAR = 1
+TABLE_LAST_YEAR = 9999
+
+
+def _count_cycle_leaps(r):
+    i = 3
+    while r < _partition_years[i]:
+        i -= 1
+    r -= _partition_years[i]
+    return _partition_leaps[i] + ((r - 1) // 4 if r > 0 else 0)
+
+
+# leap years among first n years of a cycle, for n in 0..132
+_cycle_leaps = tuple(_count_cycle_leaps(n) for n in range(133))
+
+
+def _cycle_position(year):
+    """Position of year in its 128 or 132 years long cycle."""
+    pr = (year - LEAP_BASE) % LEAP_PERIOD
+    if pr > LAST_CYCLE_START:
+        return pr - LAST_CYCLE_START
+    return pr % NORMAL_CYCLE_LENGTH
+
+
+def is_leap(year):
+    """Return True if given year is leap year else False."""
+    if TABLE_FIRST_YEAR <= year <= TABLE_LAST_YEAR:
+        i = year - TABLE_FIRST_YEAR
+        return _year_table[i + 1] - _year_table[i] == 366
+    r = _cycle_position(year)
+    return _cycle_leaps[r + 1] != _cycle_leaps[r]
+
+
+def month_days(year, month):
+    """Return number of days in provided month (1-12) of year."""
+    if month == 12 and is_leap(year):
+        return 30
+    return month_len[month - 1]
+
+
+def _year_start(year):
+    """Days from Farvardin 1st of AP 475 to Farvardin 1st of year."""
+    y = year - LEAP_BASE
+    q, pr = divmod(y, LEAP_PERIOD)
+    if pr > LAST_CYCLE_START:
+        l = LEAPS_EXCLUDING_LAST_CYCLE + _cycle_leaps[pr - LAST_CYCLE_START]
+    else:
+        c, r = divmod(pr, NORMAL_CYCLE_LENGTH)
+        l = c * LEAPS_IN_NORMAL_CYCLE + _cycle_leaps[r]
+    return y * 365 + q * LEAPS_IN_PERIOD + l
+
+
+def _year_from_days(d):
+    """Inverse of :func:`_year_start`, return year and zero based day of
+    year."""
+    q, d = divmod(d, PERIOD_LENGTH_IN_DAYS)
+    y = q * LEAP_PERIOD
+    c = min(d // NORMAL_CYCLE_LENGTH_IN_DAYS, NORMAL_CYCLES_IN_PERIOD)
+    y += c * NORMAL_CYCLE_LENGTH
+    d -= c * NORMAL_CYCLE_LENGTH_IN_DAYS
+    i = 3
+    while d < _partition_days[i]:
+        i -= 1
+    y += _partition_years[i]
+    d -= _partition_days[i]
+    # year 0 of a partition is ordinary, then four years groups ending with
+    # a leap year
+    if d >= 365:
+        g, d = divmod(d - 365, 1461)
+        k = min(d // 365, 3)
+        y += 1 + g * 4 + k
+        d -= k * 365
+    return y + LEAP_BASE, d
+
+
+_EPOCH = _year_start(1348) + 286
+
+
+def _make_year_table():
+    """Farvardin 1st of years TABLE_FIRST_YEAR to TABLE_LAST_YEAR + 1 as
+    days since UTC Epoch."""
+    # lengths of years of a whole period, from LEAP_BASE on
+    leaps = [_cycle_leaps[r + 1] - _cycle_leaps[r] for r in range(132)]
+    lengths = [365 + leaps[pr - LAST_CYCLE_START if pr > LAST_CYCLE_START
+                           else pr % NORMAL_CYCLE_LENGTH]
+               for pr in range(LEAP_PERIOD)]
+    start = _year_start(TABLE_FIRST_YEAR) - _EPOCH
+    table = [start]
+    append = table.append
+    for year in range(TABLE_FIRST_YEAR, TABLE_LAST_YEAR + 1):
+        start += lengths[(year - LEAP_BASE) % LEAP_PERIOD]
+        append(start)
+    return table
+
+
+_year_table = _make_year_table()
+
+
+def days_from_date(year, month, day):
+    """Return number of days passed since UTC Epoch for given date."""
+    if TABLE_FIRST_YEAR <= year <= TABLE_LAST_YEAR:
+        start = _year_table[year - TABLE_FIRST_YEAR]
+    else:
+        start = _year_start(year) - _EPOCH
+    return start + _month_start[month - 1] + day - 1
+
+
+def date_from_days(days):
+    """Return (year, month, day) tuple from number of days passed since UTC
+    Epoch."""
+    if _year_table[0] <= days < _year_table[-1]:
+        i = bisect_right(_year_table, days) - 1
+        year = i + TABLE_FIRST_YEAR
+        yday = days - _year_table[i]
+    else:
+        year, yday = _year_from_days(days + _EPOCH)
+    if yday < 186:
+        month, day = divmod(yday, 31)
+    else:
+        month, day = divmod(yday - 186, 30)
+        month += 6
+    return year, month + 1, day + 1
+
+
+def weekday(days):
+    """Return day of week, where Shanbeh is 0, from number of days passed
+    since UTC Epoch."""
+    return (days + UTC_EPOCH_WDAY) % 7
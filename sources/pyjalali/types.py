@@ -5,7 +5,7 @@
     Core C types for libjalali binding.
 """
 
-from ctypes import POINTER, Structure, c_char_p, c_int, c_long
+from ctypes import Array, POINTER, Structure, c_char_p, c_int, c_long, sizeof
 from time import struct_time
 
 class struct_ab_jtm(Structure):
@@ -58,8 +58,95 @@ class struct_jyinfo(Structure):
                 ('apl', c_int))
 
 
-time_t = c_int
-time_t_p = POINTER(c_int)
+time_t = c_long
+time_t_p = POINTER(time_t)
+
+
+def _item_type(obj):
+    """Kind of items of buffer `obj`: ``'i'`` or ``'u'`` for signed or
+    unsigned integers, tuple of field names for numpy records, other
+    strings for anything else."""
+    dtype = getattr(obj, 'dtype', None)
+    if dtype is not None:
+        return dtype.names or dtype.kind
+    code = getattr(obj, 'typecode', None) or getattr(obj, 'format', '')
+    code = code[-1:]
+    if code and code in 'bhilq':
+        return 'i'
+    if code and code in 'BHILQ':
+        return 'u'
+    return code or '?'
+
+
+def _check_item_type(obj, ctype):
+    """Raise `TypeError` unless items of buffer `obj` are of `ctype`,
+    integers of any signedness for integer types, records with the same
+    field names for structures."""
+    kind = _item_type(obj)
+    if issubclass(ctype, Structure):
+        if kind == tuple(name for name, _ in ctype._fields_):
+            return
+    elif kind in ('i', 'u'):
+        return
+    raise TypeError('buffer of %s expected, got items of type %r' %
+                    (ctype.__name__, kind))
+
+
+def c_array(obj, ctype, writable=False):
+    """Return ctypes array of `ctype` items over memory of `obj`.
+
+    ctypes arrays of `ctype` are returned as is.  Objects with an `itemsize`
+    attribute, like :class:`array.array` or numpy arrays, are taken as
+    buffers holding ``len(obj)`` items and shared without copying; read-only
+    buffers are copied once.  Their items must be integers of the size of
+    `ctype`, or numpy records with the fields of a `ctype` structure, else
+    `TypeError` is raised.  Other sequences are copied item by item.  If
+    `writable` is True, raise `TypeError` instead of making a copy.
+
+    >>> from array import array
+    >>> a = array('i', (1, 2, 3))
+    >>> c_array(a, c_int)[1] = 5
+    >>> a
+    array('i', [1, 5, 3])
+    >>> list(c_array((4, 5), c_int))
+    [4, 5]
+    >>> c_array(array('f', (1.5,)), c_int)
+    Traceback (most recent call last):
+    ...
+    TypeError: buffer of c_int expected, got items of type 'f'
+    """
+    if isinstance(obj, Array) and obj._type_ is ctype:
+        return obj
+    itemsize = getattr(obj, 'itemsize', None)
+    if itemsize is None:
+        if writable:
+            raise TypeError('writable buffer of %s expected' %
+                            ctype.__name__)
+        return (ctype * len(obj))(*obj)
+    if itemsize != sizeof(ctype):
+        raise TypeError('items of %d bytes expected, got %d' %
+                        (sizeof(ctype), itemsize))
+    _check_item_type(obj, ctype)
+    array_type = ctype * len(obj)
+    try:
+        return array_type.from_buffer(obj)
+    except TypeError:
+        if writable:
+            raise
+        return array_type.from_buffer_copy(obj)
+
+
+def c_out_array(out, ctype, n):
+    """Return writable ctypes array of at least `n` items of `ctype` over
+    `out`, or a new array if `out` is None.  Raise `ValueError` if `out` is
+    too short.
+    """
+    if out is None:
+        return (ctype * n)()
+    res = c_array(out, ctype, writable=True)
+    if len(res) < n:
+        raise ValueError('room for %d items needed, got %d' % (n, len(res)))
+    return res
 
 def jtm_to_struct_time(src_jtm):
     """Make :class:`time.struct_time` from broken-down jalali time
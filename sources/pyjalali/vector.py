@@ -0,0 +1,331 @@
+"""
+    pyjalali.vector
+    ~~~~~~~~~~~~~~~
+
+    Bulk conversion between UTC timestamps (or days since UTC Epoch) and
+    Jalali dates on NumPy arrays.  Calendar arithmetic of :mod:`.pure` is
+    carried out on whole arrays at once, so there is no per element Python
+    object or ctypes call.  Requires NumPy.
+
+    Months are numbered from 1, day of year from 1 and day of week from 0
+    being Shanbeh, like :meth:`.datetime.datetime.timetuple` does.
+
+    >>> import numpy as np
+    >>> year, month, day, wday, yday = jalali_from_days([0, 16032, -1])
+    >>> year, month, day
+    (array([1348, 1392, 1348]), array([10,  9, 10]), array([11,  2, 10]))
+    >>> wday, yday
+    (array([5, 0, 4]), array([287, 248, 286]))
+    >>> days_from_jalali(year, month, day)
+    array([    0, 16032,    -1])
+
+    Timestamps, optionally shifted by a fixed UTC offset in seconds:
+
+    >>> jalali_from_timestamps([1385238360], gmtoff=12600, structured=True)
+    ... # doctest: +NORMALIZE_WHITESPACE
+    array([(1392, 9, 2, 23, 56, 0, 0, 248)],
+          dtype=[('year', '<i4'), ('month', '<i4'), ('day', '<i4'),
+                 ('hour', '<i4'), ('minute', '<i4'), ('second', '<i4'),
+                 ('wday', '<i4'), ('yday', '<i4')])
+    >>> timestamps_from_jalali(1392, 9, 2, 23, 56, 0, gmtoff=12600)
+    1385238360
+
+    Gregorian dates as :class:`numpy.datetime64`:
+
+    >>> g = np.array(['2013-11-23', '1900-01-01'], dtype='datetime64[D]')
+    >>> jalali_from_datetime64(g)[:3]
+    (array([1392, 1278]), array([ 9, 10]), array([ 2, 11]))
+    >>> datetime64_from_jalali([1392, 1278], [9, 10], [2, 11], unit='D')
+    array(['2013-11-23', '1900-01-01'], dtype='datetime64[D]')
+
+    Results match :mod:`.pure` element by element:
+
+    >>> from pyjalali import pure
+    >>> days = np.arange(-800000, 3200000, 97)
+    >>> y, m, d = jalali_from_days(days)[:3]
+    >>> [pure.date_from_days(x) for x in days[::50]] == \\
+    ...     list(zip(y[::50], m[::50], d[::50]))
+    True
+    >>> (days_from_jalali(y, m, d) == days).all()
+    True
+
+    Arrays of :class:`.types.struct_jtm`, filled by the ``_array``
+    functions of :mod:`.jtime` and :mod:`.jalali` for example, are viewed as
+    :data:`jtm_dtype` records and back without copying:
+
+    >>> from pyjalali.jtime import jgmtime_array
+    >>> jtms = jgmtime_array([0, 1385238360])
+    >>> a = jtm_view(jtms)
+    >>> a['tm_year'].tolist(), a['tm_mon'].tolist()
+    ([1348, 1392], [9, 8])
+    >>> a['tm_mday'] += 1
+    >>> jtms[0].tm_mday
+    12
+    >>> struct_jtm_view(a[1:])[0].tm_mday
+    3
+
+    Arrays are shared only if their items are of the expected type:
+
+    >>> jgmtime_array(np.array([1385238360.0]))
+    Traceback (most recent call last):
+    ...
+    TypeError: buffer of c_long expected, got items of type 'f'
+"""
+
+from ctypes import c_char_p, c_void_p, sizeof
+
+import numpy as np
+
+from pyjalali import pure
+from pyjalali.types import c_array, struct_jtm
+
+__all__ = ('jalali_from_days', 'jalali_from_timestamps',
+           'jalali_from_datetime64', 'days_from_jalali',
+           'timestamps_from_jalali', 'datetime64_from_jalali', 'date_dtype',
+           'datetime_dtype', 'jtm_dtype', 'jtm_view', 'struct_jtm_view')
+
+date_dtype = np.dtype([('year', 'i4'), ('month', 'i4'), ('day', 'i4'),
+                       ('wday', 'i4'), ('yday', 'i4')])
+"""Structured dtype returned by :func:`jalali_from_days`."""
+
+datetime_dtype = np.dtype([('year', 'i4'), ('month', 'i4'), ('day', 'i4'),
+                           ('hour', 'i4'), ('minute', 'i4'),
+                           ('second', 'i4'), ('wday', 'i4'), ('yday', 'i4')])
+"""Structured dtype returned by :func:`jalali_from_timestamps`."""
+
+
+def _jtm_dtype():
+    names, formats, offsets = [], [], []
+    for name, ctype in struct_jtm._fields_:
+        names.append(name)
+        # zone names are kept as raw pointers
+        formats.append(np.dtype('u%d' % sizeof(c_void_p))
+                       if ctype is c_char_p else np.dtype(ctype))
+        offsets.append(getattr(struct_jtm, name).offset)
+    return np.dtype({'names': names, 'formats': formats, 'offsets': offsets,
+                     'itemsize': sizeof(struct_jtm)})
+
+jtm_dtype = _jtm_dtype()
+"""Structured dtype with the memory layout of :class:`.types.struct_jtm`,
+``tm_zone`` is an unsigned integer holding the C pointer."""
+
+_cycle_leaps = np.array(pure._cycle_leaps, dtype=np.int64)
+_partition_years = np.array(pure._partition_years, dtype=np.int64)
+_partition_days = np.array(pure._partition_days, dtype=np.int64)
+_month_start = np.array(pure._month_start, dtype=np.int64)
+_month_len = np.array(pure.month_len, dtype=np.int64)
+
+_DAY = 86400
+
+# units of datetime64_from_jalali() besides 'D'
+_DATETIME64_UNITS = ('h', 'm', 's', 'ms', 'us', 'ns')
+
+
+def _year_start(year):
+    y = year - pure.LEAP_BASE
+    q = y // pure.LEAP_PERIOD
+    pr = y - q * pure.LEAP_PERIOD
+    last = pr > pure.LAST_CYCLE_START
+    r = np.where(last, pr - pure.LAST_CYCLE_START,
+                 pr % pure.NORMAL_CYCLE_LENGTH)
+    l = np.where(last, pure.LEAPS_EXCLUDING_LAST_CYCLE,
+                 (pr // pure.NORMAL_CYCLE_LENGTH) *
+                 pure.LEAPS_IN_NORMAL_CYCLE)
+    return y * 365 + q * pure.LEAPS_IN_PERIOD + l + _cycle_leaps[r]
+
+
+def _year_from_days(d):
+    q = d // pure.PERIOD_LENGTH_IN_DAYS
+    d = d - q * pure.PERIOD_LENGTH_IN_DAYS
+    c = np.minimum(d // pure.NORMAL_CYCLE_LENGTH_IN_DAYS,
+                   pure.NORMAL_CYCLES_IN_PERIOD)
+    y = q * pure.LEAP_PERIOD + c * pure.NORMAL_CYCLE_LENGTH
+    d -= c * pure.NORMAL_CYCLE_LENGTH_IN_DAYS
+    i = ((d >= _partition_days[1]).astype(np.int64) +
+         (d >= _partition_days[2]) + (d >= _partition_days[3]))
+    y += _partition_years[i]
+    d -= _partition_days[i]
+    # year 0 of a partition is ordinary, then four years groups ending
+    # with a leap year
+    rest = d >= 365
+    g = (d - 365) // 1461
+    r = (d - 365) % 1461
+    k = np.minimum(r // 365, 3)
+    y += np.where(rest, 1 + g * 4 + k, 0)
+    d = np.where(rest, r - k * 365, d)
+    return y + pure.LEAP_BASE, d
+
+
+def _structured(dtype, columns):
+    res = np.empty(columns[0].shape, dtype=dtype)
+    for name, col in zip(dtype.names, columns):
+        res[name] = col
+    return res
+
+
+def jalali_from_days(days, structured=False):
+    """Convert days since UTC Epoch to Jalali dates.
+
+    :param days: array-like of integers
+    :param bool structured: return a single array of :data:`date_dtype`
+    :return: arrays ``(year, month, day, wday, yday)`` unless *structured*
+    """
+    days = np.asarray(days, dtype=np.int64)
+    year, yday = _year_from_days(days + pure._EPOCH)
+    first_half = yday < 186
+    month = np.where(first_half, yday // 31, 6 + (yday - 186) // 30)
+    day = np.where(first_half, yday % 31, (yday - 186) % 30)
+    wday = (days + pure.UTC_EPOCH_WDAY) % 7
+    columns = (year, month + 1, day + 1, wday, yday + 1)
+    if structured:
+        return _structured(date_dtype, columns)
+    return columns
+
+
+def jalali_from_timestamps(timestamps, gmtoff=0, structured=False):
+    """Convert POSIX timestamps to broken-down Jalali date and time.
+
+    :param timestamps: array-like of seconds since UTC Epoch, fractions are
+        floored so a negative one falls in the previous second
+    :param gmtoff: seconds east of UTC, scalar or array-like, added before
+        conversion
+    :param bool structured: return a single array of :data:`datetime_dtype`
+    :return: arrays ``(year, month, day, hour, minute, second, wday,
+        yday)`` unless *structured*
+
+    >>> jalali_from_timestamps([-0.5], gmtoff=12600)[:6]
+    ... # doctest: +NORMALIZE_WHITESPACE
+    (array([1348]), array([10]), array([11]), array([3]), array([29]),
+     array([59]))
+    """
+    timestamps = np.asarray(timestamps)
+    if timestamps.dtype.kind == 'f':
+        finite = np.isfinite(timestamps)
+        if not finite.all():
+            raise ValueError('timestamp is not finite at index %d'
+                             % np.flatnonzero(~finite)[0])
+        timestamps = np.floor(timestamps)
+    secs = timestamps.astype(np.int64) + np.asarray(gmtoff, np.int64)
+    days = secs // _DAY
+    sod = secs - days * _DAY
+    year, month, day, wday, yday = jalali_from_days(days)
+    hour = sod // 3600
+    minute = sod % 3600 // 60
+    second = sod % 60
+    if structured:
+        return _structured(datetime_dtype, (year, month, day, hour, minute,
+                                            second, wday, yday))
+    return year, month, day, hour, minute, second, wday, yday
+
+
+def jalali_from_datetime64(values, structured=False):
+    """Convert Gregorian :class:`numpy.datetime64` values, taken as UTC, to
+    Jalali.  Dates without time part (unit ``D`` or coarser) are converted
+    by :func:`jalali_from_days`, others by :func:`jalali_from_timestamps`.
+    `ValueError` is raised for NaT:
+
+    >>> jalali_from_datetime64(np.array(['2013-11-23', 'NaT'], 'M8[D]'))
+    Traceback (most recent call last):
+    ...
+    ValueError: NaT at index 1
+    """
+    values = np.asarray(values)
+    if values.dtype.kind != 'M':
+        raise TypeError('Expected datetime64 array, not %s' % values.dtype)
+    nat = np.isnat(values)
+    if nat.any():
+        raise ValueError('NaT at index %d' % np.flatnonzero(nat)[0])
+    unit = np.datetime_data(values.dtype)[0]
+    if unit in ('Y', 'M', 'W', 'D'):
+        return jalali_from_days(values.astype('datetime64[D]').astype(
+            np.int64), structured)
+    return jalali_from_timestamps(values.astype('datetime64[s]').astype(
+        np.int64), 0, structured)
+
+
+def _check_date(year, month, day, start):
+    bad = (month < 1) | (month > 12)
+    if bad.any():
+        raise ValueError('month value out of range [1, 12] at index %d'
+                         % np.flatnonzero(bad)[0])
+    # Esfand of leap years has 30 days
+    leap = (_year_start(year + 1) - start) == 366
+    length = _month_len[month - 1] + ((month == 12) & leap)
+    bad = (day < 1) | (day > length)
+    if bad.any():
+        raise ValueError('day is out of range for month at index %d'
+                         % np.flatnonzero(bad)[0])
+
+
+def days_from_jalali(year, month, day):
+    """Return number of days since UTC Epoch for Jalali dates given as
+    array-likes of year, month (1-12) and day.  `ValueError` names the
+    first invalid date:
+
+    >>> days_from_jalali([1392, 1392], [12, 0], [1, 1])
+    Traceback (most recent call last):
+    ...
+    ValueError: month value out of range [1, 12] at index 1
+    >>> days_from_jalali(1392, 13, 1)
+    Traceback (most recent call last):
+    ...
+    ValueError: month value out of range [1, 12] at index 0
+    >>> days_from_jalali([1391, 1392, 1392], [12, 12, 1], [30, 30, 40])
+    Traceback (most recent call last):
+    ...
+    ValueError: day is out of range for month at index 1
+    """
+    year, month, day = np.broadcast_arrays(np.asarray(year, dtype=np.int64),
+                                           np.asarray(month, dtype=np.int64),
+                                           np.asarray(day, dtype=np.int64))
+    start = _year_start(year)
+    _check_date(year, month, day, start)
+    return start + _month_start[month - 1] + day - 1 - pure._EPOCH
+
+
+def timestamps_from_jalali(year, month, day, hour=0, minute=0, second=0,
+                           gmtoff=0):
+    """Return POSIX timestamps from broken-down Jalali date and time.
+    *gmtoff* is seconds east of UTC, the local time is in."""
+    return (days_from_jalali(year, month, day) * _DAY +
+            np.asarray(hour, np.int64) * 3600 +
+            np.asarray(minute, np.int64) * 60 + np.asarray(second, np.int64) -
+            np.asarray(gmtoff, np.int64))
+
+
+def datetime64_from_jalali(year, month, day, hour=0, minute=0, second=0,
+                           unit='s'):
+    """Return Gregorian :class:`numpy.datetime64` values for Jalali dates
+    and times.
+
+    :param string unit: ``'D'`` for dates only, ``'h'``, ``'m'`` or ``'s'``
+        for times truncated to hours, minutes or seconds, ``'ms'``, ``'us'``
+        or ``'ns'`` for finer units; `ValueError` is raised for others
+
+    >>> datetime64_from_jalali(1392, 9, 2, 23, 56, unit='ms')
+    numpy.datetime64('2013-11-23T23:56:00.000')
+    """
+    if unit == 'D':
+        return days_from_jalali(year, month, day).astype('datetime64[D]')
+    if unit not in _DATETIME64_UNITS:
+        raise ValueError('unsupported datetime64 unit %r' % (unit,))
+    return timestamps_from_jalali(year, month, day, hour, minute,
+                                  second).astype('datetime64[s]').astype(
+                                      'datetime64[%s]' % unit)
+
+
+def jtm_view(jtms):
+    """Return array of :data:`jtm_dtype` sharing memory with `jtms`, a
+    ctypes array of :class:`.types.struct_jtm`."""
+    if getattr(jtms, '_type_', None) is not struct_jtm:
+        raise TypeError('ctypes array of struct_jtm expected')
+    return np.frombuffer(jtms, dtype=jtm_dtype)
+
+
+def struct_jtm_view(array):
+    """Return ctypes array of :class:`.types.struct_jtm` sharing memory
+    with `array`, a contiguous one dimensional array of :data:`jtm_dtype`.
+    """
+    if array.dtype != jtm_dtype or array.ndim != 1:
+        raise TypeError('one dimensional array of jtm_dtype expected')
+    return c_array(array, struct_jtm, writable=True)
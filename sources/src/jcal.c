@@ -19,6 +19,7 @@
  */
 
 #include <stdio.h>
+#include <ctype.h>
 #include <string.h>
 #include <stdlib.h>
 #include <unistd.h>
@@ -64,18 +65,13 @@ void set_cal_matrix(struct cal_layout* l,
                     int prefix)
 {
     struct jtm mb;
-    struct jtm lt;
-
-    time_t t;
+    struct jtm* lt = &l->today;
 
     int diff;
     int _prefix = prefix * (7 + l->margin);
     int m, c;
     int i, j;
 
-    time(&t);
-    jlocaltime_r(&t, &lt);
-
     memcpy(&mb, ct, sizeof(struct jtm));
 
     diff = (mb.tm_mday - 1) % 7;
@@ -92,8 +88,8 @@ void set_cal_matrix(struct cal_layout* l,
     j = mb.tm_wday;
     for (i=0,c=0; i<=mat->height && c < m; i++) {
         for (; j<=6 && c < m; j++) {
-            if ((mb.tm_year == lt.tm_year) && (mb.tm_mon == lt.tm_mon)
-                && (mb.tm_mday + c == lt.tm_mday)) {
+            if ((mb.tm_year == lt->tm_year) && (mb.tm_mon == lt->tm_mon)
+                && (mb.tm_mday + c == lt->tm_mday)) {
                 mat->m[i][j+_prefix] = (l->julian) ? 1000 + mb.tm_yday + c + 1 :
                     1000 + mb.tm_mday + c;
             } else {
@@ -474,7 +470,23 @@ void show_1(struct cal_layout* l, struct jtm* j)
 
 void show_year(struct cal_layout* l, struct jtm* j)
 {
-    struct jtm _j[4] = {{0}};
+    show_years(l, j->tm_year, j->tm_year);
+}
+
+
+/*
+ * Displays whole year calendars of years from to to (inclusive) on
+ * standard screen, one after another.
+ * Weekday of first day of each month is carried over from previous month,
+ * so only Farvardin 1 of first year is converted.
+ */
+
+void show_years(struct cal_layout* l, int from, int to)
+{
+    struct jtm _j[3] = {{0}};
+    struct jtm* _p[3] = {&_j[0], &_j[1], &_j[2]};
+    struct jtm fb = {0};
+    struct cal_matrix m;
 
     char title[100];
     char buf[100];
@@ -483,52 +495,49 @@ void show_year(struct cal_layout* l, struct jtm* j)
         (2 * l->margin);
 
     int cal_tw;
-    int i;
+    int wday;
+    int y, i, k;
 
-    if (l->farsi) {
-        jalali_to_farsi(buf, 100, 0, " ", j->tm_year + ((l->pahlavi) ?
-                                                 PAHLAVI_ISLAMIC_DIFF : 0));
-    } else {
-        snprintf(buf, 100, "%d", j->tm_year + ((l->pahlavi) ?
-                                                 PAHLAVI_ISLAMIC_DIFF : 0));
-    }
+    fb.tm_year = from;
+    fb.tm_mon = 0;
+    fb.tm_mday = 1;
+    jalali_update(&fb);
+    wday = fb.tm_wday;
 
-    snprintf(title, 100, "%s%s", buf,
-             (l->pahlavi) ? (l->farsi ? " پهلوی" : " (Pahlavi)") : "");
+    l->syear = 0;
+    m.n = 3;
 
-    cal_tw = (cal_width - strlen(title)) / 2;
+    for (y=from; y<=to; y++) {
+        if (l->farsi) {
+            jalali_to_farsi(buf, 100, 0, " ", y + ((l->pahlavi) ?
+                                                   PAHLAVI_ISLAMIC_DIFF : 0));
+        } else {
+            snprintf(buf, 100, "%d", y + ((l->pahlavi) ?
+                                          PAHLAVI_ISLAMIC_DIFF : 0));
+        }
 
-    for (i=0; i<cal_tw; i++) {
-        printf(" ");
-    }
-    printf("%s\n\n", title);
+        snprintf(title, 100, "%s%s", buf,
+                 (l->pahlavi) ? (l->farsi ? " پهلوی" : " (Pahlavi)") : "");
 
-    l->syear = 0;
+        cal_tw = (cal_width - strlen(title)) / 2;
 
-    _j[0].tm_year = j->tm_year;
-    _j[0].tm_mon = 1;
-    _j[0].tm_mday = 1;
-    jalali_update(&_j[0]);
-
-    _j[1].tm_year = j->tm_year;
-    _j[1].tm_mon = 4;
-    _j[1].tm_mday = 1;
-    jalali_update(&_j[1]);
-
-    _j[2].tm_year = j->tm_year;
-    _j[2].tm_mon = 7;
-    _j[2].tm_mday = 1;
-    jalali_update(&_j[2]);
-
-    _j[3].tm_year = j->tm_year;
-    _j[3].tm_mon = 10;
-    _j[3].tm_mday = 1;
-    jalali_update(&_j[3]);
-
-    show_3(l, &_j[0]);
-    show_3(l, &_j[1]);
-    show_3(l, &_j[2]);
-    show_3(l, &_j[3]);
+        for (i=0; i<cal_tw; i++) {
+            printf(" ");
+        }
+        printf("%s\n\n", title);
+
+        for (i=0; i<12; i+=3) {
+            for (k=0; k<3; k++) {
+                _j[k].tm_year = y;
+                _j[k].tm_mon = i + k;
+                _j[k].tm_mday = 1;
+                _j[k].tm_wday = wday;
+                wday = (wday + ((jalali_is_jleap(y) && i + k == 11) ? 30 :
+                                jalali_month_len[i + k])) % 7;
+            }
+            show_cal(l, &m, _p);
+        }
+    }
 }
 
 int main(int argc, char** argv)
@@ -539,7 +548,11 @@ int main(int argc, char** argv)
 
     int opt;
     int i, c = 0;
+    int layout = 0;
     int def_date[3];
+    int range[2] = {0, 0};
+    int from, to;
+    char ch;
     void (*show) (struct cal_layout*, struct jtm*);
 
     show = &show_1;
@@ -557,11 +570,28 @@ int main(int argc, char** argv)
     l.julian = 0;
     l.english = 0;
     l.margin = 3;
+    memcpy(&l.today, &j, sizeof(struct jtm));
 
-    /* Parsing date values. (YYYY MM DD) */
+    /* Parsing date values. (YYYY MM DD) or year range (YYYY-YYYY) */
     for (i=1; i<argc && c<3; i++) {
+        if (isdigit((unsigned char) argv[i][0]) && strchr(argv[i], '-')) {
+            if (sscanf(argv[i], "%d-%d%c", &from, &to, &ch) != 2 ||
+                from < 1 || to < from || to > JCAL_MAX_YEAR ||
+                range[0] || c) {
+                printf("%s: illegal year range: use YYYY-YYYY\n", argv[0]);
+                exit(EXIT_FAILURE);
+            }
+            range[0] = from;
+            range[1] = to;
+            continue;
+        }
+
         opt = atoi(argv[i]);
         if (opt > 0) {
+            if (range[0]) {
+                printf("%s: illegal year range: use YYYY-YYYY\n", argv[0]);
+                exit(EXIT_FAILURE);
+            }
             def_date[2 - c] = opt;
             c++;
         }
@@ -614,6 +644,7 @@ int main(int argc, char** argv)
 
             /* Display one-month calendar for a given date. */
         case '1':
+            layout = 1;
             show = &show_1;
             break;
 
@@ -622,11 +653,13 @@ int main(int argc, char** argv)
              * for the given date.
              */
         case '3':
+            layout = 1;
             l.syear = 1;
             show = &show_3;
             break;
             /* Whole-year calendar for a given date. */
         case 'y':
+            layout = 1;
             show = &show_year;
             break;
 
@@ -645,11 +678,23 @@ int main(int argc, char** argv)
 
             /* Unknown parameter. */
         default:
-            printf("usage: jcal [-13jypPV] [year [month[day]]]\n");
+            printf("usage: jcal [-13jypPV] [year [month[day]]] "
+                   "[year-year]\n");
             exit(EXIT_FAILURE);
         }
     }
 
-    show(&l, &j);
+    /* A range is a layout of its own. */
+    if (range[0] && layout) {
+        printf("%s: illegal year range: use YYYY-YYYY\n", argv[0]);
+        exit(EXIT_FAILURE);
+    }
+
+    setvbuf(stdout, 0, _IOFBF, JCAL_OUTPUT_BUF_SIZE);
+
+    if (range[0])
+        show_years(&l, range[0], range[1]);
+    else
+        show(&l, &j);
     exit(EXIT_SUCCESS);
 }
@@ -29,6 +29,9 @@
 
 #define JCAL_VERSION "0.4.1"
 
+#define JCAL_OUTPUT_BUF_SIZE 65536
+#define JCAL_MAX_YEAR 9999 /* Last year of a range. */
+
 struct cal_layout {
     int color;      /* If enabled, drawer tries to colorize output. */
     int julian;     /* Displays julian days (1-366) instead of month days. */
@@ -37,6 +40,7 @@ struct cal_layout {
     int farsi;      /* Use Farsi utf8 names and numbers. */
     int margin;     /* Marginal space between two cals. */
     int syear;      /* If enabled, jcal shows year above cals. */
+    struct jtm today; /* Local date, highlighted in cals. */
 };
 
 struct cal_matrix {
@@ -71,4 +75,6 @@ void show_1(struct cal_layout* l, struct jtm* j);
 
 void show_year(struct cal_layout* l, struct jtm* j);
 
+void show_years(struct cal_layout* l, int from, int to);
+
 #endif /* JCAL_H */
@@ -58,12 +58,153 @@ int mod_time(const char* path, time_t* t, int a)
     return 0;
 }
 
+/*
+ * Formats t into buf as requested by action, in gregorian calendar when
+ * converting to it, as set by -G in --file mode and by -g otherwise.
+ * Returns number of bytes written, see jstrftime().
+ */
+
+size_t format_time(const struct jdate_action* action, time_t t, char* buf,
+                   size_t max)
+{
+    struct jtm j;
+    struct tm g;
+    const char* jformat;
+    const char* gformat;
+    int gregorian;
+
+    gregorian = action->file ? action->file_gregorian : action->gregorian;
+
+    if (action->rfc2822) {
+        jformat = "%h, %d %b %Y %H:%M:%S %z";
+        gformat = "%a, %d %b %Y %H:%M:%S %z";
+    } else if (action->format) {
+        jformat = action->format_ptr;
+        gformat = action->format_ptr;
+    } else {
+        jformat = "%h %b %d %H:%M:%S %Z %Y";
+        gformat = "%a %b %d %H:%M:%S %Z %Y";
+    }
+
+    if (!gregorian) {
+        action->utc ? jgmtime_r(&t, &j) : jlocaltime_r(&t, &j);
+        return jstrftime(buf, max, jformat, &j);
+    }
+
+    action->utc ? gmtime_r(&t, &g) : localtime_r(&t, &g);
+    return strftime(buf, max, gformat, &g);
+}
+
+/*
+ * Parses a line of --file input into t, a gregorian or jalali date at
+ * midnight or a timestamp depending on action.
+ * Returns 0 on success, -1 on errors.
+ */
+
+int parse_line(const struct jdate_action* action, const char* line,
+               time_t* t)
+{
+    struct jtm j;
+    struct tm g;
+    char* end;
+
+    if (action->file_jalali) {
+        memset(&g, 0, sizeof(struct tm));
+        if (!strptime(line, "%Y/%m/%d", &g))
+            return -1;
+
+        g.tm_isdst = -1;
+        *t = mktime(&g);
+    } else if (action->file_gregorian) {
+        memset(&j, 0, sizeof(struct jtm));
+        if (!jstrptime(line, "%Y/%m/%d", &j))
+            return -1;
+
+        jalali_update(&j);
+        j.tm_hour = 0;
+        j.tm_min = 0;
+        j.tm_sec = 0;
+
+        *t = jmktime(&j);
+    } else {
+        if (*line == '@')
+            line++;
+
+        *t = (time_t) strtoll(line, &end, 10);
+        if (end == line || *end)
+            return -1;
+    }
+
+    return 0;
+}
+
+/*
+ * Converts each line of the file given by action and writes one result
+ * per line through a single buffered stdout. Zone is resolved once for
+ * the whole file. Blank lines are skipped, lines longer than MAX_BUF_SIZE
+ * are reported once as errors. Returns number of lines that couldn't be
+ * parsed, -1 if the file couldn't be opened.
+ */
+
+long convert_file(const struct jdate_action* action)
+{
+    FILE* in;
+    char line[MAX_BUF_SIZE];
+    char buf[MAX_BUF_SIZE];
+    long n = 0, bad = 0;
+    size_t len;
+    time_t t;
+    int c;
+
+    in = strcmp(action->file_ptr, "-") ? fopen(action->file_ptr, "r") : stdin;
+    if (!in)
+        return -1;
+
+    setvbuf(stdout, 0, _IOFBF, JDATE_OUTPUT_BUF_SIZE);
+    jtzcache_enable();
+
+    while (fgets(line, MAX_BUF_SIZE, in)) {
+        n++;
+        len = strlen(line);
+        if (len == MAX_BUF_SIZE - 1 && line[len-1] != '\n') {
+            while ((c = getc(in)) != EOF && c != '\n')
+                ;
+            fprintf(stderr, "jdate: line %ld: line too long\n", n);
+            bad++;
+            continue;
+        }
+
+        while (len > 0 && (line[len-1] == '\n' || line[len-1] == '\r' ||
+                           line[len-1] == ' ' || line[len-1] == '\t'))
+            line[--len] = 0;
+
+        if (len == 0)
+            continue;
+
+        if (parse_line(action, line, &t)) {
+            fprintf(stderr, "jdate: line %ld: invalid input '%s'\n", n, line);
+            bad++;
+            continue;
+        }
+
+        format_time(action, t, buf, MAX_BUF_SIZE);
+        fputs(buf, stdout);
+        putchar('\n');
+    }
+
+    if (in != stdin)
+        fclose(in);
+
+    return bad;
+}
+
 int main(int argc, char** argv)
 {
     int opt;
     int i;
     int err;
     int option_index;
+    long bad;
 
     char buf[MAX_BUF_SIZE];
     char date_format[MAX_BUF_SIZE];
@@ -83,6 +224,9 @@ int main(int argc, char** argv)
         {UTC_OPT, 0, 0, 'u'},
         {JALALI_OPT, 1, 0, 'j'},
         {GREGORIAN_OPT, 1, 0, 'g'},
+        {FILE_OPT, 1, 0, 'f'},
+        {FILE_JALALI_OPT, 0, 0, 'J'},
+        {FILE_GREGORIAN_OPT, 0, 0, 'G'},
         {UNIVERSAL_OPT, 0, 0, 'u'},
         {HELP_OPT, 0, 0, 'h'},
         {VERSION_OPT, 0, 0, 'V'},
@@ -129,6 +273,24 @@ int main(int argc, char** argv)
             action.jalali_ptr = optarg;
             break;
 
+            /* convert each line of a file, or stdin. */
+        case 'f':
+            action.file = 1;
+            action.file_ptr = optarg;
+            break;
+
+            /* lines of file are gregorian dates to convert to jalali. */
+        case 'J':
+            action.file_jalali = 1;
+            action.file_gregorian = 0;
+            break;
+
+            /* lines of file are jalali dates to convert to gregorian. */
+        case 'G':
+            action.file_gregorian = 1;
+            action.file_jalali = 0;
+            break;
+
             /*
              * output date and time in RFC 2822 format.
              * %h, %m %b %Y %H:%M:%S %z
@@ -167,6 +329,13 @@ int main(int argc, char** argv)
         }
     }
 
+    /* --file converts its own lines, not a date given on command line. */
+    if (action.file && (action.gregorian || action.jalali || action.date ||
+                        action.access || action.reference)) {
+        fprintf(stderr, "jdate: usage [OPTION]... [+FORMAT]\n");
+        exit(EXIT_FAILURE);
+    }
+
     /*
      * Format string handler. INPUT_FORMAT and DATE_STRING
      * are separated using a semicolon. ';'
@@ -182,6 +351,17 @@ int main(int argc, char** argv)
     /*
      *@action_handlers
      */
+    if (action.file && !action.help && !action.version) {
+        bad = convert_file(&action);
+        if (bad == -1) {
+            fprintf(stderr, "jdate: %s: No such file or directory\n",
+                    action.file_ptr);
+            exit(EXIT_FAILURE);
+        }
+
+        exit(bad ? EXIT_FAILURE : EXIT_SUCCESS);
+    }
+
     if (action.jalali) {
         if (!strptime(action.jalali_ptr, "%Y/%m/%d", &g)) {
             fprintf(stderr, "Specify gregorian date in the following format\n");
@@ -248,41 +428,8 @@ int main(int argc, char** argv)
         }
     }
 
-    if (action.rfc2822) {
-        if (!action.gregorian) {
-            action.utc ? jgmtime_r(&t, &j) : jlocaltime_r(&t, &j);
-            jstrftime(buf, MAX_BUF_SIZE, "%h, %d %b %Y %H:%M:%S %z", &j);
-        } else {
-            action.utc ? gmtime_r(&t, &g) : localtime_r(&t, &g);
-            strftime(buf, MAX_BUF_SIZE, "%a, %d %b %Y %H:%M:%S %z", &g);
-        }
-
-        printf("%s\n", buf);
-        exit(EXIT_SUCCESS);
-    }
-
-    if (action.format) {
-        if (!action.gregorian) {
-            action.utc ? jgmtime_r(&t, &j) : jlocaltime_r(&t, &j);
-            jstrftime(buf, MAX_BUF_SIZE, action.format_ptr, &j);
-        } else {
-            action.utc ? gmtime_r(&t, &g) : localtime_r(&t, &g);
-            strftime(buf, MAX_BUF_SIZE, action.format_ptr, &g);
-        }
-
-        printf("%s\n", buf);
-        exit(EXIT_SUCCESS);
-    }
-
-    if (action.normal) {
-        if (!action.gregorian) {
-            action.utc ? jgmtime_r(&t, &j) : jlocaltime_r(&t, &j);
-            jstrftime(buf, MAX_BUF_SIZE, "%h %b %d %H:%M:%S %Z %Y", &j);
-        } else {
-            action.utc ? gmtime_r(&t, &g) : localtime_r(&t, &g);
-            strftime(buf, MAX_BUF_SIZE, "%a %b %d %H:%M:%S %Z %Y", &g);
-        }
-
+    if (action.rfc2822 || action.format || action.normal) {
+        format_time(&action, t, buf, MAX_BUF_SIZE);
         printf("%s\n", buf);
         exit(EXIT_SUCCESS);
     }
@@ -24,7 +24,7 @@
 #define JDATE_VERSION "0.4.1"
 
 /* short options */
-#define JDATE_VALID_ARGS "a:r:d:j:g:RuhV"
+#define JDATE_VALID_ARGS "a:r:d:j:g:f:JGRuhV"
 
 /* long options */
 #define DATE_OPT "date"
@@ -32,12 +32,18 @@
 #define ACC_OPT "access"
 #define JALALI_OPT "jalali"
 #define GREGORIAN_OPT "gregorian"
+#define FILE_OPT "file"
+#define FILE_JALALI_OPT "file-jalali"
+#define FILE_GREGORIAN_OPT "file-gregorian"
 #define RFC2822_OPT "rfc-2822"
 #define UTC_OPT "utc"
 #define UNIVERSAL_OPT "universal"
 #define HELP_OPT "help"
 #define VERSION_OPT "version"
 
+/* stdout buffer size in --file mode */
+#define JDATE_OUTPUT_BUF_SIZE 65536
+
 /* help string */
 #define HELP_STR "Usage: jdate [arRuhV]... [+OUTPUT_FORMAT]\
 [d INPUT_FORMAT;DATE_STRING]\n\
@@ -49,6 +55,11 @@ Display the current date and time in the given FORMAT.\n\
 \n\
   -j, --jalali=%Y/%m/%d\t\tconverts a gregorian date to jalali.\n\
   -g, --gregorian=%Y/%m/%d\tconverts a jalali date to gregorian.\n\
+\n\
+  -f, --file=FILE\t\tconvert each line of FILE (- for standard input),\n\
+\t\t\t\ttimestamps in seconds since epoch by default.\n\
+  -J, --file-jalali\t\tlines are gregorian %Y/%m/%d dates, as in -j.\n\
+  -G, --file-gregorian\t\tlines are jalali %Y/%m/%d dates, as in -g.\n\
 \n\
   -R, --rfc-2822\t\toutput date and time in RFC 2822 format.\n\
 \t\t\t\tExample: Jom, 06 Khor 1390 13:44:56 -0430.\n\
@@ -121,6 +132,10 @@ struct jdate_action {
     char* jalali_ptr;     /* jalali conversion argument */
     int gregorian;        /* convert a jalali date to gregorian */
     char* gregorian_ptr;  /* gregorian conversion argument */
+    int file;             /* convert each line of a file */
+    char* file_ptr;       /* file argument, '-' for stdin */
+    int file_jalali;      /* lines are gregorian dates, convert to jalali */
+    int file_gregorian;   /* lines are jalali dates, convert to gregorian */
     int format;           /* +FORMAT. uses jstrftime() to format output */
     char* format_ptr;     /* +FORMAT argument */
     int rfc2822;          /* rfc2822 date and time: %h, %m %b %Y %H:%M:%S %z */
@@ -0,0 +1,299 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <unistd.h>
+#include "jalali.h"
+#include "jtime.h"
+
+#define SAMPLES 256
+#define FORMAT "%Y/%m/%d %H:%M:%S"
+
+/*
+ * Inputs of one year: SAMPLES consecutive days starting from Farvardin 1st,
+ * each at a different time of day.
+ */
+
+struct input {
+    int year;
+    int days;
+    time_t t[SAMPLES];
+    struct jtm jtm[SAMPLES];
+    char str[SAMPLES][64];
+};
+
+struct bench {
+    const char* name;
+    void (*run)(struct input* in, int n);
+};
+
+static volatile long sink;
+
+static void run_is_jleap(struct input* in, int n)
+{
+    long s = 0;
+    int i;
+
+    for (i=0; i<n; i++)
+        s += jalali_is_jleap(in->year + (i & 0x3f));
+    sink += s;
+}
+
+static void run_get_date(struct input* in, int n)
+{
+    struct jtm j;
+    long s = 0;
+    int i;
+
+    for (i=0; i<n; i++) {
+        jalali_get_date(in->days + (i & (SAMPLES - 1)), &j);
+        s += j.tm_mday;
+    }
+    sink += s;
+}
+
+static void run_get_diff(struct input* in, int n)
+{
+    long s = 0;
+    int i;
+
+    for (i=0; i<n; i++)
+        s += jalali_get_diff(&in->jtm[i & (SAMPLES - 1)]);
+    sink += s;
+}
+
+/* Day of month running over a few months, as after date arithmetic. */
+static void run_update(struct input* in, int n)
+{
+    struct jtm j;
+    long s = 0;
+    int i;
+
+    for (i=0; i<n; i++) {
+        j = in->jtm[0];
+        j.tm_mday = 1 + (i & (SAMPLES - 1));
+        jalali_update(&j);
+        s += j.tm_mday;
+    }
+    sink += s;
+}
+
+static void run_mktime(struct input* in, int n)
+{
+    struct jtm j;
+    long s = 0;
+    int i;
+
+    for (i=0; i<n; i++) {
+        j = in->jtm[i & (SAMPLES - 1)];
+        s += jmktime(&j);
+    }
+    sink += s;
+}
+
+static void run_localtime_r(struct input* in, int n)
+{
+    struct jtm j;
+    long s = 0;
+    int i;
+
+    for (i=0; i<n; i++) {
+        jlocaltime_r(&in->t[i & (SAMPLES - 1)], &j);
+        s += j.tm_mday;
+    }
+    sink += s;
+}
+
+static void run_strftime(struct input* in, int n)
+{
+    char buf[64];
+    long s = 0;
+    int i;
+
+    for (i=0; i<n; i++)
+        s += jstrftime(buf, sizeof(buf), FORMAT, &in->jtm[i & (SAMPLES - 1)]);
+    sink += s;
+}
+
+static void run_strptime(struct input* in, int n)
+{
+    struct jtm j;
+    long s = 0;
+    int i;
+
+    for (i=0; i<n; i++) {
+        memset(&j, 0, sizeof(j));
+        jstrptime(in->str[i & (SAMPLES - 1)], FORMAT, &j);
+        s += j.tm_mday;
+    }
+    sink += s;
+}
+
+static const struct bench benches[] = {
+    {"jalali_is_jleap", run_is_jleap},
+    {"jalali_get_date", run_get_date},
+    {"jalali_get_diff", run_get_diff},
+    {"jalali_update", run_update},
+    {"jmktime", run_mktime},
+    {"jlocaltime_r", run_localtime_r},
+    {"jstrftime", run_strftime},
+    {"jstrptime", run_strptime},
+};
+
+/* Near and far from UTC Epoch (1348). */
+static const int default_years[] = {1348, 1392, 1, 800, 2500, 3000};
+
+static double elapsed_ns(struct timespec* s, struct timespec* e)
+{
+    return (e->tv_sec - s->tv_sec) * 1e9 + (e->tv_nsec - s->tv_nsec);
+}
+
+static void init_input(struct input* in, int year)
+{
+    struct jtm j = {0};
+    int i;
+
+    j.tm_year = year;
+    j.tm_mon = 0;
+    j.tm_mday = 1;
+    jalali_update(&j);
+
+    in->year = year;
+    in->days = jalali_get_diff(&j);
+
+    for (i=0; i<SAMPLES; i++) {
+        in->t[i] = (time_t) (in->days + i) * 86400 + i * 337;
+        jlocaltime_r(&in->t[i], &in->jtm[i]);
+        jstrftime(in->str[i], sizeof(in->str[i]), FORMAT, &in->jtm[i]);
+    }
+}
+
+/*
+ * Returns best time of repeat runs of n calls, in nanoseconds per call.
+ */
+
+static double measure(const struct bench* b, struct input* in,
+                      int n, int repeat)
+{
+    struct timespec s, e;
+    double ns, best = -1;
+    int r;
+
+    b->run(in, n / 10 + 1);
+
+    for (r=0; r<repeat; r++) {
+        clock_gettime(CLOCK_MONOTONIC, &s);
+        b->run(in, n);
+        clock_gettime(CLOCK_MONOTONIC, &e);
+        ns = elapsed_ns(&s, &e) / n;
+        if (best < 0 || ns < best)
+            best = ns;
+    }
+
+    return best;
+}
+
+static void usage(void)
+{
+    int i;
+
+    printf("microbench: ns/call of libjalali functions over given years\n");
+    printf("usage: microbench [-j] [-c] [-n ITERATIONS] [-r REPEAT] "
+           "[YEAR...]\n");
+    printf("  -j  JSON report instead of text\n");
+    printf("  -c  enable zone cache (jtzcache_enable)\n");
+    printf("defaults: -n 1000000 -r 5, years");
+    for (i=0; i<(int) (sizeof(default_years) / sizeof(int)); i++)
+        printf(" %d", default_years[i]);
+    printf("\n");
+}
+
+int main(int argc, char** argv)
+{
+    const int nb = sizeof(benches) / sizeof(benches[0]);
+    struct input* in;
+    const char* zone = getenv("TZ");
+    int* years;
+    int ny;
+    int n = 1000000;
+    int repeat = 5;
+    int json = 0;
+    int cache = 0;
+    int opt;
+    int i, k;
+    double ns;
+
+    while ((opt = getopt(argc, argv, "jcn:r:h")) != -1) {
+        switch (opt) {
+        case 'j':
+            json = 1;
+            break;
+        case 'c':
+            cache = 1;
+            break;
+        case 'n':
+            n = atoi(optarg);
+            break;
+        case 'r':
+            repeat = atoi(optarg);
+            break;
+        default:
+            usage();
+            exit(opt == 'h' ? 0 : 1);
+        }
+    }
+
+    if (n < 1 || repeat < 1) {
+        printf("microbench: iterations and repeat must be positive\n");
+        exit(1);
+    }
+
+    if (optind < argc) {
+        ny = argc - optind;
+        years = malloc(ny * sizeof(int));
+        for (k=0; k<ny; k++)
+            years[k] = atoi(argv[optind + k]);
+    } else {
+        ny = sizeof(default_years) / sizeof(int);
+        years = malloc(ny * sizeof(int));
+        memcpy(years, default_years, sizeof(default_years));
+    }
+
+    if (cache && jtzcache_enable()) {
+        printf("jtzcache_enable failed.\n");
+        exit(1);
+    }
+
+    in = malloc(sizeof(struct input));
+
+    if (json) {
+        printf("{\n  \"iterations\": %d,\n  \"repeat\": %d,\n", n, repeat);
+        printf("  \"tz\": \"%s\",\n  \"zone_cache\": %s,\n",
+               zone ? zone : "", cache ? "true" : "false");
+        printf("  \"results\": [");
+    } else {
+        printf("# libjalali microbench: %d calls, best of %d, TZ=%s%s\n",
+               n, repeat, zone ? zone : "", cache ? ", zone cache" : "");
+        printf("%-16s %6s %10s\n", "function", "year", "ns/call");
+    }
+
+    for (k=0; k<ny; k++) {
+        init_input(in, years[k]);
+        for (i=0; i<nb; i++) {
+            ns = measure(&benches[i], in, n, repeat);
+            if (json)
+                printf("%s\n    {\"function\": \"%s\", \"year\": %d, "
+                       "\"ns_per_call\": %.2f}", (k || i) ? "," : "",
+                       benches[i].name, years[k], ns);
+            else
+                printf("%-16s %6d %10.2f\n", benches[i].name, years[k], ns);
+        }
+    }
+
+    if (json)
+        printf("\n  ]\n}\n");
+
+    free(in);
+    free(years);
+    exit(0);
+}
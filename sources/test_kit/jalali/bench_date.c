@@ -0,0 +1,78 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+#include "jalali.h"
+#include "jtime.h"
+
+static double elapsed_ns(struct timespec* s, struct timespec* e)
+{
+    return (e->tv_sec - s->tv_sec) * 1e9 + (e->tv_nsec - s->tv_nsec);
+}
+
+int main(int argc, char** argv)
+{
+    if (argc < 3) {
+    printf("wrong arguments given\n");
+    printf("bench_date: per call cost of jalali_get_diff, jalali_get_date,\n");
+    printf("jalali_update and jmktime\n");
+    printf("usage: bench_date ITERATIONS YEAR...\n");
+    exit(1);
+    }
+
+    int n = atoi(argv[1]);
+    int i, k, p = 0;
+    struct jtm j = {0};
+    struct jtm u;
+    struct timespec s, e;
+    double diff_ns, date_ns, update_ns, mktime_ns;
+
+    for (k=2; k<argc; k++) {
+    j.tm_year = atoi(argv[k]);
+    j.tm_mon = 0;
+    j.tm_mday = 1;
+    jalali_create_days_from_date(&j);
+
+    clock_gettime(CLOCK_MONOTONIC, &s);
+    for (i=0; i<n; i++) {
+        p += jalali_get_diff(&j);
+    }
+    clock_gettime(CLOCK_MONOTONIC, &e);
+    diff_ns = elapsed_ns(&s, &e) / n;
+
+    p = jalali_get_diff(&j);
+    clock_gettime(CLOCK_MONOTONIC, &s);
+    for (i=0; i<n; i++) {
+        jalali_get_date(p + (i & 0xff), &j);
+    }
+    clock_gettime(CLOCK_MONOTONIC, &e);
+    date_ns = elapsed_ns(&s, &e) / n;
+
+    /* a day of month running over a few months, as after date arithmetic */
+    clock_gettime(CLOCK_MONOTONIC, &s);
+    for (i=0; i<n; i++) {
+        u = j;
+        u.tm_mon = 0;
+        u.tm_mday = 1 + (i & 0xff);
+        jalali_update(&u);
+    }
+    clock_gettime(CLOCK_MONOTONIC, &e);
+    update_ns = elapsed_ns(&s, &e) / n;
+
+    clock_gettime(CLOCK_MONOTONIC, &s);
+    for (i=0; i<n; i++) {
+        u = j;
+        u.tm_mon = 0;
+        u.tm_mday = 1 + (i & 0xff);
+        p += jmktime(&u);
+    }
+    clock_gettime(CLOCK_MONOTONIC, &e);
+    mktime_ns = elapsed_ns(&s, &e) / n;
+
+    printf("year %d: jalali_get_diff %.1f ns/call, jalali_get_date %.1f ns/call.\n",
+           atoi(argv[k]), diff_ns, date_ns);
+    printf("year %d: jalali_update %.1f ns/call, jmktime %.1f ns/call.\n",
+           atoi(argv[k]), update_ns, mktime_ns);
+    }
+
+    exit(0);
+}
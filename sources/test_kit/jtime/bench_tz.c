@@ -0,0 +1,99 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+#include <pthread.h>
+#include "jalali.h"
+#include "jtime.h"
+
+static int iterations;
+static int fixed;
+static long int gmtoff;
+
+static double elapsed_s(struct timespec* s, struct timespec* e)
+{
+    return (e->tv_sec - s->tv_sec) + (e->tv_nsec - s->tv_nsec) / 1e9;
+}
+
+static void* convert(void* arg)
+{
+    time_t t = *(time_t*) arg;
+    struct jtm j;
+    int i;
+
+    for (i=0; i<iterations; i++) {
+        t += 3607;
+        if (fixed)
+            jlocaltime_off_r(&t, gmtoff, "LOC", &j);
+        else
+            jlocaltime_r(&t, &j);
+    }
+
+    return 0;
+}
+
+static double run(int threads)
+{
+    pthread_t* ids = malloc(threads * sizeof(pthread_t));
+    time_t* starts = malloc(threads * sizeof(time_t));
+    struct timespec s, e;
+    int i;
+
+    clock_gettime(CLOCK_MONOTONIC, &s);
+    for (i=0; i<threads; i++) {
+        starts[i] = 1000000000 + i * 86400;
+        pthread_create(&ids[i], 0, convert, &starts[i]);
+    }
+    for (i=0; i<threads; i++)
+        pthread_join(ids[i], 0);
+    clock_gettime(CLOCK_MONOTONIC, &e);
+
+    free(ids);
+    free(starts);
+
+    return (double) threads * iterations / elapsed_s(&s, &e);
+}
+
+int main(int argc, char** argv)
+{
+    if (argc < 3) {
+    printf("wrong arguments given\n");
+    printf("bench_tz: jlocaltime_r throughput with and without zone cache,\n"
+           "and jlocaltime_off_r throughput at a fixed offset\n");
+    printf("usage: bench_tz ITERATIONS THREADS...\n");
+    exit(1);
+    }
+
+    struct timespec s, e;
+    int k, threads;
+    double libc, cached, off;
+    time_t now = time(0);
+    struct jtm j;
+
+    iterations = atoi(argv[1]);
+    gmtoff = jlocaltime_r(&now, &j)->tm_gmtoff;
+
+    for (k=2; k<argc; k++) {
+    threads = atoi(argv[k]);
+
+    jtzcache_disable();
+    libc = run(threads);
+
+    clock_gettime(CLOCK_MONOTONIC, &s);
+    if (jtzcache_enable()) {
+        printf("jtzcache_enable failed.\n");
+        exit(1);
+    }
+    clock_gettime(CLOCK_MONOTONIC, &e);
+    cached = run(threads);
+
+    fixed = 1;
+    off = run(threads);
+    fixed = 0;
+
+    printf("%d threads: libc %.0f calls/s, cached %.0f calls/s "
+           "(cache built in %.1f ms), fixed offset %.0f calls/s.\n",
+           threads, libc, cached, elapsed_s(&s, &e) * 1e3, off);
+    }
+
+    exit(0);
+}
@@ -12,5 +12,7 @@ int main() {
     jalali_show_time(p);
     jlocaltime_r(&t, &j);
     jalali_show_time(&j);
+    jlocaltime_off_r(&t, j.tm_gmtoff, j.tm_zone, &j);
+    jalali_show_time(&j);
     return 0;
 }
@@ -10,5 +10,6 @@ int main() {
     jlocaltime_r(&t, &j);
     jalali_show_time(&j);
     printf("%d <-> %d\n", (int) jmktime(&j), (int) t);
+    printf("%d <-> %d\n", (int) jmktime_off(&j, j.tm_gmtoff), (int) t);
     return 0;
 }